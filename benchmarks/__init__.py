@@ -0,0 +1 @@
+"""Manual benchmarks, run them with ``python -m benchmarks.<name>``."""
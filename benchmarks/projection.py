@@ -0,0 +1,136 @@
+"""
+Benchmark of device list pages with and without ``fields=``.
+
+Inserts devices for one user inside a transaction of the configured
+database, then builds JSON pages of 1k-10k rows three ways: ORM objects
+validated into ``DeviceDTO`` (the default path of ``GET /api/devices``),
+a Core projection of every column, and a projection of three columns.
+Everything is rolled back at the end.
+
+    python -m benchmarks.projection --devices 10000 --repeat 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic_core import to_json
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from iot_backend.db.dao.device_dao import DeviceDAO
+from iot_backend.db.meta import meta
+from iot_backend.db.models import load_all_models
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.users import User
+from iot_backend.settings import settings
+from iot_backend.web.api.devices.schema import DeviceDTO
+
+PAGE_SIZES = (1000, 5000, 10000)
+FEW_FIELDS = ["id", "name", "type"]
+
+
+async def create_devices(session: AsyncSession, count: int) -> uuid.UUID:
+    """
+    Insert a user owning ``count`` devices.
+
+    :param session: database session.
+    :param count: number of devices.
+    :return: ID of the user.
+    """
+    user_id = await session.scalar(
+        insert(User)
+        .values(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+        .returning(User.id),
+    )
+    await session.execute(
+        insert(Device),
+        [
+            {
+                "name": f"node-{index}",
+                "type": "node",
+                "user_id": user_id,
+                "meta_data": {"site": f"site-{index % 10}", "firmware": "1.2"},
+            }
+            for index in range(count)
+        ],
+    )
+    await session.execute(text("ANALYZE devices"))
+    return user_id
+
+
+async def measure(repeat: int, func: Callable[[], Awaitable[bytes]]) -> str:
+    """
+    Run a coroutine function several times.
+
+    :param repeat: number of runs.
+    :param func: coroutine function to time, returning the response body.
+    :return: median and best time in milliseconds and the body size.
+    """
+    timings: List[float] = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(await func())
+        timings.append((time.perf_counter() - start) * 1000)
+    return (
+        f"median {statistics.median(timings):8.2f} ms, "
+        f"best {min(timings):8.2f} ms, {size / 1024:8.0f} KiB"
+    )
+
+
+async def main(devices: int, repeat: int) -> None:
+    """
+    Run the benchmark.
+
+    :param devices: number of devices to insert.
+    :param repeat: runs of every case.
+    """
+    load_all_models()
+    engine = create_async_engine(str(settings.db_url))
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        await connection.run_sync(meta.create_all)
+        session = AsyncSession(bind=connection)
+        user_id = await create_devices(session, devices)
+        dao = DeviceDAO(session)
+
+        async def orm_page(limit: int) -> bytes:  # noqa: WPS430
+            session.expunge_all()
+            page = await dao.get_all_devices(user_id, limit=limit)
+            dtos = [DeviceDTO.model_validate(device) for device in page.items]
+            return to_json(jsonable_encoder(dtos))
+
+        async def projected_page(limit: int, fields: List[str]) -> bytes:  # noqa: WPS430
+            page = await dao.get_all_devices(user_id, limit=limit, fields=fields)
+            return to_json(page.items)
+
+        all_fields = list(DeviceDTO.model_fields)
+        for limit in PAGE_SIZES:
+            if limit > devices:
+                break
+            cases = {
+                "ORM + DeviceDTO": lambda: orm_page(limit),
+                "projection, all fields": lambda: projected_page(limit, all_fields),
+                f"projection, {','.join(FEW_FIELDS)}": lambda: projected_page(
+                    limit,
+                    FEW_FIELDS,
+                ),
+            }
+            print(f"\npage of {limit} devices")
+            for name, case in cases.items():
+                print(f"  {name:26} {await measure(repeat, case)}")
+
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.devices, args.repeat))
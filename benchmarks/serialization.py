@@ -0,0 +1,117 @@
+"""
+Microbenchmark of JSON response serialization.
+
+Serializes pages of devices the way FastAPI does by default (validation
+against the response model, dump to primitives, UJSONResponse) and the way
+``FastJSONRoute`` does (validation and serialization straight to bytes),
+for ORM rows and for DTOs, plus untyped results (``jsonable_encoder`` and
+ujson against orjson). No database is needed.
+
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import UJSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from iot_backend.db.models import load_all_models
+from iot_backend.db.models.device import Device
+from iot_backend.web.api.devices.schema import DeviceDTO
+from iot_backend.web.responses import FastJSONRoute, dump_json
+
+
+def make_devices(rows: int) -> List[Device]:
+    """
+    Build detached device rows with every DTO field set.
+
+    :param rows: number of devices.
+    :return: devices.
+    """
+    now = datetime.utcnow()
+    user_id = uuid.uuid4()
+    return [
+        Device(
+            id=index,
+            uuid=uuid.uuid4(),
+            name=f"node-{index}",
+            meta_data={"site": f"site-{index % 10}", "firmware": "1.2"},
+            type="node",
+            is_configured=True,
+            mainflux_thing_uuid=uuid.uuid4(),
+            mainflux_thing_secret=uuid.uuid4(),
+            created_at=now,
+            updated_at=now,
+            parent_id=None,
+            user_id=user_id,
+            org_id=1,
+        )
+        for index in range(rows)
+    ]
+
+
+def measure(repeat: int, func: Callable[[], bytes]) -> str:
+    """
+    Run a function several times.
+
+    :param repeat: number of runs.
+    :param func: function to time, returning the response body.
+    :return: median and best time in milliseconds.
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return f"median {statistics.median(timings):8.2f} ms, best {min(timings):8.2f} ms"
+
+
+def main(rows: int, repeat: int) -> None:
+    """
+    Run the benchmark.
+
+    :param rows: devices per response.
+    :param repeat: runs of every case.
+    """
+    load_all_models()
+
+    async def endpoint() -> None:  # noqa: WPS430
+        """Stand-in endpoint of the routes."""
+
+    current = APIRoute("/", endpoint, response_model=list[DeviceDTO])
+    fast = FastJSONRoute("/", endpoint, response_model=list[DeviceDTO])
+    devices = make_devices(rows)
+    dtos = [DeviceDTO.model_validate(device) for device in devices]
+    plain = [dto.model_dump() for dto in dtos]
+
+    def current_path(content: Any) -> bytes:  # noqa: WPS430
+        value = asyncio.run(
+            serialize_response(field=current.response_field, response_content=content),
+        )
+        return UJSONResponse(value).body
+
+    cases = {
+        "ORM rows, current": lambda: current_path(devices),
+        "ORM rows, fast": lambda: fast.render(devices, None).body,
+        "DTOs, current": lambda: current_path(dtos),
+        "DTOs, fast": lambda: fast.render(dtos, None).body,
+        "untyped dicts, current": lambda: UJSONResponse(jsonable_encoder(plain)).body,
+        "untyped dicts, orjson": lambda: dump_json(plain),
+    }
+    print(f"response of {rows} devices")
+    for name, case in cases.items():
+        print(f"  {name:24} {measure(repeat, case)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
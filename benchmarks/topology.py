@@ -0,0 +1,154 @@
+"""
+Benchmark of device topology queries on a large tree.
+
+Builds a tree of gateways and nodes inside a transaction of the configured
+database, times subtree/ancestor queries against a level-by-level walk,
+prints the plan of the children lookup and rolls everything back.
+``--latency-ms`` adds a delay to every statement to emulate the network
+round-trip to a remote database.
+
+    python -m benchmarks.topology --gateways 100 --nodes 100 --latency-ms 1
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import event, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from iot_backend.db.dao.device_dao import DeviceDAO
+from iot_backend.db.meta import meta
+from iot_backend.db.models import load_all_models
+from iot_backend.db.models.device import Device
+from iot_backend.settings import settings
+
+
+async def build_tree(session: AsyncSession, gateways: int, nodes: int) -> int:
+    """
+    Insert a root, ``gateways`` gateways below it and ``nodes`` nodes per gateway.
+
+    Every node gets one sensor below it, so the tree is four levels deep.
+
+    :param session: database session.
+    :param gateways: number of gateways.
+    :param nodes: nodes per gateway.
+    :return: ID of the root.
+    """
+    root = await session.scalar(
+        insert(Device).values(name="site", type="gateway").returning(Device.id),
+    )
+    parents = [root]
+    for width, kind in ((gateways, "gateway"), (nodes, "node"), (1, "node")):
+        rows = [
+            {"name": f"{kind}-{parent}-{index}", "type": kind, "parent_id": parent}
+            for parent in parents
+            for index in range(width)
+        ]
+        inserted = await session.scalars(
+            insert(Device).returning(Device.id),
+            rows,
+        )
+        parents = list(inserted)
+    await session.execute(text("ANALYZE devices"))
+    return root
+
+
+async def walk_levels(session: AsyncSession, device_id: int) -> int:
+    """
+    Collect a subtree with one query per level, as before the CTE.
+
+    :param session: database session.
+    :param device_id: ID of the root.
+    :return: number of devices in the subtree.
+    """
+    devices = [await session.get(Device, device_id)]
+    level = [device_id]
+    while level:
+        rows = await session.scalars(
+            select(Device).where(Device.parent_id.in_(level)),
+        )
+        children = list(rows)
+        devices.extend(children)
+        level = [child.id for child in children]
+    return len(devices)
+
+
+async def measure(repeat: int, func: Callable[[], Awaitable[object]]) -> str:
+    """
+    Run a coroutine function several times.
+
+    :param repeat: number of runs.
+    :param func: coroutine function to time.
+    :return: median and best time in milliseconds.
+    """
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return f"median {statistics.median(timings):8.2f} ms, best {min(timings):8.2f} ms"
+
+
+async def main(gateways: int, nodes: int, repeat: int, latency_ms: float) -> None:
+    """
+    Run the benchmark.
+
+    :param gateways: number of gateways.
+    :param nodes: nodes per gateway.
+    :param repeat: runs of every query.
+    :param latency_ms: emulated round-trip time of every statement.
+    """
+    load_all_models()
+    engine = create_async_engine(str(settings.db_url))
+    if latency_ms:
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def delay(*args: object) -> None:  # noqa: WPS430
+            time.sleep(latency_ms / 1000)
+
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        await connection.run_sync(meta.create_all)
+        session = AsyncSession(bind=connection)
+        root = await build_tree(session, gateways, nodes)
+        count = await session.scalar(select(func.count()).select_from(Device))
+        gateway = await session.scalar(
+            select(Device.id).where(Device.parent_id == root).limit(1),
+        )
+        leaf = await session.scalar(select(func.max(Device.id)))
+        dao = DeviceDAO(session)
+        print(f"devices in table: {count}")
+
+        cases = {
+            "subtree of the root (CTE)": lambda: dao.get_subtree(root),
+            "subtree of the root (per level)": lambda: walk_levels(session, root),
+            "subtree of a gateway (CTE)": lambda: dao.get_subtree(gateway),
+            "subtree of a gateway (per level)": lambda: walk_levels(session, gateway),
+            "ancestors of a leaf (CTE)": lambda: dao.get_ancestors(leaf),
+        }
+        for name, case in cases.items():
+            session.expunge_all()
+            print(f"{name:34} {await measure(repeat, case)}")
+
+        plan = await session.execute(
+            text("EXPLAIN ANALYZE SELECT id FROM devices WHERE parent_id = :parent"),
+            {"parent": gateway},
+        )
+        print("\nchildren lookup used by the recursive step:")
+        for (line,) in plan:
+            print(f"  {line}")
+
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--gateways", type=int, default=100)
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    asyncio.run(main(args.gateways, args.nodes, args.repeat, args.latency_ms))
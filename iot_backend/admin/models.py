@@ -2,8 +2,8 @@ from typing import Any, Coroutine
 
 from fastapi import Request
 from fastapi_users.password import PasswordHelper
-from sqladmin import ModelView
 
+from iot_backend.admin.paging import KeysetModelView
 from iot_backend.db.models.alert import Alert
 from iot_backend.db.models.device import Device
 from iot_backend.db.models.group import Group
@@ -13,7 +13,7 @@ from iot_backend.db.models.tag import Tag
 from iot_backend.db.models.users import User
 
 
-class UserView(ModelView, model=User):
+class UserView(KeysetModelView, model=User):
     column_list = [
         "email",
         "is_active",
@@ -30,15 +30,15 @@ class UserView(ModelView, model=User):
         return super().insert_model(request, data)
 
 
-class OrganizationView(ModelView, model=Organization):
+class OrganizationView(KeysetModelView, model=Organization):
     column_list = ["name"]
 
 
-class GroupView(ModelView, model=Group):
+class GroupView(KeysetModelView, model=Group):
     column_list = ["name", "organization_id"]
 
 
-class DeviceView(ModelView, model=Device):
+class DeviceView(KeysetModelView, model=Device):
     column_list = [
         "name",
         "meta_data",
@@ -46,22 +46,30 @@ class DeviceView(ModelView, model=Device):
         "mainflux_thing_uuid",
         "mainflux_thing_secret",
         "is_configured",
-        "tags",
     ]
 
 
-class AlertView(ModelView, model=Alert):
+class AlertView(KeysetModelView, model=Alert):
     column_list = [
         "name",
         "threshold",
+        "upper_threshold",
         "comparator",
+        "window_function",
+        "window_seconds",
+        "window_samples",
+        "for_seconds",
+        "hysteresis",
+        "renotify_seconds",
+        "anomaly_span",
         "status",
         "user_id",
         "device_id",
+        "tag_id",
     ]
 
 
-class TagView(ModelView, model=Tag):
+class TagView(KeysetModelView, model=Tag):
     column_list = [
         "name",
         "label",
@@ -72,5 +80,9 @@ class TagView(ModelView, model=Tag):
         "unit",
     ]
 
-class MessageView(ModelView, model=Message):
-    column_exclude_list =["id"]
+
+class MessageView(KeysetModelView, model=Message):
+    column_exclude_list = ["id"]
+    # Millions of rows: newest first, no count(*) over the table.
+    estimated_count = True
+    keyset_descending = True
@@ -0,0 +1,151 @@
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from sqladmin import ModelView
+from sqladmin.pagination import PageControl, Pagination
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette.datastructures import URL
+from starlette.requests import Request
+
+from iot_backend.db.dao.base_dao import (
+    CountMode,
+    count_rows,
+    decode_cursor,
+    encode_cursor,
+)
+
+
+@dataclass
+class KeysetPagination(Pagination):
+    """
+    Pagination moving between neighbouring pages with cursors.
+
+    Links only go to the previous and next page, each one seeking from
+    the first or last row of the current page.
+    """
+
+    first_cursor: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def add_pagination_urls(self, base_url: URL) -> None:
+        base_url = base_url.remove_query_params(["after", "before", "page"])
+        if self.has_previous:
+            if self.page == 2:
+                previous = base_url
+            else:
+                previous = base_url.include_query_params(
+                    page=self.page - 1,
+                    before=self.first_cursor,
+                )
+            self.page_controls.append(PageControl(self.page - 1, str(previous)))
+        current = base_url.include_query_params(page=self.page)
+        self.page_controls.append(PageControl(self.page, str(current)))
+        if self.has_next:
+            following = base_url.include_query_params(
+                page=self.page + 1,
+                after=self.next_cursor,
+            )
+            self.page_controls.append(PageControl(self.page + 1, str(following)))
+
+
+class KeysetModelView(ModelView):
+    """
+    Model view paging by primary key instead of OFFSET.
+
+    Listed relationships are loaded with one ``selectinload`` per
+    relationship. Pages are read with a range scan of the primary key
+    index whatever the page number, and with ``estimated_count`` the
+    total shown is the planner's estimate instead of a ``count(*)``
+    over the whole table. Lists sorted by another column fall back to
+    the default offset paging.
+    """
+
+    estimated_count = False
+    keyset_descending = False
+
+    async def count(self, request: Request, stmt: Optional[Select] = None) -> int:
+        if not self.estimated_count:
+            return await super().count(request, stmt)
+        return await self._estimate(self.list_query(request))
+
+    async def list(self, request: Request) -> Pagination:
+        if request.query_params.get("sortBy"):
+            return await super().list(request)
+        page = self.validate_page_number(request.query_params.get("page"), 1)
+        page_size = self.validate_page_number(request.query_params.get("pageSize"), 0)
+        page_size = min(page_size or self.page_size, max(self.page_size_options))
+        search = request.query_params.get("search")
+        after = request.query_params.get("after")
+        before = request.query_params.get("before")
+
+        stmt = self.list_query(request)
+        for relation in dict.fromkeys(self._list_relations):
+            stmt = stmt.options(selectinload(relation))
+        if search:
+            stmt = self.search_query(stmt=stmt, term=search)
+        if self.estimated_count:
+            count = await self._estimate(stmt)
+        else:
+            count = await super().count(
+                request,
+                select(func.count()).select_from(stmt.subquery()),
+            )
+
+        pk = self.pk_columns[0]
+        forward = pk.desc() if self.keyset_descending else pk.asc()
+        backward = pk.asc() if self.keyset_descending else pk.desc()
+        if after:
+            (key,) = decode_cursor(after, 1)
+            stmt = stmt.where(pk < key if self.keyset_descending else pk > key)
+        elif before:
+            (key,) = decode_cursor(before, 1)
+            stmt = stmt.where(pk > key if self.keyset_descending else pk < key)
+        elif page > 1:
+            # A page opened by number, e.g. from a bookmark.
+            stmt = stmt.offset((page - 1) * page_size)
+        stmt = stmt.order_by(backward if before else forward).limit(page_size + 1)
+
+        rows: List[Any] = list(await self._run_query(stmt))
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if before:
+            rows.reverse()
+            has_more = True
+        seen = (page - 1) * page_size + len(rows)
+        return KeysetPagination(
+            rows=rows,
+            page=page,
+            page_size=page_size,
+            # An estimate can't be lower than what was already shown.
+            count=max(count, seen + (1 if has_more else 0)),
+            first_cursor=encode_cursor([getattr(rows[0], pk.key)]) if rows else None,
+            next_cursor=(
+                encode_cursor([getattr(rows[-1], pk.key)]) if rows and has_more else None
+            ),
+        )
+
+    async def _estimate(self, stmt: Select) -> int:
+        async with self.session_maker() as session:
+            if stmt.whereclause is None:
+                estimate = await self._table_estimate(session)
+                if estimate is not None:
+                    return estimate
+            return await count_rows(session, stmt, CountMode.ESTIMATE) or 0
+
+    async def _table_estimate(self, session: AsyncSession) -> Optional[int]:
+        # Kept up to date by autovacuum, -1 until the table is first analyzed.
+        reltuples = await session.scalar(
+            text(
+                "SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)",
+            ),
+            {"table": self.model.__tablename__},
+        )
+        if reltuples is None or reltuples < 0:
+            return None
+        return int(reltuples)
@@ -1,4 +1,5 @@
-from typing import Any, AsyncGenerator
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Callable, ContextManager, Iterator, List
 
 import pytest
 from fakeredis import FakeServer
@@ -6,6 +7,7 @@ from fakeredis.aioredis import FakeConnection
 from fastapi import FastAPI
 from httpx import AsyncClient
 from redis.asyncio import ConnectionPool
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -14,6 +16,7 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from iot_backend.db.dependencies import get_db_session
+from iot_backend.db.instrumentation import instrument_engine, track_queries
 from iot_backend.db.utils import create_database, drop_database
 from iot_backend.services.redis.dependency import get_redis_pool
 from iot_backend.settings import settings
@@ -45,6 +48,7 @@ async def _engine() -> AsyncGenerator[AsyncEngine, None]:
     await create_database()
 
     engine = create_async_engine(str(settings.db_url))
+    instrument_engine(engine)
     async with engine.begin() as conn:
         await conn.run_sync(meta.create_all)
 
@@ -85,6 +89,62 @@ async def dbsession(
         await connection.close()
 
 
+@pytest.fixture
+def record_statements(
+    dbsession: AsyncSession,
+) -> Callable[[], ContextManager[List[str]]]:
+    """
+    Get a context manager that collects SQL sent through the test session.
+
+    :param dbsession: current session.
+    :return: context manager yielding the list of executed statements.
+    """
+
+    @contextmanager
+    def _record() -> Iterator[List[str]]:  # noqa: WPS430
+        statements: List[str] = []
+        connection = dbsession.sync_session.connection()
+
+        def _before_cursor_execute(*args: Any) -> None:  # noqa: WPS430
+            statements.append(args[2])
+
+        event.listen(connection, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(connection, "before_cursor_execute", _before_cursor_execute)
+
+    return _record
+
+
+@pytest.fixture
+def assert_max_queries(
+    _engine: AsyncEngine,
+) -> Callable[[int], ContextManager[List[str]]]:
+    """
+    Get a context manager failing when the block runs too many statements.
+
+    Use it around requests to catch N+1 patterns::
+
+        with assert_max_queries(3):
+            await client.get("/api/devices/")
+
+    :param _engine: current engine, instrumented.
+    :return: context manager yielding the statements run so far.
+    """
+
+    @contextmanager
+    def _assert(limit: int) -> Iterator[List[str]]:  # noqa: WPS430
+        with track_queries() as stats:
+            yield stats.statements
+        assert stats.count <= limit, (
+            f"{stats.count} statements run, at most {limit} expected:\n"
+            + "\n".join(stats.statements)
+        )
+
+    return _assert
+
+
 @pytest.fixture
 async def fake_redis_pool() -> AsyncGenerator[ConnectionPool, None]:
     """
@@ -1,7 +1,11 @@
+from typing import Optional, Sequence
+from uuid import UUID
+
 from fastapi import Depends, HTTPException
+from sqlalchemy import update
 from iot_backend.db.dao.base_dao import BaseDAO
 from iot_backend.db.dependencies import get_db_session
-from iot_backend.db.models.action import Action
+from iot_backend.db.models.action import Action, ActionStatus
 
 
 class ActionDAO(BaseDAO[Action]):
@@ -13,8 +17,86 @@ class ActionDAO(BaseDAO[Action]):
         action = await self.get_by("id", id, unique=True)
         if not action:
             raise HTTPException(status_code=404, detail="Action not found")
-            # Toggle the is_enabled property
+        return await self.toggle(action)
+
+    async def toggle(self, action: Action) -> Action:
+        """
+        Toggle the is_enabled property of an already loaded action.
+
+        An enabled action is pending again, until its device acknowledges it.
+
+        Args:
+            action (Action): the action to toggle.
+
+        Returns:
+            Action: the updated action.
+        """
         action.is_enabled = not action.is_enabled
+        if action.is_enabled:
+            action.status = ActionStatus.PENDING
         await self.session.commit()
         await self.session.refresh(action)
-        return action
\ No newline at end of file
+        return action
+
+    async def remove(self, action: Action) -> None:
+        """
+        Delete an already loaded action.
+
+        Args:
+            action (Action): the action to delete.
+        """
+        await self.session.delete(action)
+        await self.session.commit()
+
+    async def acknowledge(
+        self,
+        device_id: int,
+        action_uuid: UUID,
+        status: ActionStatus,
+    ) -> Optional[int]:
+        """
+        Record the outcome a device reports for a pending action.
+
+        Args:
+            device_id (int): the reporting device.
+            action_uuid (UUID): UUID of the action.
+            status (ActionStatus): completed or failed.
+
+        Returns:
+            Optional[int]: ID of the action, None if it isn't a pending
+            action of the device.
+        """
+        action_id = await self.session.scalar(
+            update(Action)
+            .where(
+                Action.uuid == action_uuid,
+                Action.device_id == device_id,
+                Action.status == ActionStatus.PENDING,
+            )
+            .values(status=status)
+            .returning(Action.id)
+            .execution_options(synchronize_session=False),
+        )
+        await self.session.commit()
+        return action_id
+
+    async def fail_pending(self, ids: Sequence[int]) -> int:
+        """
+        Mark pending actions as failed with one statement.
+
+        Args:
+            ids (Sequence[int]): IDs of the actions.
+
+        Returns:
+            int: number of actions that were still pending.
+        """
+        if not ids:
+            return 0
+        failed = await self.session.execute(
+            update(Action)
+            .where(Action.id.in_(ids), Action.status == ActionStatus.PENDING)
+            .values(status=ActionStatus.FAILED)
+            .execution_options(synchronize_session=False),
+        )
+        await self.session.commit()
+        return failed.rowcount
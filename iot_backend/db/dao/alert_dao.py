@@ -1,13 +1,14 @@
-from typing import Any, List, Optional, Union
+from typing import Any, List, Optional, Sequence, Union
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from iot_backend.db.dao.base_dao import CountMode, Page, paginate
+from iot_backend.db.dao.loaders import LOADER_COLUMNS, get_loaders
 from iot_backend.db.dependencies import get_db_session
 from iot_backend.db.models.alert import Alert
-from iot_backend.db.models.device import Device
 
 
 class AlertDAO:
@@ -35,7 +36,9 @@ class AlertDAO:
             - None if no match is found.
         """
         query = select(Alert)
-        if (
+        if unique and field in LOADER_COLUMNS[Alert]:
+            response = await get_loaders(self.session).alert(field).load(value)
+        elif (
             unique
             and hasattr(Alert, field)
             and getattr(Alert.__table__.columns[field], "unique", False)
@@ -81,6 +84,15 @@ class AlertDAO:
         check_external_message_template: str,
         device_id: int,
         user_id: UUID,
+        tag_id: Optional[int] = None,
+        upper_threshold: Optional[float] = None,
+        window_function: Optional[str] = None,
+        window_seconds: Optional[float] = None,
+        window_samples: Optional[int] = None,
+        for_seconds: Optional[float] = None,
+        hysteresis: Optional[float] = None,
+        renotify_seconds: Optional[float] = None,
+        anomaly_span: Optional[int] = None,
     ) -> None:
         """
         Add single alert to session.
@@ -94,6 +106,15 @@ class AlertDAO:
             user_id (str): User ID associated with the alert.
             check_external_id (str): External ID for the check associated with the alert.
             check_external_message_template (str): Message template for the check associated with the alert.
+            tag_id (Optional[int]): Tag the alert watches, every tag of the device when None.
+            upper_threshold (Optional[float]): Upper bound of a "Range" alert.
+            window_function (Optional[str]): Aggregate compared instead of single values.
+            window_seconds (Optional[float]): Length of the window in seconds.
+            window_samples (Optional[int]): Length of the window in samples.
+            for_seconds (Optional[float]): How long a breach lasts before firing.
+            hysteresis (Optional[float]): How far past the threshold values clear the alert.
+            renotify_seconds (Optional[float]): Pause between notifications while firing.
+            anomaly_span (Optional[int]): Samples weighted by an "Anomaly" alert.
 
         Raises:
             HTTPException: If the alert name is not unique.
@@ -110,45 +131,70 @@ class AlertDAO:
                 name=name,
                 comparator=comparator,
                 threshold=threshold,
+                upper_threshold=upper_threshold,
+                window_function=window_function,
+                window_seconds=window_seconds,
+                window_samples=window_samples,
+                for_seconds=for_seconds,
+                hysteresis=hysteresis,
+                renotify_seconds=renotify_seconds,
+                anomaly_span=anomaly_span,
                 status=status,
                 check_external_id=check_external_id,
                 check_external_message_template=check_external_message_template,
                 device_id=device_id,
+                tag_id=tag_id,
                 user_id=user_id,
             )
         )
 
     async def get_all_alerts(
-        self, user_id: UUID, limit: int, offset: int, device_id: Optional[int] = None
-    ) -> list[Alert]:
+        self,
+        user_id: UUID,
+        limit: int,
+        offset: int = 0,
+        device_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.NONE,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[Alert]:
         """
-        Get all alert models with limit/offset pagination.
+        Get a page of the user's alerts, ordered by ID.
 
         :param limit: limit of alerts.
-        :param offset: offset of alerts.
+        :param offset: offset of alerts, only used without a cursor.
         :param user_id: user ID.
         :param device_id: device ID.
-        :return: list of tags.
+        :param cursor: cursor of the previous page.
+        :param count: whether and how to count all alerts.
+        :param fields: columns to return as dicts instead of alerts.
+        :return: page of alerts.
         """
         query = select(Alert).where(Alert.user_id == user_id)
         if device_id:
-            device = await self.session.get(Device, device_id)
+            device = await get_loaders(self.session).device().load(device_id)
             if not device or device.user_id != user_id:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You do not have permission to access this device's alerts.",
                 )
             query = query.where(Alert.device_id == device_id)
-        query = query.offset(offset).limit(limit)
-        raw_alerts = await self.session.scalars(query)
-        alerts = raw_alerts.all()
+        page = await paginate(
+            self.session,
+            query,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            count=count,
+            fields=fields,
+        )
 
-        if not alerts:
+        if not page.items and cursor is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="There are no Alerts for this device.",
             )
-        return alerts
+        return page
 
     async def disable_alert(self, alert_id: int, user_id: UUID) -> None:
         """
@@ -1,15 +1,325 @@
-from typing import Any, Generic, TypeVar, List, Optional, Union
-
-from fastapi import Depends
+import base64
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Generic, TypeVar, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import ColumnElement, Select, func, literal, select, tuple_
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
 from iot_backend.db.base import Base
 from iot_backend.db.dependencies import get_db_session
 
 ModelType = TypeVar("ModelType", bound=Base)
 SchemaType = TypeVar("SchemaType", bound=BaseModel)
+ItemType = TypeVar("ItemType")
+
+# Integers a cursor may hold, the range of the widest integer column.
+MIN_BIGINT = -(2**63)
+MAX_BIGINT = 2**63 - 1
+
+# How long a cached total count is reused, and how many are kept per process.
+COUNT_CACHE_SECONDS = 30.0
+COUNT_CACHE_SIZE = 1024
+
+_count_cache: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+
+class CountMode(str, Enum):
+    """How the total number of rows of a list is computed."""
+
+    NONE = "none"
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATE = "estimate"
+
+
+@dataclass
+class Page(Generic[ItemType]):
+    """
+    One page of a list.
+
+    ``next_cursor`` is None on the last page. ``total`` is only set when
+    a count was requested.
+    """
+
+    items: List[ItemType]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"uuid": str(value)}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    if isinstance(value, dict) and "uuid" in value:
+        return UUID(value["uuid"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor.
+
+    Args:
+        values (Sequence[Any]): values of the sort columns.
+
+    Returns:
+        str: URL-safe cursor.
+    """
+    raw = json.dumps([_dump_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor made by ``encode_cursor``.
+
+    Args:
+        cursor (str): cursor from the client.
+        size (int): expected number of values.
+
+    Returns:
+        List[Any]: values of the sort columns.
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_load_value(value) for value in json.loads(raw)]
+    except (ValueError, TypeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor.",
+        )
+    return values
+
+
+def check_cursor(values: Sequence[Any], order_by: Sequence[ColumnElement[Any]]) -> None:
+    """
+    Check that cursor values fit the columns they are compared to.
+
+    Cursors come back from clients, a value of the wrong type would
+    only fail in the database.
+
+    Args:
+        values (Sequence[Any]): decoded values of the sort columns.
+        order_by (Sequence[ColumnElement]): sort key columns.
+
+    Raises:
+        HTTPException: 400 if a value doesn't fit its column.
+    """
+    for value, column in zip(values, order_by):
+        try:
+            expected: Any = column.type.python_type
+        except NotImplementedError:
+            expected = object
+        if isinstance(expected, type) and issubclass(expected, Enum):
+            expected = str
+        elif expected in {float, Decimal}:
+            expected = (int, float)
+        valid = isinstance(value, expected) and (
+            expected is bool or not isinstance(value, bool)
+        )
+        if isinstance(value, int) and not MIN_BIGINT <= value <= MAX_BIGINT:
+            valid = False
+        if isinstance(value, str) and "\x00" in value:
+            valid = False
+        if value is None or not valid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor.",
+            )
+
+
+class Explain(Executable, ClauseElement):
+    """``EXPLAIN (FORMAT JSON)`` of a query, sent with its bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, query: Select):
+        self.query = query
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kwargs: Any) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.query, **kwargs)}"
+
+
+async def count_rows(
+    session: AsyncSession,
+    query: Select,
+    mode: CountMode = CountMode.EXACT,
+) -> Optional[int]:
+    """
+    Count rows of a query.
+
+    ``exact`` runs ``count(*)``, ``cached`` reuses an exact count of the
+    same query for ``COUNT_CACHE_SECONDS`` in this process, ``estimate``
+    reads the row estimate of the planner, which costs no scan at all
+    but is only as good as the table statistics.
+
+    Args:
+        session (AsyncSession): database session.
+        query (Select): query to count, ordering and limits are ignored.
+        mode (CountMode): how to count.
+
+    Returns:
+        Optional[int]: number of rows, None for ``CountMode.NONE``.
+    """
+    if mode == CountMode.NONE:
+        return None
+    query = query.order_by(None).limit(None).offset(None)
+    if mode == CountMode.ESTIMATE:
+        plan = (await session.execute(Explain(query))).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    count_query = select(func.count()).select_from(query.subquery())
+    key = ""
+    if mode == CountMode.CACHED:
+        compiled = count_query.compile(dialect=postgresql.dialect())
+        key = hashlib.sha1(
+            f"{compiled}|{sorted(compiled.params.items(), key=str)}".encode(),
+        ).hexdigest()
+        cached = _count_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+    total = (await session.execute(count_query)).scalar_one()
+    if mode == CountMode.CACHED:
+        _count_cache[key] = (time.monotonic() + COUNT_CACHE_SECONDS, total)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return total
+
+
+def project(model: Any, fields: Sequence[str]) -> List[ColumnElement[Any]]:
+    """
+    Get the table columns of a model for a list of field names.
+
+    Args:
+        model (Any): model class.
+        fields (Sequence[str]): names of the columns.
+
+    Returns:
+        List[ColumnElement]: columns, in the order of the names.
+
+    Raises:
+        HTTPException: 400 if a name is not a column of the model.
+    """
+    table_columns = model.__table__.columns
+    unknown = [name for name in fields if name not in table_columns]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {unknown}.",
+        )
+    return [table_columns[name] for name in fields]
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    order_by: Optional[Sequence[ColumnElement[Any]]] = None,
+    descending: bool = False,
+    count: CountMode = CountMode.NONE,
+    fields: Optional[Sequence[str]] = None,
+) -> Page[Any]:
+    """
+    Fetch one page of a query with keyset pagination.
+
+    Rows are ordered by ``order_by`` (by default the primary key of the
+    queried model), which must end with a unique, non-null column so the
+    order is total, e.g. ``(created_at, id)``. The next page starts after
+    the last row of the previous one, so it costs an index range scan no
+    matter how deep the client goes, and inserts or deletes between
+    requests never skip or repeat rows.
+
+    ``offset`` is still honored for old clients when no cursor is given.
+
+    With ``fields`` only those columns are selected and rows come back as
+    plain dicts, skipping ORM instances and the identity map entirely.
+
+    Args:
+        session (AsyncSession): database session.
+        query (Select): filtered query of one model, without ordering.
+        limit (int): page size.
+        cursor (Optional[str]): cursor returned with the previous page.
+        offset (int): rows to skip, only used without a cursor.
+        order_by (Optional[Sequence[ColumnElement]]): sort key columns.
+        descending (bool): sort from the largest key.
+        count (CountMode): whether and how to count all rows.
+        fields (Optional[Sequence[str]]): columns to return as dicts.
+
+    Returns:
+        Page[Any]: rows of the page, the next cursor and the total.
+    """
+    entity = query.column_descriptions[0]["entity"]
+    if order_by is None:
+        order_by = [entity.id]
+    total = await count_rows(session, query, count)
+
+    page_query = query
+    if cursor is not None:
+        values = decode_cursor(cursor, len(order_by))
+        check_cursor(values, order_by)
+        key = tuple_(*order_by)
+        after = tuple_(
+            *(literal(value, column.type) for value, column in zip(values, order_by)),
+        )
+        page_query = page_query.where(key < after if descending else key > after)
+    elif offset:
+        page_query = page_query.offset(offset)
+    page_query = page_query.order_by(
+        *(column.desc() if descending else column.asc() for column in order_by),
+    ).limit(limit + 1)
+
+    if fields is None:
+        rows: List[Any] = list((await session.scalars(page_query)).all())
+    else:
+        columns = project(entity, fields)
+        keys = [column for column in order_by if column.key not in fields]
+        result = await session.execute(page_query.with_only_columns(*columns, *keys))
+        rows = list(result.mappings().all())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [
+                getattr(last, column.key) if fields is None else last[column.key]
+                for column in order_by
+            ],
+        )
+    if fields is not None:
+        rows = [{name: row[name] for name in fields} for row in rows]
+    return Page(items=rows, next_cursor=next_cursor, total=total)
 
 
 class BaseDAO(Generic[ModelType]):
@@ -151,7 +461,36 @@ class BaseDAO(Generic[ModelType]):
         Returns:
             List[ModelType]: A list of model instances.
         """
-        result = await self.session.execute(
-            select(self.model).limit(limit).offset(offset)
+        page = await self.list_page(limit=limit, offset=offset)
+        return page.items
+
+    async def list_page(
+        self,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.NONE,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[ModelType]:
+        """
+        Retrieve a page of model instances ordered by ID.
+
+        Args:
+            limit (int, optional): The maximum number of instances to retrieve. Defaults to 10.
+            offset (int, optional): The offset for pagination without a cursor. Defaults to 0.
+            cursor (Optional[str]): The cursor of the previous page.
+            count (CountMode): Whether and how to count all instances.
+            fields (Optional[Sequence[str]]): Columns to return as dicts instead of instances.
+
+        Returns:
+            Page[ModelType]: The instances and the cursor of the next page.
+        """
+        return await paginate(
+            self.session,
+            select(self.model),
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            count=count,
+            fields=fields,
         )
-        return list(result.scalars().all())
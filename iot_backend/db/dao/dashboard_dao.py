@@ -0,0 +1,161 @@
+from datetime import datetime
+from typing import Any, Dict
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import (
+    ColumnElement,
+    Text,
+    cast,
+    func,
+    literal,
+    select,
+    true,
+    type_coerce,
+)
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dependencies import get_db_session
+from iot_backend.db.models.action import Action
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.message import Message
+from iot_backend.db.models.notification import Notification
+from iot_backend.db.models.tag import Tag
+
+
+def _json_agg(
+    row: ColumnElement[Any],
+    order: ColumnElement[Any],
+) -> ColumnElement[Any]:
+    """Aggregate rows into a JSON array, an empty one when there are none."""
+    return func.coalesce(
+        func.jsonb_agg(aggregate_order_by(row, order)),
+        literal("[]", JSONB),
+    )
+
+
+class DashboardDAO:
+    """Class for reading everything a device page shows at once."""
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def get_dashboard(
+        self,
+        device_id: int,
+        user_id: UUID,
+        since: datetime,
+    ) -> Dict[str, Any]:
+        """
+        Get a device with its tags, latest tag values, enabled actions and
+        notification counts, in one statement.
+
+        Every part is a subquery of a single SELECT built as JSON by
+        Postgres, so the whole page costs one round-trip. Latest values
+        are read through ``ix_messages_tag_id_time``, one index probe per
+        tag.
+
+        :param device_id: ID of the device.
+        :param user_id: ID of the user.
+        :param since: start of the notification count window.
+        :raises HTTPException: 404 if the device doesn't exist, 403 if it
+            belongs to another user.
+        :return: ``device``, ``tags``, ``actions`` and ``notifications``.
+        """
+        latest = (
+            select(
+                func.jsonb_build_object(
+                    "value",
+                    Message.value,
+                    "unit",
+                    Message.unit,
+                    "time",
+                    Message.time,
+                ),
+            )
+            .where(Message.tag_id == Tag.id)
+            .order_by(Message.time.desc())
+            .limit(1)
+            .correlate(Tag)
+            .scalar_subquery()
+        )
+        tag_row = func.to_jsonb(Tag.__table__.table_valued()).op("||")(
+            func.jsonb_build_object("latest", latest),
+        )
+        tags = (
+            select(_json_agg(tag_row, Tag.id))
+            .where(Tag.device_id == device_id)
+            .scalar_subquery()
+        )
+        # Enum columns store member names, the API uses their values.
+        action_row = func.jsonb_build_object(
+            "id",
+            Action.id,
+            "device_id",
+            Action.device_id,
+            "status",
+            func.lower(cast(Action.status, Text)),
+            "is_enabled",
+            Action.is_enabled,
+            "values",
+            Action.values,
+            "created_at",
+            Action.created_at,
+            "updated_at",
+            Action.updated_at,
+        )
+        actions = (
+            select(_json_agg(action_row, Action.id))
+            .where(Action.device_id == device_id)
+            .where(Action.is_enabled == true())
+            .scalar_subquery()
+        )
+        levels = (
+            select(Notification.level, func.count().label("count"))
+            .where(Notification.device_id == device_id)
+            .where(Notification.created_at >= since)
+            .group_by(Notification.level)
+            .subquery()
+        )
+        notifications = select(
+            func.coalesce(
+                func.jsonb_object_agg(levels.c.level, levels.c.count),
+                literal("{}", JSONB),
+            ),
+        ).scalar_subquery()
+        row = (
+            await self.session.execute(
+                select(
+                    Device.user_id,
+                    type_coerce(
+                        func.to_jsonb(Device.__table__.table_valued()),
+                        JSONB,
+                    ).label("device"),
+                    type_coerce(tags, JSONB).label("tags"),
+                    type_coerce(actions, JSONB).label("actions"),
+                    type_coerce(notifications, JSONB).label("notifications"),
+                ).where(Device.id == device_id),
+            )
+        ).one_or_none()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Device not found.",
+            )
+        if str(row.user_id) != str(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User does not have permission to access this data.",
+            )
+        by_level: Dict[str, int] = row.notifications
+        return {
+            "device": row.device,
+            "tags": row.tags,
+            "actions": row.actions,
+            "notifications": {
+                "since": since,
+                "total": sum(by_level.values()),
+                "by_level": by_level,
+            },
+        }
@@ -1,10 +1,25 @@
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import (
+    Integer,
+    Row,
+    Text,
+    any_,
+    cast,
+    func,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array, insert
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from iot_backend.db.dao.base_dao import CountMode, Page, paginate
+from iot_backend.db.dao.loaders import LOADER_COLUMNS, get_loaders
 from iot_backend.db.dependencies import get_db_session
 from iot_backend.db.models.device import Device
 
@@ -34,7 +49,9 @@ class DeviceDAO:
             - None if no match is found.
         """
         query = select(Device)
-        if (
+        if unique and field in LOADER_COLUMNS[Device]:
+            response = await get_loaders(self.session).device(field).load(value)
+        elif (
             unique
             and hasattr(Device, field)
             and getattr(Device.__table__.columns[field], "unique", False)
@@ -112,27 +129,39 @@ class DeviceDAO:
         )
 
     async def get_all_devices(
-        self, user_id: UUID, limit: int, offset: int
-    ) -> list[Device]:
+        self,
+        user_id: UUID,
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.NONE,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[Device]:
         """
-        Get all device models with limit/offset pagination.
+        Get a page of the user's devices, ordered by ID.
 
         :param user_id: user ID.
         :param limit: limit of device.
-        :param offset: offset of device.
-        :return: stream of device.
+        :param offset: offset of device, only used without a cursor.
+        :param cursor: cursor of the previous page.
+        :param count: whether and how to count all devices.
+        :param fields: columns to return as dicts instead of devices.
+        :return: page of devices.
         """
-        query = (
-            select(Device).where(Device.user_id == user_id).offset(offset).limit(limit)
+        page = await paginate(
+            self.session,
+            select(Device).where(Device.user_id == user_id),
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            count=count,
+            fields=fields,
         )
-        raw_devices = await self.session.scalars(query)
-        devices = raw_devices.all()
-
-        if not devices:
+        if not page.items and cursor is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="No Devices Found."
             )
-        return devices
+        return page
 
     async def update_device_metadata(
         self, device_id: int, user_id: UUID, metadata: dict
@@ -145,9 +174,7 @@ class DeviceDAO:
         :param metadata: new metadata for the device model.
         :return: updated device model or None if not found.
         """
-        query = select(Device).where(Device.id == device_id)
-        row = await self.session.scalars(query)
-        device = row.one_or_none()
+        device = await get_loaders(self.session).device().load(device_id)
 
         if device is None:
             raise HTTPException(
@@ -160,6 +187,85 @@ class DeviceDAO:
         device.meta_data = metadata
         return device
 
+    async def merge_device_metadata(
+        self, device_id: int, user_id: UUID, patch: Dict[str, Any]
+    ) -> Device:
+        """
+        Apply a JSON merge patch to the top-level keys of device metadata.
+
+        Keys set to null are removed, other keys are added or replaced, and
+        keys missing from the patch are kept. The document is changed by a
+        single UPDATE in the database, so concurrent patches of different
+        keys don't overwrite each other. Nested objects are replaced as a
+        whole.
+
+        :param device_id: ID of the device model.
+        :param user_id: user ID.
+        :param patch: merge patch document.
+        :return: updated device model.
+        """
+        device = await get_loaders(self.session).device().load(device_id)
+        if device is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Device not found"
+            )
+        if device.user_id != user_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+
+        removed = [key for key, value in patch.items() if value is None]
+        changed = {key: value for key, value in patch.items() if value is not None}
+        document = func.coalesce(Device.meta_data, cast({}, JSONB))
+        if removed:
+            document = document.op("-")(cast(array(removed), ARRAY(Text)))
+        rows = await self.session.scalars(
+            update(Device)
+            .where(Device.id == device_id)
+            .values(meta_data=document.op("||")(cast(changed, JSONB)))
+            .returning(Device),
+            execution_options={"populate_existing": True},
+        )
+        return rows.one()
+
+    async def search_devices(
+        self,
+        user_id: UUID,
+        contains: Optional[Dict[str, Any]] = None,
+        has_keys: Optional[List[str]] = None,
+        limit: int = 10,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.NONE,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[Device]:
+        """
+        Find the user's devices by metadata, using the GIN index.
+
+        :param user_id: user ID.
+        :param contains: document the metadata must contain,
+            e.g. ``{"site": "north", "firmware": "1.2"}``.
+        :param has_keys: keys the metadata must have.
+        :param limit: limit of devices.
+        :param offset: offset of devices, only used without a cursor.
+        :param cursor: cursor of the previous page.
+        :param count: whether and how to count all matches.
+        :param fields: columns to return as dicts instead of devices.
+        :return: page of matching devices.
+        """
+        query = select(Device).where(Device.user_id == user_id)
+        if contains:
+            query = query.where(Device.meta_data.contains(contains))
+        if has_keys:
+            query = query.where(Device.meta_data.has_all(array(has_keys)))
+        return await paginate(
+            self.session,
+            query,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            count=count,
+            fields=fields,
+        )
+
     async def patch_device_user_id(self, device_id: int, user_id: UUID):
         """
         Update the user_id of a device model.
@@ -168,9 +274,7 @@ class DeviceDAO:
         :param user_id: new user_id for the device model.
         :return: updated device model or None if not found.
         """
-        query = select(Device).where(Device.id == device_id)
-        row = await self.session.scalars(query)
-        device = row.one_or_none()
+        device = await get_loaders(self.session).device().load(device_id)
 
         if device is None:
             raise HTTPException(
@@ -206,4 +310,146 @@ class DeviceDAO:
                 detail="User does not have permission to access this data.",
             )
 
+        get_loaders(self.session).forget(device)
         await self.session.delete(device)
+
+    async def bulk_insert(self, rows: List[Dict[str, Any]]) -> Set[UUID]:
+        """
+        Insert many devices with one statement, skipping existing UUIDs.
+
+        :param rows: column values of the devices, each with a ``uuid``.
+        :return: UUIDs of the devices that were inserted.
+        """
+        if not rows:
+            return set()
+        inserted = await self.session.execute(
+            insert(Device)
+            .on_conflict_do_nothing(index_elements=[Device.uuid])
+            .returning(Device.uuid),
+            rows,
+        )
+        return set(inserted.scalars())
+
+    async def get_by_uuids(self, uuids: Iterable[UUID]) -> Sequence[Row]:
+        """
+        Get identifiers and Mainflux links of many devices by their UUIDs.
+
+        :param uuids: UUIDs of the devices.
+        :return: rows with id, uuid, parent_id and Mainflux thing details.
+        """
+        rows = await self.session.execute(
+            select(
+                Device.id,
+                Device.uuid,
+                Device.parent_id,
+                Device.mainflux_thing_uuid,
+                Device.mainflux_thing_secret,
+                Device.is_configured,
+            ).where(Device.uuid.in_(list(uuids))),
+        )
+        return rows.all()
+
+    async def bulk_update(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Update many devices by primary key.
+
+        :param rows: new column values, each with the device ``id``.
+        """
+        if rows:
+            await self.session.execute(update(Device), rows)
+
+    async def get_subtree(
+        self,
+        device_id: int,
+        max_depth: Optional[int] = None,
+        user_id: Optional[UUID] = None,
+    ) -> List[Tuple[Device, int]]:
+        """
+        Get a device and all of its descendants with one recursive query.
+
+        Children are found through the ``parent_id`` index, and the path
+        of every row is tracked so that a corrupted (cyclic) hierarchy
+        can't make the query run forever.
+
+        :param device_id: ID of the root device.
+        :param max_depth: deepest level to return, the root is level 0.
+        :param user_id: when given, branches owned by other users are left out.
+        :return: devices with their depth, breadth-first.
+        """
+        tree = (
+            select(
+                Device.id,
+                literal(0).label("depth"),
+                cast(array([Device.id]), ARRAY(Integer)).label("path"),
+            )
+            .where(Device.id == device_id)
+            .cte("tree", recursive=True)
+        )
+        child = aliased(Device)
+        step = (
+            select(
+                child.id,
+                tree.c.depth + 1,
+                func.array_append(tree.c.path, child.id),
+            )
+            .join(tree, child.parent_id == tree.c.id)
+            .where(~(child.id == any_(tree.c.path)))
+        )
+        if max_depth is not None:
+            step = step.where(tree.c.depth < max_depth)
+        if user_id is not None:
+            step = step.where(
+                or_(child.user_id.is_(None), child.user_id == user_id),
+            )
+        tree = tree.union_all(step)
+        rows = await self.session.execute(
+            select(Device, tree.c.depth)
+            .join(tree, Device.id == tree.c.id)
+            .order_by(tree.c.depth, Device.id),
+        )
+        return [(device, depth) for device, depth in rows]
+
+    async def get_ancestors(
+        self,
+        device_id: int,
+        user_id: Optional[UUID] = None,
+    ) -> List[Device]:
+        """
+        Get the chain of parents of a device with one recursive query.
+
+        :param device_id: ID of the device.
+        :param user_id: when given, only the ancestors the user may see are
+            returned: the highest one the user owns and those below it.
+        :return: ancestors from the root down to the direct parent.
+        """
+        chain = (
+            select(
+                Device.parent_id,
+                literal(1).label("depth"),
+                cast(array([Device.id]), ARRAY(Integer)).label("path"),
+            )
+            .where(Device.id == device_id)
+            .cte("chain", recursive=True)
+        )
+        parent = aliased(Device)
+        chain = chain.union_all(
+            select(
+                parent.parent_id,
+                chain.c.depth + 1,
+                func.array_append(chain.c.path, parent.id),
+            )
+            .join(chain, parent.id == chain.c.parent_id)
+            .where(~(parent.id == any_(chain.c.path))),
+        )
+        rows = await self.session.scalars(
+            select(Device)
+            .join(chain, Device.id == chain.c.parent_id)
+            .order_by(chain.c.depth.desc()),
+        )
+        ancestors = list(rows.all())
+        if user_id is None:
+            return ancestors
+        for index, device in enumerate(ancestors):
+            if device.user_id == user_id:
+                return ancestors[index:]
+        return []
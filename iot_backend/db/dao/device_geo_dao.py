@@ -0,0 +1,242 @@
+import math
+from typing import Any, List
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy import ColumnElement, Float, cast, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dependencies import get_db_session
+from iot_backend.db.models.device import Device
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+# Map tiles are split into this many grid cells per side when clustering.
+CELLS_PER_TILE = 8
+# kNN candidates fetched through the index per requested device, before
+# they are re-ranked by their real (great-circle) distance.
+KNN_CANDIDATES = 4
+
+# Same expression as the GiST index, so the planner can use it.
+location = func.point(Device.longitude, Device.latitude)
+
+
+def _point(longitude: float, latitude: float) -> ColumnElement[Any]:
+    return func.point(cast(longitude, Float), cast(latitude, Float))
+
+
+def _box(west: float, south: float, east: float, north: float) -> ColumnElement[Any]:
+    return func.box(_point(west, south), _point(east, north))
+
+
+def distance_m(longitude: float, latitude: float) -> ColumnElement[float]:
+    """
+    Great-circle distance from devices to a point (haversine), in meters.
+
+    :param longitude: longitude of the point.
+    :param latitude: latitude of the point.
+    :return: SQL expression.
+    """
+    half_dlat = func.radians(Device.latitude - latitude) / 2
+    half_dlon = func.radians(Device.longitude - longitude) / 2
+    haversine = func.power(func.sin(half_dlat), 2) + func.cos(
+        func.radians(Device.latitude),
+    ) * math.cos(math.radians(latitude)) * func.power(func.sin(half_dlon), 2)
+    return 2 * EARTH_RADIUS_M * func.asin(func.sqrt(func.least(haversine, 1.0)))
+
+
+def in_bbox(
+    west: float,
+    south: float,
+    east: float,
+    north: float,
+) -> ColumnElement[bool]:
+    """
+    Filter devices located inside a bounding box.
+
+    A box crossing the antimeridian (``west > east``) is split in two.
+
+    :param west: west longitude.
+    :param south: south latitude.
+    :param east: east longitude.
+    :param north: north latitude.
+    :return: SQL condition served by the GiST index.
+    """
+    if west <= east:
+        return location.op("<@")(_box(west, south, east, north))
+    return or_(
+        location.op("<@")(_box(west, south, 180, north)),
+        location.op("<@")(_box(-180, south, east, north)),
+    )
+
+
+class DeviceGeoDAO:
+    """
+    Spatial queries over device coordinates.
+
+    Coordinates come from the ``longitude``/``latitude`` columns generated
+    from device metadata and indexed with GiST as a ``point``. The index
+    works in degrees, so radius and nearest-device queries pick candidates
+    through the index and compute real distances on them.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def get_in_bbox(
+        self,
+        user_id: UUID,
+        west: float,
+        south: float,
+        east: float,
+        north: float,
+        limit: int = 1000,
+    ) -> List[Device]:
+        """
+        Get the user's devices inside a bounding box.
+
+        :param user_id: user ID.
+        :param west: west longitude.
+        :param south: south latitude.
+        :param east: east longitude.
+        :param north: north latitude.
+        :param limit: maximum number of devices.
+        :return: devices ordered by ID.
+        """
+        rows = await self.session.scalars(
+            select(Device)
+            .where(Device.user_id == user_id)
+            .where(in_bbox(west, south, east, north))
+            .order_by(Device.id)
+            .limit(limit),
+        )
+        return list(rows.all())
+
+    async def get_in_radius(
+        self,
+        user_id: UUID,
+        longitude: float,
+        latitude: float,
+        radius_m: float,
+        limit: int = 1000,
+    ) -> List[tuple[Device, float]]:
+        """
+        Get the user's devices within a distance of a point.
+
+        :param user_id: user ID.
+        :param longitude: longitude of the center.
+        :param latitude: latitude of the center.
+        :param radius_m: radius in meters.
+        :param limit: maximum number of devices.
+        :return: devices with their distance, closest first.
+        """
+        dlat = radius_m / METERS_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(abs(latitude) + dlat, 90)))
+        dlon = 180 if cos_lat < 1e-9 else min(dlat / cos_lat, 180)
+        west, east = longitude - dlon, longitude + dlon
+        if dlon >= 180:
+            west, east = -180, 180
+        elif west < -180:
+            west += 360
+        elif east > 180:
+            east -= 360
+        distance = distance_m(longitude, latitude).label("distance")
+        bbox = in_bbox(west, max(latitude - dlat, -90), east, min(latitude + dlat, 90))
+        rows = await self.session.execute(
+            select(Device, distance)
+            .where(Device.user_id == user_id)
+            .where(bbox)
+            .where(distance_m(longitude, latitude) <= radius_m)
+            .order_by(distance, Device.id)
+            .limit(limit),
+        )
+        return [(device, device_distance) for device, device_distance in rows]
+
+    async def get_nearest(
+        self,
+        user_id: UUID,
+        longitude: float,
+        latitude: float,
+        k: int = 10,
+    ) -> List[tuple[Device, float]]:
+        """
+        Get the user's k devices closest to a point.
+
+        Candidates come from an index-ordered scan (``<->`` on the GiST
+        index) and are re-ranked by great-circle distance.
+
+        :param user_id: user ID.
+        :param longitude: longitude of the point.
+        :param latitude: latitude of the point.
+        :param k: number of devices.
+        :return: devices with their distance, closest first.
+        """
+        candidates = (
+            select(Device.id)
+            .where(Device.user_id == user_id)
+            .where(Device.longitude.is_not(None))
+            .where(Device.latitude.is_not(None))
+            .order_by(location.op("<->")(_point(longitude, latitude)))
+            .limit(k * KNN_CANDIDATES)
+            .scalar_subquery()
+        )
+        distance = distance_m(longitude, latitude).label("distance")
+        rows = await self.session.execute(
+            select(Device, distance)
+            .where(Device.id.in_(candidates))
+            .order_by(distance, Device.id)
+            .limit(k),
+        )
+        return [(device, device_distance) for device, device_distance in rows]
+
+    async def get_clusters(
+        self,
+        user_id: UUID,
+        west: float,
+        south: float,
+        east: float,
+        north: float,
+        zoom: int,
+    ) -> List[dict[str, Any]]:
+        """
+        Group the user's devices inside a bounding box into grid cells.
+
+        Cells are ``CELLS_PER_TILE`` times smaller than a map tile at the
+        zoom level, so a zoomed-out map gets a bounded number of markers.
+
+        :param user_id: user ID.
+        :param west: west longitude.
+        :param south: south latitude.
+        :param east: east longitude.
+        :param north: north latitude.
+        :param zoom: map zoom level.
+        :return: clusters with center, count and the device of single points.
+        """
+        cell = 360 / (2**zoom * CELLS_PER_TILE)
+        column = func.floor(Device.longitude / cell).label("column")
+        row = func.floor(Device.latitude / cell).label("row")
+        count = func.count().label("count")
+        rows = await self.session.execute(
+            select(
+                column,
+                row,
+                count,
+                func.avg(Device.longitude).label("longitude"),
+                func.avg(Device.latitude).label("latitude"),
+                func.min(Device.id).label("device_id"),
+            )
+            .where(Device.user_id == user_id)
+            .where(in_bbox(west, south, east, north))
+            .group_by(column, row)
+            .order_by(count.desc(), column, row),
+        )
+        return [
+            {
+                "longitude": cluster.longitude,
+                "latitude": cluster.latitude,
+                "count": cluster.count,
+                "device_id": cluster.device_id if cluster.count == 1 else None,
+            }
+            for cluster in rows
+        ]
+
@@ -1,9 +1,10 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
 from fastapi import Depends, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from iot_backend.db.dao.base_dao import CountMode, Page, paginate
 from iot_backend.db.dependencies import get_db_session
 from iot_backend.db.models.group import Group
 
@@ -32,20 +33,34 @@ class GroupDAO:
 
         self.session.add(Group(name=name, organization_id=organization_id))
 
-    async def get_all_groups(self, limit: int, offset: int) -> List[Group]:
+    async def get_all_groups(
+        self,
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.NONE,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[Group]:
         """
-        Get all group models with limit/offset pagination.
+        Get a page of group models, ordered by ID.
 
         :param limit: limit of group.
-        :param offset: offset of group.
-        :return: stream of group.
+        :param offset: offset of group, only used without a cursor.
+        :param cursor: cursor of the previous page.
+        :param count: whether and how to count all groups.
+        :param fields: columns to return as dicts instead of groups.
+        :return: page of groups.
         """
-        raw_organizations = await self.session.execute(
-            select(Group).limit(limit).offset(offset),
+        return await paginate(
+            self.session,
+            select(Group),
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            count=count,
+            fields=fields,
         )
 
-        return list(raw_organizations.scalars().fetchall())
-
     async def filter(
         self,
         name: Optional[str] = None,
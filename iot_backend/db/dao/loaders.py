@@ -0,0 +1,246 @@
+import asyncio
+import uuid
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.base import Base
+from iot_backend.db.models.alert import Alert
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.tag import Tag
+
+ModelType = TypeVar("ModelType", bound=Base)
+
+# Columns that identify a single row and can be used as loader keys.
+LOADER_COLUMNS: Dict[Type[Base], Tuple[str, ...]] = {
+    Device: ("id", "uuid", "mainflux_thing_uuid"),
+    Tag: ("id", "uuid", "name"),
+    Alert: ("id", "uuid", "check_external_id"),
+}
+
+_MISSING = object()
+
+
+class ModelLoader(Generic[ModelType]):
+    """
+    Request-scoped loader of one model by one unique column.
+
+    Works like a DataLoader: keys requested during the same event loop
+    iteration are fetched with a single ``WHERE column IN (...)`` query,
+    and every result (including a miss) is cached for the rest of the
+    request, so each row is read at most once.
+    """
+
+    def __init__(
+        self,
+        registry: "SessionLoaders",
+        model: Type[ModelType],
+        column: str,
+    ):
+        self.registry = registry
+        self.model = model
+        self.column = column
+        self._cache: Dict[Hashable, Optional[ModelType]] = {}
+        self._pending: Dict[Hashable, "asyncio.Future[Optional[ModelType]]"] = {}
+        self._dispatch_scheduled = False
+        self._is_uuid = getattr(model, column).type.python_type is uuid.UUID
+
+    def normalize(self, key: Any) -> Hashable:
+        """
+        Bring a key to the type stored in the column.
+
+        :param key: raw key, e.g. a UUID passed as a string.
+        :return: normalized key.
+        """
+        if self._is_uuid and isinstance(key, str):
+            return uuid.UUID(key)
+        return key
+
+    def peek(self, key: Any) -> Any:
+        """
+        Get a cached value without querying the database.
+
+        :param key: loader key.
+        :return: cached instance, None for a cached miss, or ``_MISSING``.
+        """
+        return self._cache.get(self.normalize(key), _MISSING)
+
+    async def load(self, key: Any) -> Optional[ModelType]:
+        """
+        Load one instance, batching with concurrent loads.
+
+        :param key: value of the loader column.
+        :return: instance or None if not found.
+        """
+        key = self.normalize(key)
+        if key in self._cache:
+            return self._cache[key]
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(self._schedule_dispatch)
+        return await future
+
+    async def load_many(self, keys: Iterable[Any]) -> List[Optional[ModelType]]:
+        """
+        Load several instances with at most one query.
+
+        :param keys: values of the loader column.
+        :return: instances (or None) in the order of keys.
+        """
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Any, instance: Optional[ModelType]) -> None:
+        """
+        Put a value into the cache.
+
+        :param key: value of the loader column.
+        :param instance: loaded instance or None for a known miss.
+        """
+        if key is not None:
+            self._cache[self.normalize(key)] = instance
+
+    def forget(self, key: Any) -> None:
+        """
+        Drop a key from the cache.
+
+        :param key: value of the loader column.
+        """
+        self._cache.pop(self.normalize(key), None)
+
+    def _schedule_dispatch(self) -> None:
+        self._dispatch_scheduled = False
+        pending, self._pending = self._pending, {}
+        asyncio.ensure_future(self._dispatch(pending))
+
+    async def _dispatch(
+        self,
+        pending: Dict[Hashable, "asyncio.Future[Optional[ModelType]]"],
+    ) -> None:
+        try:
+            rows = await self.registry.session.scalars(
+                select(self.model).where(
+                    getattr(self.model, self.column).in_(list(pending)),
+                ),
+            )
+            for instance in rows.all():
+                self.registry.prime(instance)
+        except Exception as exc:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for key, future in pending.items():
+            self._cache.setdefault(key, None)
+            if not future.done():
+                future.set_result(self._cache[key])
+
+
+class SessionLoaders:
+    """All loaders bound to one session, i.e. to one request."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._loaders: Dict[Tuple[Type[Base], str], ModelLoader[Any]] = {}
+
+    def get(
+        self,
+        model: Type[ModelType],
+        column: str = "id",
+    ) -> ModelLoader[ModelType]:
+        """
+        Get the loader of a model by a unique column.
+
+        :param model: model class.
+        :param column: unique column name.
+        :raises ValueError: if the column is not registered as unique.
+        :return: loader.
+        """
+        if column not in LOADER_COLUMNS.get(model, ()):
+            raise ValueError(
+                f"{model.__name__}.{column} can't be used as loader key",
+            )
+        loader = self._loaders.get((model, column))
+        if loader is None:
+            loader = ModelLoader(self, model, column)
+            self._loaders[(model, column)] = loader
+        return loader
+
+    def prime(self, instance: Base) -> None:
+        """
+        Cache an instance under every unique column of its model.
+
+        :param instance: loaded instance.
+        """
+        model = type(instance)
+        for column in LOADER_COLUMNS.get(model, ()):
+            self.get(model, column).prime(getattr(instance, column), instance)
+
+    def forget(self, instance: Base) -> None:
+        """
+        Remove an instance from every loader, e.g. after deleting it.
+
+        :param instance: instance to forget.
+        """
+        model = type(instance)
+        for column in LOADER_COLUMNS.get(model, ()):
+            self.get(model, column).forget(getattr(instance, column))
+
+    def device(self, column: str = "id") -> ModelLoader[Device]:
+        """
+        Shortcut for device loaders.
+
+        :param column: unique column name.
+        :return: loader.
+        """
+        return self.get(Device, column)
+
+    def tag(self, column: str = "id") -> ModelLoader[Tag]:
+        """
+        Shortcut for tag loaders.
+
+        :param column: unique column name.
+        :return: loader.
+        """
+        return self.get(Tag, column)
+
+    def alert(self, column: str = "id") -> ModelLoader[Alert]:
+        """
+        Shortcut for alert loaders.
+
+        :param column: unique column name.
+        :return: loader.
+        """
+        return self.get(Alert, column)
+
+
+def get_loaders(session: AsyncSession) -> SessionLoaders:
+    """
+    Get loaders of the session, creating them on first use.
+
+    Sessions live for a single request, so the cache is request-scoped.
+
+    :param session: database session.
+    :return: loaders bound to the session.
+    """
+    loaders = session.info.get("loaders")
+    if loaders is None:
+        loaders = SessionLoaders(session)
+        session.info["loaders"] = loaders
+    return loaders
@@ -1,5 +1,7 @@
+from typing import Any, Dict, List
 from uuid import UUID
 from fastapi import Depends
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from iot_backend.db.dao.base_dao import BaseDAO
@@ -21,4 +23,22 @@ class MessageDAO(BaseDAO[Message]):
         self.session.add(instance)
         await self.session.commit()
         await self.session.refresh(instance)
-        return instance
\ No newline at end of file
+        return instance
+
+    async def bulk_create(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert many messages with a single multi-row INSERT.
+
+        The session is not committed, so callers can make the insert atomic
+        with their own bookkeeping.
+
+        Args:
+            rows (List[Dict[str, Any]]): column values of the new messages.
+
+        Returns:
+            int: number of inserted messages.
+        """
+        if not rows:
+            return 0
+        await self.session.execute(insert(self.model), rows)
+        return len(rows)
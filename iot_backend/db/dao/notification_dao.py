@@ -1,13 +1,28 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from iot_backend.db.dao.base_dao import CountMode, Page, paginate
 from iot_backend.db.dependencies import get_db_session
 from iot_backend.db.models.notification import Notification
 
+# Columns set by ``NotificationDAO.bulk_create``, the others use defaults.
+BULK_COLUMNS = (
+    "uuid",
+    "message",
+    "level",
+    "check_id",
+    "notification_endpoint_id",
+    "notification_rule_id",
+    "alert_id",
+    "device_id",
+    "user_id",
+)
+
 
 class NotificationDAO:
     """Class for accessing notification table."""
@@ -69,6 +84,125 @@ class NotificationDAO:
             )
         )
 
+    async def bulk_create(
+        self,
+        rows: Sequence[Dict[str, Any]],
+    ) -> List[Tuple[Optional[UUID], Optional[int]]]:
+        """
+        Insert many notifications with a single statement.
+
+        Every column is sent as one array and the rows are rebuilt with
+        ``unnest``, so the statement has a fixed number of parameters
+        however many rows there are.
+
+        Notifications whose UUID is already stored are skipped, so a batch
+        can be inserted again safely. The session is not committed.
+
+        :param rows: column values of the new notifications, with UUIDs.
+        :return: user and device of every inserted notification.
+        """
+        if not rows:
+            return []
+        columns = [Notification.__table__.c[name] for name in BULK_COLUMNS]
+        arrays = [
+            bindparam(
+                column.key,
+                [row.get(column.key) for row in rows],
+                type_=ARRAY(column.type),
+            )
+            for column in columns
+        ]
+        source = func.unnest(*arrays).table_valued(*BULK_COLUMNS).render_derived()
+        inserted = await self.session.execute(
+            insert(Notification)
+            .from_select(BULK_COLUMNS, select(*source.c))
+            .on_conflict_do_nothing(index_elements=["uuid"])
+            .returning(Notification.user_id, Notification.device_id),
+        )
+        return [tuple(row) for row in inserted.all()]
+
+    async def mark_read(
+        self,
+        user_id: UUID,
+        ids: Optional[Sequence[int]] = None,
+        device_id: Optional[int] = None,
+    ) -> List[Tuple[Optional[UUID], Optional[int]]]:
+        """
+        Mark unread notifications of a user as read.
+
+        The session is not committed.
+
+        :param user_id: ID of the user.
+        :param ids: IDs of the notifications, all of them by default.
+        :param device_id: optional device ID filter.
+        :return: user and device of every notification marked as read.
+        """
+        query = update(Notification).where(
+            Notification.user_id == user_id,
+            Notification.read_at.is_(None),
+        )
+        if ids is not None:
+            query = query.where(Notification.id.in_(ids))
+        if device_id is not None:
+            query = query.where(Notification.device_id == device_id)
+        marked = await self.session.execute(
+            query.values(read_at=func.now())
+            .returning(Notification.user_id, Notification.device_id)
+            .execution_options(synchronize_session=False),
+        )
+        return [tuple(row) for row in marked.all()]
+
+    async def count_unread(self, user_id: UUID) -> Dict[Optional[int], int]:
+        """
+        Count unread notifications of a user by device.
+
+        :param user_id: ID of the user.
+        :return: number of unread notifications of every device.
+        """
+        rows = await self.session.execute(
+            select(Notification.device_id, func.count())
+            .where(
+                Notification.user_id == user_id,
+                Notification.read_at.is_(None),
+            )
+            .group_by(Notification.device_id),
+        )
+        return {device_id: count for device_id, count in rows.all()}
+
+    async def get_feed(
+        self,
+        user_id: UUID,
+        limit: int,
+        cursor: Optional[str] = None,
+        device_id: Optional[int] = None,
+        unread: bool = False,
+    ) -> Page[Notification]:
+        """
+        Get a page of the notifications of a user, newest first.
+
+        Pages follow each other by ID, an index range scan on
+        ``(user_id, id DESC)`` however deep the client goes.
+
+        :param user_id: ID of the user.
+        :param limit: limit of notifications.
+        :param cursor: cursor of the previous page.
+        :param device_id: optional device ID filter.
+        :param unread: only return unread notifications.
+        :return: page of notifications.
+        """
+        query = select(Notification).where(Notification.user_id == user_id)
+        if device_id is not None:
+            query = query.where(Notification.device_id == device_id)
+        if unread:
+            query = query.where(Notification.read_at.is_(None))
+        return await paginate(
+            self.session,
+            query,
+            limit=limit,
+            cursor=cursor,
+            descending=True,
+        )
+
     async def get_all_notifications(
         self,
         limit: int,
@@ -76,22 +210,23 @@ class NotificationDAO:
         user_id: UUID,
         device_id: Optional[int] = None,
         alert_id: Optional[int] = None,
-    ) -> list[Notification]:
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.NONE,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[Notification]:
         """
-        Get all notification models with limit/offset pagination and optional device_id and/or alert_id filters.
+        Get a page of notifications with optional device_id and/or alert_id filters.
 
         :param limit: limit of notifications.
-        :param offset: offset of notifications.
+        :param offset: offset of notifications, only used without a cursor.
         :param device_id: optional device ID filter.
         :param alert_id: optional alert ID filter.
-        :return: stream of notifications.
+        :param cursor: cursor of the previous page.
+        :param count: whether and how to count all notifications.
+        :param fields: columns to return as dicts instead of notifications.
+        :return: page of notifications.
         """
-        query = (
-            select(Notification)
-            .where(Notification.user_id == user_id)
-            .limit(limit)
-            .offset(offset)
-        )
+        query = select(Notification).where(Notification.user_id == user_id)
 
         if device_id is not None:
             query = query.where(Notification.device_id == device_id)
@@ -99,9 +234,15 @@ class NotificationDAO:
         if alert_id is not None:
             query = query.where(Notification.alert_id == alert_id)
 
-        raw_notifications = await self.session.scalars(query)
-
-        return list(raw_notifications.all())
+        return await paginate(
+            self.session,
+            query,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            count=count,
+            fields=fields,
+        )
 
     async def filter(
         self,
@@ -0,0 +1,208 @@
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import Integer, any_, cast, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, array
+from sqlalchemy.orm import aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.loaders import get_loaders
+from iot_backend.db.dependencies import get_db_session
+from iot_backend.db.models.action import Action
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.tag import Tag
+
+
+class OwnershipDAO:
+    """
+    Permission checks for nested resources.
+
+    Every check loads the parent and the child with a single statement,
+    so a handler spends one round-trip on authorization no matter how
+    many resources it touches. Loaded rows go to the request loaders,
+    and a check whose rows are already cached makes no query at all.
+    """
+
+    def __init__(self, session: AsyncSession = Depends(get_db_session)):
+        self.session = session
+
+    async def get_device_and_tag(
+        self,
+        device_id: int,
+        tag_id: int,
+        user_id: UUID,
+    ) -> Tuple[Device, Tag]:
+        """
+        Load a device and one of its tags owned by the user in one query.
+
+        :param device_id: ID of the device.
+        :param tag_id: ID of the tag.
+        :param user_id: ID of the user.
+        :raises HTTPException: 404 if either is missing or the tag belongs
+            to another device, 403 if not owned.
+        :return: the device and the tag.
+        """
+        loaders = get_loaders(self.session)
+        device = loaders.device().peek(device_id)
+        tag = loaders.tag().peek(tag_id)
+        if not isinstance(device, Device) or not isinstance(tag, Tag):
+            row = (
+                await self.session.execute(
+                    select(Device, Tag)
+                    .join(Tag, (Tag.id == tag_id) & (Tag.device_id == Device.id))
+                    .where(Device.id == device_id),
+                )
+            ).one_or_none()
+            if row is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Device or Tag Not Found.",
+                )
+            device, tag = row
+            loaders.prime(device)
+            loaders.prime(tag)
+        if tag.device_id != device.id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Device or Tag Not Found.",
+            )
+        if device.user_id != user_id or tag.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User does not have permission to access this data.",
+            )
+        return device, tag
+
+    async def get_device_and_action(
+        self,
+        action_id: int,
+        user_id: UUID,
+        device_id: Optional[int] = None,
+    ) -> Tuple[Device, Action]:
+        """
+        Load an action together with its device in one joined query.
+
+        :param action_id: ID of the action.
+        :param user_id: ID of the user.
+        :param device_id: expected device of the action, if known.
+        :raises HTTPException: 404 if missing, 403 if the device is not owned.
+        :return: the device and the action.
+        """
+        query = (
+            select(Device, Action)
+            .join(Action, Action.device_id == Device.id)
+            .where(Action.id == action_id)
+        )
+        if device_id is not None:
+            query = query.where(Device.id == device_id)
+        row = (await self.session.execute(query)).one_or_none()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Action not found",
+            )
+        device, action = row
+        get_loaders(self.session).prime(device)
+        if device.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User does not have permission to access this data.",
+            )
+        return device, action
+
+    async def ensure_device_owner(
+        self,
+        device_id: Optional[int],
+        user_id: UUID,
+        detail: str = "User does not have permission to access this data.",
+    ) -> None:
+        """
+        Check that the device, if it exists, belongs to the user.
+
+        Only the owner column is selected, the device itself is not loaded.
+
+        :param device_id: ID of the device, None skips the check.
+        :param user_id: ID of the user.
+        :param detail: error message for the 403 response.
+        :raises HTTPException: 403 if the device belongs to someone else.
+        """
+        if device_id is None:
+            return
+        owner = (
+            await self.session.execute(
+                select(Device.user_id).where(Device.id == device_id),
+            )
+        ).one_or_none()
+        if owner is not None and owner.user_id != user_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+    async def get_device_owners(
+        self,
+        device_ids: Iterable[int],
+    ) -> Dict[int, Optional[UUID]]:
+        """
+        Get owners of many devices with one query.
+
+        :param device_ids: IDs of the devices, duplicates are allowed.
+        :return: owner of every existing device by device ID.
+        """
+        distinct_ids = set(device_ids)
+        if not distinct_ids:
+            return {}
+        rows = await self.session.execute(
+            select(Device.id, Device.user_id).where(Device.id.in_(distinct_ids)),
+        )
+        return {device_id: owner for device_id, owner in rows}
+
+    async def ensure_device_access(self, device_id: int, user_id: UUID) -> None:
+        """
+        Check that the user owns the device or any of its ancestors.
+
+        Owning a gateway gives access to every node below it. The whole
+        parent chain is checked with one recursive query.
+
+        :param device_id: ID of the device.
+        :param user_id: ID of the user.
+        :raises HTTPException: 404 if the device is missing, 403 if no
+            device of the chain belongs to the user.
+        """
+        chain = (
+            select(
+                Device.id,
+                Device.parent_id,
+                Device.user_id,
+                cast(array([Device.id]), ARRAY(Integer)).label("path"),
+            )
+            .where(Device.id == device_id)
+            .cte("chain", recursive=True)
+        )
+        parent = aliased(Device)
+        chain = chain.union_all(
+            select(
+                parent.id,
+                parent.parent_id,
+                parent.user_id,
+                func.array_append(chain.c.path, parent.id),
+            )
+            .join(chain, parent.id == chain.c.parent_id)
+            .where(~(parent.id == any_(chain.c.path))),
+        )
+        found, allowed = (
+            await self.session.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.bool_or(chain.c.user_id == user_id), False),
+                ),
+            )
+        ).one()
+        if not found:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Device not found",
+            )
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User does not have permission to access this data.",
+            )
@@ -1,14 +1,21 @@
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import delete, exists, select
+from sqlalchemy import Row, delete, exists, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from iot_backend.db.dao.base_dao import CountMode, Page, paginate
+from iot_backend.db.dao.loaders import LOADER_COLUMNS, get_loaders
+from iot_backend.db.dao.ownership_dao import OwnershipDAO
 from iot_backend.db.dependencies import get_db_session
-from iot_backend.db.models.device import Device
 from iot_backend.db.models.tag import Tag
-from iot_backend.web.api.tags.schema import TagInputDTO
+from iot_backend.web.api.tags.schema import (
+    TagCreateResultDTO,
+    TagCreateStatus,
+    TagInputDTO,
+)
 
 
 class TagDAO:
@@ -36,7 +43,9 @@ class TagDAO:
             - None if no match is found.
         """
         query = select(Tag)
-        if (
+        if unique and field in LOADER_COLUMNS[Tag]:
+            response = await get_loaders(self.session).tag(field).load(value)
+        elif (
             unique
             and hasattr(Tag, field)
             and getattr(Tag.__table__.columns[field], "unique", False)
@@ -62,9 +71,16 @@ class TagDAO:
             tag_id (int): ID of the Tag to be retrieved.
 
         Returns:
-            Optional[Tag]: The Tag object or None if not found.
+            Optional[Tag]: The Tag object.
+
+        Raises:
+            HTTPException: If the Tag doesn't exist or belongs to another user.
         """
         tag = await self.get_by(field="id", value=tag_id, unique=True)
+        if tag is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Tag Not Found."
+            )
         if tag.user_id != user_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -83,16 +99,11 @@ class TagDAO:
         :param user_id: ID of the user adding the tag.
         :param new_tag: TagInputDTO object containing the details of the new tag.
         """
-        device = (
-            await self.session.scalars(
-                select(Device).where(Device.id == new_tag.device_id)
-            )
-        ).one_or_none()
-        if device and device.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="User does not have permission to add a tag to this device.",
-            )
+        await OwnershipDAO(self.session).ensure_device_owner(
+            device_id=new_tag.device_id,
+            user_id=user_id,
+            detail="User does not have permission to add a tag to this device.",
+        )
         self.session.add(
             Tag(
                 name=new_tag.name,
@@ -107,47 +118,113 @@ class TagDAO:
             )
         )
 
-    async def create_tags(self, user_id: UUID, tags: List[TagInputDTO]) -> None:
+    async def create_tags(
+        self,
+        user_id: UUID,
+        tags: List[TagInputDTO],
+    ) -> List[TagCreateResultDTO]:
         """
-        Add one or more tags to the session.
+        Create many tags with one ownership query and one INSERT.
+
+        Items are checked independently: a tag on a foreign or missing
+        device, or with a name that is already taken (in the database or
+        earlier in the same batch), is reported and skipped while the
+        rest of the batch is still created.
 
         :param user_id: the ID of the user adding the tags.
         :param tags: a list of TagInputDTO objects representing the tags.
+        :return: outcome of every item, in input order.
         """
+        owners = await OwnershipDAO(self.session).get_device_owners(
+            tag.device_id for tag in tags if tag.device_id is not None
+        )
+        statuses: List[TagCreateStatus] = []
+        rows = []
+        seen_names = set()
         for tag_data in tags:
-            await self.create_tag(user_id=user_id, new_tag=tag_data)
-        return None
+            device_id = tag_data.device_id
+            if device_id is not None and device_id not in owners:
+                statuses.append(TagCreateStatus.DEVICE_NOT_FOUND)
+            elif device_id is not None and owners[device_id] != user_id:
+                statuses.append(TagCreateStatus.FORBIDDEN)
+            elif tag_data.name in seen_names:
+                statuses.append(TagCreateStatus.DUPLICATE)
+            else:
+                seen_names.add(tag_data.name)
+                statuses.append(TagCreateStatus.CREATED)
+                rows.append({**tag_data.model_dump(), "user_id": user_id})
+
+        created = {}
+        if rows:
+            inserted = await self.session.execute(
+                insert(Tag)
+                .on_conflict_do_nothing(index_elements=[Tag.name])
+                .returning(Tag.id, Tag.name),
+                rows,
+            )
+            created = {name: tag_id for tag_id, name in inserted}
+
+        results = []
+        for index, (tag_data, tag_status) in enumerate(zip(tags, statuses)):
+            tag_id = created.get(tag_data.name)
+            if tag_status == TagCreateStatus.CREATED and tag_id is None:
+                tag_status = TagCreateStatus.DUPLICATE
+            results.append(
+                TagCreateResultDTO(
+                    index=index,
+                    name=tag_data.name,
+                    status=tag_status,
+                    id=tag_id if tag_status == TagCreateStatus.CREATED else None,
+                ),
+            )
+        return results
 
     async def get_all_tags(
-        self, user_id: UUID, limit: int, offset: int, device_id: Optional[int] = None
-    ) -> List[Tag]:
+        self,
+        user_id: UUID,
+        limit: int,
+        offset: int = 0,
+        device_id: Optional[int] = None,
+        cursor: Optional[str] = None,
+        count: CountMode = CountMode.NONE,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Page[Tag]:
         """
-        Get all tags with limit/offset pagination.
+        Get a page of the user's tags, ordered by ID.
         :param user_id: user ID.
         :param limit: limit of tags.
-        :param offset: offset of tags.
+        :param offset: offset of tags, only used without a cursor.
         :param device_id: device ID.
-        :return: list of tags.
+        :param cursor: cursor of the previous page.
+        :param count: whether and how to count all tags.
+        :param fields: columns to return as dicts instead of tags.
+        :return: page of tags.
         """
         query = select(Tag).where(Tag.user_id == user_id)
         if device_id:
-            device = await self.session.get(Device, device_id)
+            device = await get_loaders(self.session).device().load(device_id)
             if not device or device.user_id != user_id:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="You do not have permission to access this device's tags.",
                 )
             query = query.where(Tag.device_id == device_id)
-        query = query.offset(offset).limit(limit)
-        raw_tags = await self.session.scalars(query)
-        tags = raw_tags.all()
+        page = await paginate(
+            self.session,
+            query,
+            limit=limit,
+            cursor=cursor,
+            offset=offset,
+            count=count,
+            fields=fields,
+        )
 
-        if not tags:
+        if not page.items and cursor is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="There are no Tags for this device.",
             )
-        return tags
+        return page
 
     async def update_tag(
         self, tag_id: int, graphed: bool, user_id: UUID
@@ -195,6 +272,7 @@ class TagDAO:
                 detail="User does not have permission to access this data.",
             )
 
+        get_loaders(self.session).forget(tag)
         await self.session.delete(tag)
 
     async def delete_tags(self, tag_ids: list[int], user_id: UUID) -> None:
@@ -220,6 +298,12 @@ class TagDAO:
         deleted_count = await self.session.execute(query)
         deleted = deleted_count.rowcount
 
+        loaders = get_loaders(self.session)
+        for tag_id in tag_ids:
+            cached = loaders.tag().peek(tag_id)
+            if isinstance(cached, Tag):
+                loaders.forget(cached)
+
         if deleted != len(tag_ids):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -227,3 +311,29 @@ class TagDAO:
             )
 
         return deleted
+
+    async def get_device_tags(self, device_ids: Iterable[int]) -> Sequence[Row]:
+        """
+        Get identifiers and Mainflux channels of the tags of many devices.
+
+        :param device_ids: IDs of the devices.
+        :return: rows with id, name, device_id and Mainflux channel UUID.
+        """
+        rows = await self.session.execute(
+            select(
+                Tag.id,
+                Tag.name,
+                Tag.device_id,
+                Tag.mainflux_channel_uuid,
+            ).where(Tag.device_id.in_(list(device_ids))),
+        )
+        return rows.all()
+
+    async def bulk_update(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Update many tags by primary key.
+
+        :param rows: new column values, each with the tag ``id``.
+        """
+        if rows:
+            await self.session.execute(update(Tag), rows)
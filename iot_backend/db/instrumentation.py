@@ -0,0 +1,121 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from iot_backend.settings import settings
+
+_WHITESPACE = re.compile(r"\s+")
+_START_TIMES = "query_start_times"
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "query_stats",
+    default=None,
+)
+
+
+@dataclass
+class QueryStats:
+    """Statements run, and time spent running them, within one scope."""
+
+    parent: Optional["QueryStats"] = None
+    count: int = 0
+    duration: float = 0
+    statements: List[str] = field(default_factory=list)
+    shapes: Counter = field(default_factory=Counter)  # type: ignore[type-arg]
+
+    def add(self, statement: str, duration: float) -> None:
+        """
+        Record a statement here and in every enclosing scope.
+
+        :param statement: SQL with placeholders, so one text per query shape.
+        :param duration: time spent in the database, in seconds.
+        """
+        shape = _WHITESPACE.sub(" ", statement).strip()
+        stats: Optional[QueryStats] = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += duration
+            stats.statements.append(shape)
+            stats.shapes[shape] += 1
+            stats = stats.parent
+        threshold = settings.db_repeated_statement_threshold
+        if threshold and self.shapes[shape] == threshold + 1:
+            logger.warning(
+                "Same statement ran more than {} times in one request, "
+                "possible N+1: {}",
+                threshold,
+                shape[:200],
+            )
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """
+    Get the statistics of the innermost ``track_queries`` scope.
+
+    :return: statistics or None outside of any scope.
+    """
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count statements run by instrumented engines inside the block.
+
+    Scopes nest: statements of an inner scope (e.g. a request) are also
+    counted by the outer one (e.g. a test).
+
+    :yield: statistics, filled as statements run.
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def _before_cursor_execute(conn: Connection, *args: Any) -> None:
+    conn.info.setdefault(_START_TIMES, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: Any,
+    statement: str,
+    *args: Any,
+) -> None:
+    start = conn.info[_START_TIMES].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(statement, time.perf_counter() - start)
+
+
+def _handle_error(context: Any) -> None:
+    # A failed statement never reaches after_cursor_execute.
+    if context.connection is not None:
+        start_times = context.connection.info.get(_START_TIMES)
+        if start_times:
+            start_times.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Count statements and database time of an engine into ``track_queries``.
+
+    :param engine: engine to instrument.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
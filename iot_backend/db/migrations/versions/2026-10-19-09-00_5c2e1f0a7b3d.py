@@ -0,0 +1,33 @@
+"""Add mainflux sync watermarks
+
+Revision ID: 5c2e1f0a7b3d
+Revises: a21b737d811f
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c2e1f0a7b3d"
+down_revision = "a21b737d811f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "mainflux_sync_watermarks",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("channel_id", sa.String(), nullable=False),
+        sa.Column("publisher", sa.String(), nullable=False),
+        sa.Column("synced_count", sa.BigInteger(), nullable=False),
+        sa.Column("last_time", sa.Float(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("channel_id", "publisher"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("mainflux_sync_watermarks")
@@ -0,0 +1,27 @@
+"""Index devices by parent
+
+Revision ID: 7d4b9e2c1a6f
+Revises: 5c2e1f0a7b3d
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7d4b9e2c1a6f"
+down_revision = "5c2e1f0a7b3d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_devices_parent_id"),
+        "devices",
+        ["parent_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_devices_parent_id"), table_name="devices")
@@ -0,0 +1,44 @@
+"""Store device metadata as JSONB
+
+Revision ID: b3e8f1d2c9a4
+Revises: 7d4b9e2c1a6f
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "b3e8f1d2c9a4"
+down_revision = "7d4b9e2c1a6f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "devices",
+        "meta_data",
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        existing_nullable=True,
+        postgresql_using="meta_data::jsonb",
+    )
+    op.create_index(
+        "ix_devices_meta_data",
+        "devices",
+        ["meta_data"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_devices_meta_data", table_name="devices")
+    op.alter_column(
+        "devices",
+        "meta_data",
+        type_=sa.JSON(),
+        existing_nullable=True,
+        postgresql_using="meta_data::json",
+    )
@@ -0,0 +1,46 @@
+"""Generate device coordinates with a GiST index
+
+Revision ID: e6a1c4b8d2f7
+Revises: b3e8f1d2c9a4
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e6a1c4b8d2f7"
+down_revision = "b3e8f1d2c9a4"
+branch_labels = None
+depends_on = None
+
+NUMBER_PATTERN = "'^-?[0-9]+(\\.[0-9]*)?([eE][-+]?[0-9]+)?$'"
+
+
+def coordinate(key: str) -> str:
+    value = f"meta_data->>'{key}'"
+    return (
+        f"CASE WHEN {value} ~ {NUMBER_PATTERN} "
+        f"THEN ({value})::double precision END"
+    )
+
+
+def upgrade() -> None:
+    for key in ("longitude", "latitude"):
+        op.add_column(
+            "devices",
+            sa.Column(key, sa.Float(), sa.Computed(coordinate(key), persisted=True)),
+        )
+    op.create_index(
+        "ix_devices_location",
+        "devices",
+        [sa.text("point(longitude, latitude)")],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_devices_location", table_name="devices")
+    op.drop_column("devices", "latitude")
+    op.drop_column("devices", "longitude")
@@ -0,0 +1,54 @@
+"""Timestamp notifications and index device dashboard lookups
+
+Revision ID: 4f9c2d7a1e35
+Revises: e6a1c4b8d2f7
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4f9c2d7a1e35"
+down_revision = "e6a1c4b8d2f7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "notifications",
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_notifications_device_id_created_at",
+        "notifications",
+        ["device_id", "created_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_messages_tag_id_time",
+        "messages",
+        ["tag_id", "time"],
+        unique=False,
+    )
+    op.create_index(op.f("ix_tags_device_id"), "tags", ["device_id"], unique=False)
+    op.create_index(
+        op.f("ix_actions_device_id"),
+        "actions",
+        ["device_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_actions_device_id"), table_name="actions")
+    op.drop_index(op.f("ix_tags_device_id"), table_name="tags")
+    op.drop_index("ix_messages_tag_id_time", table_name="messages")
+    op.drop_index("ix_notifications_device_id_created_at", table_name="notifications")
+    op.drop_column("notifications", "created_at")
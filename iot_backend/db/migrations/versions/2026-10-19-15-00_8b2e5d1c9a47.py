@@ -0,0 +1,35 @@
+"""Scope alerts to a tag and add range bounds
+
+Revision ID: 8b2e5d1c9a47
+Revises: 4f9c2d7a1e35
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8b2e5d1c9a47"
+down_revision = "4f9c2d7a1e35"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("alerts", sa.Column("upper_threshold", sa.Float(), nullable=True))
+    op.add_column("alerts", sa.Column("tag_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "alerts_tag_id_fkey",
+        "alerts",
+        "tags",
+        ["tag_id"],
+        ["id"],
+    )
+    op.create_index(op.f("ix_alerts_tag_id"), "alerts", ["tag_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_alerts_tag_id"), table_name="alerts")
+    op.drop_constraint("alerts_tag_id_fkey", "alerts", type_="foreignkey")
+    op.drop_column("alerts", "tag_id")
+    op.drop_column("alerts", "upper_threshold")
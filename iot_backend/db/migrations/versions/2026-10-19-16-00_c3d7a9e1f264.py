@@ -0,0 +1,27 @@
+"""Add windowed alert conditions
+
+Revision ID: c3d7a9e1f264
+Revises: 8b2e5d1c9a47
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c3d7a9e1f264"
+down_revision = "8b2e5d1c9a47"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("alerts", sa.Column("window_function", sa.String(), nullable=True))
+    op.add_column("alerts", sa.Column("window_seconds", sa.Float(), nullable=True))
+    op.add_column("alerts", sa.Column("window_samples", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("alerts", "window_samples")
+    op.drop_column("alerts", "window_seconds")
+    op.drop_column("alerts", "window_function")
@@ -0,0 +1,27 @@
+"""Add alert pending duration, hysteresis and re-notify interval
+
+Revision ID: 5e8f1b3d7c92
+Revises: c3d7a9e1f264
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e8f1b3d7c92"
+down_revision = "c3d7a9e1f264"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("alerts", sa.Column("for_seconds", sa.Float(), nullable=True))
+    op.add_column("alerts", sa.Column("hysteresis", sa.Float(), nullable=True))
+    op.add_column("alerts", sa.Column("renotify_seconds", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("alerts", "renotify_seconds")
+    op.drop_column("alerts", "hysteresis")
+    op.drop_column("alerts", "for_seconds")
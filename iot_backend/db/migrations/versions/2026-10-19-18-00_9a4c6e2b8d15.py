@@ -0,0 +1,38 @@
+"""Add notification read state and feed indexes
+
+Revision ID: 9a4c6e2b8d15
+Revises: 5e8f1b3d7c92
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9a4c6e2b8d15"
+down_revision = "5e8f1b3d7c92"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("notifications", sa.Column("read_at", sa.DateTime(), nullable=True))
+    op.create_index(
+        "ix_notifications_user_id_id",
+        "notifications",
+        ["user_id", sa.text("id DESC")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notifications_user_id_unread",
+        "notifications",
+        ["user_id", "device_id"],
+        unique=False,
+        postgresql_where=sa.text("read_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_user_id_unread", table_name="notifications")
+    op.drop_index("ix_notifications_user_id_id", table_name="notifications")
+    op.drop_column("notifications", "read_at")
@@ -0,0 +1,23 @@
+"""Add alert anomaly span
+
+Revision ID: 2d7f3b9e5a61
+Revises: 9a4c6e2b8d15
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "2d7f3b9e5a61"
+down_revision = "9a4c6e2b8d15"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("alerts", sa.Column("anomaly_span", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("alerts", "anomaly_span")
@@ -0,0 +1,65 @@
+"""Bound generated device coordinates
+
+Revision ID: 7b1d4e9c2a58
+Revises: 2d7f3b9e5a61
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Callable
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7b1d4e9c2a58"
+down_revision = "2d7f3b9e5a61"
+branch_labels = None
+depends_on = None
+
+OLD_PATTERN = "'^-?[0-9]+(\\.[0-9]*)?([eE][-+]?[0-9]+)?$'"
+NUMBER_PATTERN = "'^-?[0-9]{1,20}(\\.[0-9]{0,30})?([eE][-+]?[0-9]{1,2})?$'"
+LIMITS = {"longitude": 180, "latitude": 90}
+
+
+def old_coordinate(key: str) -> str:
+    value = f"meta_data->>'{key}'"
+    return (
+        f"CASE WHEN {value} ~ {OLD_PATTERN} "
+        f"THEN ({value})::double precision END"
+    )
+
+
+def coordinate(key: str) -> str:
+    value = f"meta_data->>'{key}'"
+    number = f"({value})::double precision"
+    return (
+        f"CASE WHEN {value} ~ {NUMBER_PATTERN} "
+        f"THEN CASE WHEN abs({number}) <= {LIMITS[key]} "
+        f"THEN {number} END END"
+    )
+
+
+def replace_columns(expression: Callable[[str], str]) -> None:
+    # Generated expressions can't be altered, the columns are built again.
+    op.drop_index("ix_devices_location", table_name="devices")
+    for key in ("longitude", "latitude"):
+        op.drop_column("devices", key)
+        op.add_column(
+            "devices",
+            sa.Column(key, sa.Float(), sa.Computed(expression(key), persisted=True)),
+        )
+    op.create_index(
+        "ix_devices_location",
+        "devices",
+        [sa.text("point(longitude, latitude)")],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+
+def upgrade() -> None:
+    replace_columns(coordinate)
+
+
+def downgrade() -> None:
+    replace_columns(old_coordinate)
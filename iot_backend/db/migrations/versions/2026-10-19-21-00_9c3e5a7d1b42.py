@@ -0,0 +1,31 @@
+"""Store notification timestamps in UTC
+
+Revision ID: 9c3e5a7d1b42
+Revises: 7b1d4e9c2a58
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c3e5a7d1b42"
+down_revision = "7b1d4e9c2a58"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column(
+        "notifications",
+        "created_at",
+        server_default=sa.text("timezone('utc', now())"),
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "notifications",
+        "created_at",
+        server_default=sa.text("now()"),
+    )
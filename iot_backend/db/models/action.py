@@ -27,7 +27,9 @@ class Action(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True, unique=True)
     uuid = Column(UUID(as_uuid=True), default=uuid4, unique=True, nullable=False)
-    device_id = Column(Integer, ForeignKey("devices.id"), nullable=False)
+    device_id = Column(
+        Integer, ForeignKey("devices.id"), nullable=False, index=True
+    )
     status = Column(Enum(ActionStatus, name="action_status"),
                     default=ActionStatus.PENDING)
     is_enabled = Column(Boolean, default=False)
@@ -16,9 +16,25 @@ class Alert(Base):
     name = Column(String, unique=True, nullable=False)
     comparator = Column(String, nullable=False)
     threshold = Column(Float, nullable=False)
+    # Upper bound of a "Range" alert, the lower one is ``threshold``.
+    upper_threshold = Column(Float, nullable=True)
+    # Compare an aggregate (mean, min, max, count or rate) of the last
+    # seconds and/or samples instead of single values.
+    window_function = Column(String, nullable=True)
+    window_seconds = Column(Float, nullable=True)
+    window_samples = Column(Integer, nullable=True)
+    # Fire after breaching for this long, clear only this far past the
+    # threshold, and notify again while firing every renotify_seconds.
+    for_seconds = Column(Float, nullable=True)
+    hysteresis = Column(Float, nullable=True)
+    renotify_seconds = Column(Float, nullable=True)
+    # Samples weighted by an "Anomaly" alert, whose threshold is a z-score.
+    anomaly_span = Column(Integer, nullable=True)
     status = Column(String, nullable=False)
     # channel_id = Column(String, nullable=False)
     device_id = Column(Integer, ForeignKey("devices.id"))
+    # Without a tag the alert applies to every tag of the device.
+    tag_id = Column(Integer, ForeignKey("tags.id"), index=True)
     user_id = Column(UUID, ForeignKey("user.id"))
 
     check_external_id = Column(String, nullable=False)
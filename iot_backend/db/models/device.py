@@ -2,30 +2,64 @@ from datetime import datetime
 from uuid import uuid4
 
 from sqlalchemy import (
-    JSON,
     Boolean,
     Column,
+    Computed,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
+    func,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
 from iot_backend.db.base import Base
 
 
+# Numbers with bounded digits and exponent, which always fit a double.
+NUMBER_PATTERN = "'^-?[0-9]{1,20}(\\.[0-9]{0,30})?([eE][-+]?[0-9]{1,2})?$'"
+# Bounds of the coordinates, values outside of them are left out.
+COORDINATE_LIMITS = {"longitude": 180, "latitude": 90}
+
+
+def coordinate_sql(key: str) -> str:
+    """
+    SQL of a coordinate taken from device metadata.
+
+    Numbers and numeric strings are converted, anything else becomes NULL,
+    so malformed metadata never makes a write fail. Digits and exponents
+    are bounded so the cast can't overflow, and values out of range for
+    the coordinate become NULL too.
+
+    :param key: metadata key, ``longitude`` or ``latitude``.
+    :return: SQL expression for a generated column.
+    """
+    value = f"meta_data->>'{key}'"
+    number = f"({value})::double precision"
+    return (
+        f"CASE WHEN {value} ~ {NUMBER_PATTERN} "
+        f"THEN CASE WHEN abs({number}) <= {COORDINATE_LIMITS[key]} "
+        f"THEN {number} END END"
+    )
+
+
 class Device(Base):
     __tablename__ = "devices"
+    # Generated coordinates are returned by INSERT/UPDATE, not lazy loaded.
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, autoincrement=True, unique=True)
     uuid = Column(UUID(as_uuid=True), default=uuid4, unique=True, nullable=False)
     name = Column(String(100))
     meta_data = Column(
-        JSON, nullable=True, default={"longitude": None, "latitude": None}
+        JSONB, nullable=True, default={"longitude": None, "latitude": None}
     )
+    longitude = Column(Float, Computed(coordinate_sql("longitude"), persisted=True))
+    latitude = Column(Float, Computed(coordinate_sql("latitude"), persisted=True))
     type = Column(Enum("node", "gateway", name="device__type"))
     is_configured = Column(Boolean, default=False)
     mainflux_thing_uuid = Column(UUID, nullable=True)
@@ -35,11 +69,20 @@ class Device(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     parent_id = Column(
-        Integer, ForeignKey("devices.id"), nullable=True
+        Integer, ForeignKey("devices.id"), nullable=True, index=True
     )  # One-to-One Relationship
     user_id = Column(UUID, ForeignKey("user.id"), nullable=True)
     org_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
 
+    __table_args__ = (
+        Index("ix_devices_meta_data", meta_data, postgresql_using="gin"),
+        Index(
+            "ix_devices_location",
+            func.point(longitude, latitude),
+            postgresql_using="gist",
+        ),
+    )
+
     parent = relationship("Device", remote_side=[id])
 
     # one-to-many relationship between Device and Alerts
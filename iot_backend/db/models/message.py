@@ -1,6 +1,15 @@
 from datetime import datetime
 from uuid import uuid4
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.dialects.postgresql import UUID
 
 from sqlalchemy.orm import relationship
@@ -37,3 +46,6 @@ class Message(Base):
     device = relationship("Device", back_populates="messages")
     tag = relationship("Tag", back_populates="messages")
     user = relationship("User", back_populates="messages")
+
+    # Latest values of a tag are read backwards through this index.
+    __table_args__ = (Index("ix_messages_tag_id_time", tag_id, time),)
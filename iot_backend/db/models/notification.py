@@ -1,6 +1,6 @@
 from uuid import uuid4
 
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import UUID
 
 from iot_backend.db.base import Base
@@ -21,5 +21,22 @@ class Notification(Base):
     device_id = Column(Integer, ForeignKey("devices.id"))
     user_id = Column(UUID, ForeignKey("user.id"))
 
+    # Always set by the database, in UTC like the other naive timestamps.
+    created_at = Column(DateTime, server_default=func.timezone("utc", func.now()))
+    read_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_notifications_device_id_created_at", device_id, created_at),
+        # Feed of a user, newest first.
+        Index("ix_notifications_user_id_id", user_id, id.desc()),
+        # Unread counts of a user, to rebuild the Redis counters.
+        Index(
+            "ix_notifications_user_id_unread",
+            user_id,
+            device_id,
+            postgresql_where=read_at.is_(None),
+        ),
+    )
+
     def __str__(self) -> str:
         return f"{self.level} {self.message}"
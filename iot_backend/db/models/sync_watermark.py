@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+
+from iot_backend.db.base import Base
+
+
+class MainfluxSyncWatermark(Base):
+    """Position of the Mainflux reader sync for one channel/publisher stream."""
+
+    __tablename__ = "mainflux_sync_watermarks"
+    __table_args__ = (UniqueConstraint("channel_id", "publisher"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    channel_id = Column(String, nullable=False)
+    publisher = Column(String, nullable=False)
+    # Number of reader messages already copied into the messages table.
+    synced_count = Column(BigInteger, nullable=False, default=0)
+    last_time = Column(Float, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
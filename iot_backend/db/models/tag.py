@@ -32,7 +32,7 @@ class Tag(Base):
     graphed = Column(Boolean, default=False)
 
     user_id = Column(UUID, ForeignKey("user.id"), nullable=True)
-    device_id = Column(Integer, ForeignKey("devices.id"), nullable=True)
+    device_id = Column(Integer, ForeignKey("devices.id"), nullable=True, index=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,2 @@
+"""Dispatch of actions to devices."""
+from .dispatch import enqueue_actions, settle_action, withdraw_action
@@ -0,0 +1,45 @@
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, status
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from iot_backend.db.dependencies import get_db_session
+from iot_backend.services.actions.dispatch import resolve_thing
+from iot_backend.services.redis.dependency import get_redis_pool
+
+THING_SCHEME = "thing"
+
+
+async def current_thing_device(
+    request: Request,
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    session: AsyncSession = Depends(get_db_session),
+) -> int:
+    """
+    Authenticate a device by its thing secret, as Mainflux does.
+
+    Devices send ``Authorization: Thing <secret>``.
+
+    :param request: current request.
+    :param redis_pool: redis connection pool caching secrets.
+    :param session: database session.
+    :raises HTTPException: 401 for a missing or unknown secret.
+    :returns: ID of the device.
+    """
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    try:
+        secret = UUID(credentials.strip())
+    except ValueError:
+        secret = None
+    device_id = None
+    if scheme.lower() == THING_SCHEME and secret is not None:
+        async with Redis(connection_pool=redis_pool) as redis:
+            device_id = await resolve_thing(redis, session, secret)
+    if device_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid thing secret.",
+        )
+    return device_id
@@ -0,0 +1,320 @@
+import time
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+import orjson
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.action import Action
+from iot_backend.db.models.device import Device
+from iot_backend.settings import settings
+
+# List of the actions waiting for a device, oldest first.
+QUEUE_KEY_PREFIX = "actions:queue:"
+# List of the actions a poll of a device took but didn't deliver yet.
+PROCESSING_KEY_PREFIX = "actions:processing:"
+# Device of a thing secret, or an empty string for an unknown secret.
+THING_KEY_PREFIX = "actions:thing:"
+# Actions delivered and waiting for an acknowledgement, as
+# "<device_id>:<action_id>" members scored by their deadline, and the
+# payload and number of deliveries of every queued or delivered action.
+DEADLINES_KEY = "actions:deadlines"
+INFLIGHT_KEY = "actions:inflight"
+ATTEMPTS_KEY = "actions:attempts"
+# Actions out of attempts, until they are marked as failed.
+EXPIRED_KEY = "actions:expired"
+
+# Forgets an action: it leaves its queue and nothing waits for it anymore.
+SETTLE_SCRIPT = """
+local payload = redis.call("HGET", KEYS[2], ARGV[1])
+if payload then
+    redis.call("LREM", KEYS[4], 0, payload)
+    redis.call("LREM", KEYS[5], 0, payload)
+end
+redis.call("ZREM", KEYS[1], ARGV[1])
+redis.call("HDEL", KEYS[2], ARGV[1])
+redis.call("HDEL", KEYS[3], ARGV[1])
+return payload and 1 or 0
+"""
+
+# Takes actions past their deadline. Those with attempts left go to the
+# back of their queue again, without a deadline until they are delivered,
+# the others move to the expired set. Workers running it at the same time
+# never take the same action.
+EXPIRE_SCRIPT = """
+local due = redis.call(
+    "ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, tonumber(ARGV[2])
+)
+for _, member in ipairs(due) do
+    local payload = redis.call("HGET", KEYS[2], member)
+    local attempts = tonumber(redis.call("HGET", KEYS[3], member) or ARGV[3])
+    local device = string.match(member, "^[^:]+")
+    local queue = ARGV[4] .. device
+    if payload then
+        redis.call("LREM", queue, 0, payload)
+        redis.call("LREM", ARGV[5] .. device, 0, payload)
+    end
+    if payload and attempts < tonumber(ARGV[3]) then
+        redis.call("RPUSH", queue, payload)
+        redis.call("ZREM", KEYS[1], member)
+        redis.call("HINCRBY", KEYS[3], member, 1)
+    else
+        redis.call("ZREM", KEYS[1], member)
+        redis.call("HDEL", KEYS[2], member)
+        redis.call("HDEL", KEYS[3], member)
+        redis.call("SADD", KEYS[4], member)
+    end
+end
+return #due
+"""
+
+# Delivers an action a poll took: it leaves the processing list and its
+# deadline starts, unless the action was settled or expired meanwhile.
+DELIVER_SCRIPT = """
+if redis.call("LREM", KEYS[1], 1, ARGV[1]) == 0
+        or redis.call("HEXISTS", KEYS[3], ARGV[2]) == 0 then
+    return 0
+end
+redis.call("ZADD", KEYS[2], ARGV[3], ARGV[2])
+return 1
+"""
+
+# Puts actions a crashed or cancelled poll took back in front of the queue.
+RESTORE_SCRIPT = """
+local taken = redis.call("LRANGE", KEYS[1], 0, -1)
+for index = #taken, 1, -1 do
+    redis.call("LPUSH", KEYS[2], taken[index])
+end
+redis.call("DEL", KEYS[1])
+return #taken
+"""
+
+
+def queue_key(device_id: int) -> str:
+    """
+    Get the key of the action queue of a device.
+
+    :param device_id: device ID.
+    :return: redis key.
+    """
+    return f"{QUEUE_KEY_PREFIX}{device_id}"
+
+
+def processing_key(device_id: int) -> str:
+    """
+    Get the key of the actions of a device being delivered.
+
+    :param device_id: device ID.
+    :return: redis key.
+    """
+    return f"{PROCESSING_KEY_PREFIX}{device_id}"
+
+
+def inflight_member(device_id: int, action_id: int) -> str:
+    """
+    Get the member tracking the deadline of an action.
+
+    :param device_id: device ID.
+    :param action_id: action ID.
+    :return: member of the deadline set.
+    """
+    return f"{device_id}:{action_id}"
+
+
+def action_payload(action: Action) -> bytes:
+    """
+    Serialize what a device gets of an action.
+
+    The payload only depends on the action, so a queued action can be
+    found again by value.
+
+    :param action: action.
+    :return: JSON payload.
+    """
+    return orjson.dumps(
+        {"id": action.id, "uuid": str(action.uuid), "values": list(action.values)},
+    )
+
+
+async def enqueue_actions(redis: Redis, actions: Iterable[Action]) -> None:
+    """
+    Queue actions for their devices in one round trip.
+
+    An action gets a deadline when its device takes it, so it waits in
+    the queue for as long as the device is offline. It's queued again or
+    fails when the device doesn't acknowledge it in time.
+
+    :param redis: redis client.
+    :param actions: enabled actions.
+    """
+    async with redis.pipeline(transaction=True) as pipe:
+        for action in actions:
+            queue = queue_key(action.device_id)
+            member = inflight_member(action.device_id, action.id)
+            payload = action_payload(action)
+            pipe.lrem(queue, 0, payload)
+            pipe.lrem(processing_key(action.device_id), 0, payload)
+            pipe.rpush(queue, payload)
+            pipe.zrem(DEADLINES_KEY, member)
+            pipe.hset(INFLIGHT_KEY, member, payload)
+            pipe.hset(ATTEMPTS_KEY, member, 1)
+        await pipe.execute()
+
+
+async def settle_action(redis: Redis, device_id: int, action_id: int) -> None:
+    """
+    Stop delivering an action and waiting for it.
+
+    :param redis: redis client.
+    :param device_id: device ID.
+    :param action_id: acknowledged, disabled or deleted action.
+    """
+    script = redis.register_script(SETTLE_SCRIPT)
+    await script(
+        keys=[
+            DEADLINES_KEY,
+            INFLIGHT_KEY,
+            ATTEMPTS_KEY,
+            queue_key(device_id),
+            processing_key(device_id),
+        ],
+        args=[inflight_member(device_id, action_id)],
+    )
+
+
+async def withdraw_action(redis: Redis, action: Action) -> None:
+    """
+    Remove an action its device didn't get yet.
+
+    :param redis: redis client.
+    :param action: disabled or deleted action.
+    """
+    await settle_action(redis, action.device_id, action.id)
+
+
+async def expire_actions(
+    redis: Redis,
+    limit: int,
+    now: Optional[float] = None,
+) -> int:
+    """
+    Queue again, or give up on, actions past their deadline.
+
+    :param redis: redis client.
+    :param limit: most actions to take.
+    :param now: current unix time.
+    :return: number of actions taken.
+    """
+    now = time.time() if now is None else now
+    script = redis.register_script(EXPIRE_SCRIPT)
+    return await script(
+        keys=[DEADLINES_KEY, INFLIGHT_KEY, ATTEMPTS_KEY, EXPIRED_KEY],
+        args=[
+            now,
+            limit,
+            settings.action_max_attempts,
+            QUEUE_KEY_PREFIX,
+            PROCESSING_KEY_PREFIX,
+        ],
+    )
+
+
+async def expired_actions(redis: Redis, limit: int) -> List[bytes]:
+    """
+    Get some actions out of attempts.
+
+    They stay in the expired set until ``forget_expired`` is called, so
+    a crash before they are marked as failed doesn't lose them.
+
+    :param redis: redis client.
+    :param limit: most actions to get.
+    :return: members of the expired set.
+    """
+    return await redis.srandmember(EXPIRED_KEY, limit)
+
+
+async def forget_expired(redis: Redis, members: List[bytes]) -> None:
+    """
+    Remove actions marked as failed from the expired set.
+
+    :param redis: redis client.
+    :param members: members of the expired set.
+    """
+    if members:
+        await redis.srem(EXPIRED_KEY, *members)
+
+
+async def next_action(
+    redis: Redis,
+    device_id: int,
+    timeout: float,
+) -> Optional[Dict[str, Any]]:
+    """
+    Wait for the next action of a device.
+
+    The action is moved to a processing list, then delivered by a script
+    that starts its deadline, so a device has the whole timeout to carry
+    it out. Expiring an action removes it from both lists, so an
+    action is never queued again while it's being delivered.
+
+    :param redis: redis client.
+    :param device_id: device ID.
+    :param timeout: most seconds to wait.
+    :return: the action payload, None if nothing came in time.
+    """
+    queue = queue_key(device_id)
+    processing = processing_key(device_id)
+    await redis.register_script(RESTORE_SCRIPT)(keys=[processing, queue])
+    deliver = redis.register_script(DELIVER_SCRIPT)
+    give_up = time.monotonic() + timeout
+    while True:  # noqa: WPS457
+        remaining = give_up - time.monotonic()
+        if remaining <= 0:
+            return None
+        payload = await redis.blmove(queue, processing, remaining, "LEFT", "RIGHT")
+        if payload is None:
+            return None
+        action = orjson.loads(payload)
+        delivered = await deliver(
+            keys=[processing, DEADLINES_KEY, INFLIGHT_KEY],
+            args=[
+                payload,
+                inflight_member(device_id, action["id"]),
+                time.time() + settings.action_ack_timeout_seconds,
+            ],
+        )
+        if delivered:
+            return action
+
+
+async def resolve_thing(
+    redis: Redis,
+    session: AsyncSession,
+    secret: UUID,
+) -> Optional[int]:
+    """
+    Find the device of a thing secret.
+
+    Secrets are cached in Redis, unknown ones too, so polling devices
+    don't query the database.
+
+    :param redis: redis client.
+    :param session: database session, used on a cache miss.
+    :param secret: Mainflux thing secret.
+    :return: device ID, None for an unknown secret.
+    """
+    key = f"{THING_KEY_PREFIX}{secret}"
+    cached = await redis.get(key)
+    if cached is not None:
+        return int(cached) if cached else None
+    device_id = await session.scalar(
+        select(Device.id).where(Device.mainflux_thing_secret == secret).limit(1),
+    )
+    await redis.set(
+        key,
+        "" if device_id is None else device_id,
+        ex=int(settings.action_credential_cache_seconds),
+    )
+    return device_id
@@ -0,0 +1,41 @@
+import asyncio
+
+from fastapi import FastAPI
+
+from iot_backend.services.actions.scheduler import ActionTimeoutScheduler
+from iot_backend.settings import settings
+
+
+def init_action_scheduler(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts handling action timeouts in the background.
+
+    :param app: current fastapi application.
+    """
+    app.state.action_scheduler_task = None
+    if not settings.action_scheduler_enabled:
+        return
+    scheduler = ActionTimeoutScheduler(batch_size=settings.action_timeout_batch_size)
+    app.state.action_scheduler_task = asyncio.create_task(
+        scheduler.run(
+            app.state.redis_pool,
+            app.state.db_session_factory,
+            interval=settings.action_timeout_poll_seconds,
+        ),
+    )
+
+
+async def shutdown_action_scheduler(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops handling action timeouts.
+
+    :param app: current FastAPI app.
+    """
+    task = app.state.action_scheduler_task
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass  # noqa: WPS420
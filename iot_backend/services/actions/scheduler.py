@@ -0,0 +1,78 @@
+import asyncio
+from typing import Optional
+
+from loguru import logger
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from iot_backend.db.dao.action_dao import ActionDAO
+from iot_backend.services.actions.dispatch import (
+    expire_actions,
+    expired_actions,
+    forget_expired,
+)
+
+
+class ActionTimeoutScheduler:
+    """
+    Retries actions devices don't acknowledge in time, then fails them.
+
+    Deadlines live in a Redis sorted set, so a round only looks at the
+    actions that are due, however many are outstanding. Every worker
+    runs a scheduler: due actions are taken atomically, and failing an
+    action twice does nothing.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        self.batch_size = batch_size
+
+    async def process(
+        self,
+        redis: Redis,
+        session: AsyncSession,
+        now: Optional[float] = None,
+    ) -> int:
+        """
+        Handle every action past its deadline.
+
+        :param redis: redis client.
+        :param session: database session, committed.
+        :param now: current unix time.
+        :return: number of actions marked as failed.
+        """
+        while await expire_actions(redis, self.batch_size, now) == self.batch_size:
+            continue
+        action_dao = ActionDAO(session)
+        failed = 0
+        while True:  # noqa: WPS457
+            members = await expired_actions(redis, self.batch_size)
+            if not members:
+                return failed
+            failed += await action_dao.fail_pending(
+                [int(member.split(b":")[1]) for member in members],
+            )
+            await forget_expired(redis, members)
+
+    async def run(
+        self,
+        redis_pool: ConnectionPool,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+    ) -> None:
+        """
+        Handle due actions forever.
+
+        :param redis_pool: redis connection pool.
+        :param session_factory: factory of database sessions.
+        :param interval: seconds between rounds.
+        """
+        async with Redis(connection_pool=redis_pool) as redis:
+            while True:  # noqa: WPS457
+                try:
+                    async with session_factory() as session:
+                        await self.process(redis, session)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Handling action timeouts failed")
+                await asyncio.sleep(interval)
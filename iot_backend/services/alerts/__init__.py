@@ -0,0 +1,2 @@
+"""In-process evaluation of alerts."""
+from .engine import AlertEngine, compile_predicate
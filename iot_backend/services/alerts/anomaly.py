@@ -0,0 +1,129 @@
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+# Smallest decay within one block of ``_recurrence``, to bound how large
+# the rescaled terms get.
+_MIN_DECAY = 1e-6
+
+
+@dataclass(frozen=True)
+class AnomalySpec:
+    """Exponential weighting of an anomaly alert."""
+
+    # Weight of a new value, 2 / (span + 1) for a span in samples.
+    alpha: float
+    # Values seen before scoring, so a new stream doesn't fire at once.
+    warmup: int
+
+    @classmethod
+    def from_span(cls, span: int) -> "AnomalySpec":
+        """
+        Weight values like a moving average of ``span`` samples.
+
+        :param span: span in samples, at least 2.
+        :return: weighting.
+        """
+        span = max(span, 2)
+        return cls(alpha=2 / (span + 1), warmup=span)
+
+
+class Ewma:
+    """
+    Exponentially weighted mean and variance of one stream.
+
+    Three numbers per stream, updated in O(1) per value, so every tag of
+    a large fleet fits in memory. A value is scored against the state
+    before it, as its distance to the mean in standard deviations.
+    """
+
+    __slots__ = ("mean", "var", "count")
+
+    def __init__(self) -> None:
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def score(self, value: float, spec: AnomalySpec) -> float:
+        """
+        Score a value, then add it to the state.
+
+        :param value: value.
+        :param spec: weighting.
+        :return: absolute z-score, 0 while warming up.
+        """
+        count = self.count
+        self.count = count + 1
+        if not count:
+            self.mean = value
+            return 0.0
+        alpha = spec.alpha
+        diff = value - self.mean
+        var = self.var
+        increment = alpha * diff
+        self.mean += increment
+        self.var = (1 - alpha) * (var + diff * increment)
+        if count < spec.warmup:
+            return 0.0
+        if var > 0:
+            return abs(diff) / math.sqrt(var)
+        return math.inf if diff else 0.0
+
+    def score_many(self, values: np.ndarray, spec: AnomalySpec) -> np.ndarray:
+        """
+        Score values in order, vectorized, e.g. to backfill from history.
+
+        Gives the same scores and state as calling ``score`` on every
+        value. Mean and variance are both linear recurrences once the
+        differences are known, which NumPy solves with cumulative sums.
+
+        :param values: values, oldest first.
+        :param spec: weighting.
+        :return: absolute z-score of every value.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        scores = np.zeros(len(values))
+        if not len(values):
+            return scores
+        first = 0
+        if not self.count:
+            self.mean = float(values[0])
+            self.count = 1
+            first = 1
+        rest = values[first:]
+        if not len(rest):
+            return scores
+        alpha = spec.alpha
+        decay = 1 - alpha
+        means = _recurrence(decay, alpha * rest, self.mean)
+        previous_means = np.concatenate(([self.mean], means[:-1]))
+        diffs = rest - previous_means
+        variances = _recurrence(decay, decay * alpha * diffs**2, self.var)
+        previous_variances = np.concatenate(([self.var], variances[:-1]))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rest_scores = np.abs(diffs) / np.sqrt(previous_variances)
+        rest_scores[(previous_variances <= 0) & (diffs == 0)] = 0
+        seen = self.count + np.arange(len(rest))
+        rest_scores[seen < spec.warmup] = 0
+        scores[first:] = rest_scores
+        self.mean = float(means[-1])
+        self.var = float(variances[-1])
+        self.count += len(rest)
+        return scores
+
+
+def _recurrence(decay: float, inputs: np.ndarray, initial: float) -> np.ndarray:
+    # y[j] = decay * y[j - 1] + inputs[j] from y[-1] = initial, for
+    # 0 < decay < 1. Within a block y[j] = decay**(j + 1) * (initial +
+    # sum(inputs[i] / decay**(i + 1) for i <= j)); blocks are short enough
+    # for the divisions to stay far from overflow and rounding.
+    block = max(1, min(len(inputs), int(math.log(_MIN_DECAY) / math.log(decay))))
+    powers = decay ** np.arange(1, block + 1)
+    outputs = np.empty_like(inputs)
+    for start in range(0, len(inputs), block):
+        chunk = inputs[start : start + block]
+        scale = powers[: len(chunk)]
+        outputs[start : start + len(chunk)] = scale * (initial + np.cumsum(chunk / scale))
+        initial = outputs[start + len(chunk) - 1]
+    return outputs
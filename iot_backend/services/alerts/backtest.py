@@ -0,0 +1,492 @@
+import asyncio
+import math
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from iot_backend.db.models import load_all_models
+from iot_backend.db.models.alert import Alert
+from iot_backend.db.models.message import Message
+from iot_backend.services.alerts.anomaly import AnomalySpec, Ewma
+from iot_backend.services.alerts.engine import (
+    ANOMALY,
+    compile_anomaly,
+    compile_predicate,
+    compile_window,
+)
+from iot_backend.services.alerts.windows import WindowSpec
+from iot_backend.settings import settings
+
+BREACH = 1
+CLEAR = 0
+# Neither breaching nor clearing, inside the hysteresis band.
+HOLD = -1
+# Samples fed to anomaly statistics per span before a slice, enough for
+# the weight of older values to fall under 1e-8.
+ANOMALY_LOOKBACK_SPANS = 10
+
+
+@dataclass(frozen=True)
+class BacktestSpec:
+    """Condition of a candidate alert, reduced to what replays need."""
+
+    comparator: str
+    threshold: float
+    upper_threshold: Optional[float] = None
+    hysteresis: float = 0
+    for_seconds: float = 0
+    window: Optional[WindowSpec] = None
+    anomaly: Optional[AnomalySpec] = None
+
+    @classmethod
+    def from_alert(cls, alert: Alert) -> "BacktestSpec":
+        """
+        Compile a candidate alert, as the alert engine would.
+
+        :param alert: alert, not necessarily stored.
+        :return: spec.
+        :raises ValueError: if the alert can't be evaluated.
+        """
+        if compile_predicate(alert.comparator, 0, alert.upper_threshold) is None:
+            if alert.comparator == "Range":
+                raise ValueError("a range needs an upper threshold")
+            raise ValueError(f"unknown comparator {alert.comparator}")
+        return cls(
+            comparator=alert.comparator,
+            threshold=alert.threshold,
+            upper_threshold=alert.upper_threshold,
+            hysteresis=alert.hysteresis or 0,
+            for_seconds=alert.for_seconds or 0,
+            window=compile_window(alert),
+            anomaly=compile_anomaly(alert),
+        )
+
+    @property
+    def lookback_rows(self) -> int:
+        """
+        Count the values before a slice its first values depend on.
+
+        :return: number of rows.
+        """
+        if self.anomaly is not None:
+            return ANOMALY_LOOKBACK_SPANS * self.anomaly.warmup
+        if self.window is not None:
+            return self.window.samples - 1
+        return 0
+
+    @property
+    def lookback_seconds(self) -> float:
+        """
+        Get how far back before a slice its first values depend on.
+
+        :return: seconds.
+        """
+        if self.window is not None and self.window.seconds is not None:
+            return self.window.seconds
+        return 0
+
+
+@dataclass
+class SliceResult:
+    """
+    Breach runs of one time slice of a replay.
+
+    A run is a streak of breaching values, with values in the hysteresis
+    band in between. Times are NaN where missing: a run still breaching
+    at the end of the slice has no end, a run too short has no firing.
+    """
+
+    samples: int
+    last_time: float
+    # First and last breaching value, firing and first clearing value.
+    first: np.ndarray
+    last: np.ndarray
+    fire: np.ndarray
+    end: np.ndarray
+    # First clearing value of the slice, NaN if none.
+    first_clear: float = math.nan
+    # Breaching values of the first run until it would fire on its own,
+    # to find the firing of a run started in an earlier slice.
+    head: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+
+@dataclass
+class BacktestResult:
+    """Firings of a candidate alert over a replay."""
+
+    samples: int = 0
+    firing_seconds: float = 0
+    intervals: List[Tuple[float, Optional[float]]] = field(default_factory=list)
+
+
+def window_subjects(
+    spec: WindowSpec,
+    times: np.ndarray,
+    values: np.ndarray,
+) -> np.ndarray:
+    """
+    Compute the aggregate of the window ending at every value.
+
+    Gives what ``SlidingWindow.push`` returns for values in time order.
+    Sums come from a cumulative sum, minimums and maximums from a sparse
+    table of power-of-two ranges, so every value is O(1) in NumPy.
+
+    :param spec: window.
+    :param times: unix times, increasing.
+    :param values: values.
+    :return: aggregate of every value.
+    """
+    index = np.arange(len(values))
+    starts = np.maximum(index - spec.samples + 1, 0)
+    if spec.seconds is not None:
+        starts = np.maximum(
+            starts,
+            np.searchsorted(times, times - spec.seconds, side="right"),
+        )
+    lengths = index - starts + 1
+    if spec.function == "count":
+        return lengths.astype(np.float64)
+    if spec.function == "mean":
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        return (sums[index + 1] - sums[starts]) / lengths
+    if spec.function == "rate":
+        elapsed = times - times[starts]
+        rates = np.zeros(len(values))
+        moving = elapsed > 0
+        rates[moving] = (values - values[starts])[moving] / elapsed[moving]
+        return rates
+    reduce = np.minimum if spec.function == "min" else np.maximum
+    levels = [values]
+    while 2 ** len(levels) <= lengths.max(initial=1):
+        previous = levels[-1]
+        half = 2 ** (len(levels) - 1)
+        levels.append(reduce(previous[:-half], previous[half:]))
+    orders = np.log2(lengths).astype(np.int64)
+    aggregates = np.empty(len(values))
+    for order in np.unique(orders):
+        selected = orders == order
+        level = levels[order]
+        aggregates[selected] = reduce(
+            level[starts[selected]],
+            level[index[selected] - 2**order + 1],
+        )
+    return aggregates
+
+
+def conditions(spec: BacktestSpec, times: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Tell whether every value breaches, clears or holds the alert.
+
+    :param spec: candidate alert.
+    :param times: unix times, increasing.
+    :param values: values.
+    :return: ``BREACH``, ``CLEAR`` or ``HOLD`` of every value.
+    """
+    subjects = values
+    if spec.window is not None:
+        subjects = window_subjects(spec.window, times, values)
+    elif spec.anomaly is not None:
+        subjects = Ewma().score_many(values, spec.anomaly)
+    low, band = spec.threshold, spec.hysteresis
+    if spec.comparator in {"Greater than", ANOMALY}:
+        breached = subjects > low
+        cleared = subjects <= low - band
+    elif spec.comparator == "Less than":
+        breached = subjects < low
+        cleared = subjects >= low + band
+    else:
+        high = spec.upper_threshold
+        breached = (subjects < low) | (subjects > high)
+        cleared = (subjects >= low + band) & (subjects <= high - band)  # type: ignore[operator]
+    return np.where(breached, BREACH, np.where(cleared, CLEAR, HOLD)).astype(np.int8)
+
+
+def find_runs(
+    times: np.ndarray,
+    states: np.ndarray,
+    for_seconds: float,
+) -> SliceResult:
+    """
+    Find breach runs and their firings in the conditions of a slice.
+
+    As in the alert engine, a run fires on its first breaching value at
+    least ``for_seconds`` after its start, and ends on a clearing value.
+
+    :param times: unix times, increasing.
+    :param states: conditions of the values.
+    :param for_seconds: how long a breach lasts before firing.
+    :return: runs.
+    """
+    empty = np.empty(0)
+    last_time = float(times[-1]) if len(times) else math.nan
+    events = states != HOLD
+    times, states = times[events], states[events]
+    if not len(states):
+        return SliceResult(len(events), last_time, empty, empty, empty, empty)
+    bounds = np.flatnonzero(np.diff(states)) + 1
+    starts = np.concatenate(([0], bounds))
+    stops = np.concatenate((bounds, [len(states)]))
+    breaching = states[starts] == BREACH
+    starts, stops = starts[breaching], stops[breaching]
+    padded = np.append(times, math.nan)
+    due = np.searchsorted(times, times[starts] + for_seconds)
+    fire = np.where(due < stops, padded[np.minimum(due, len(times))], math.nan)
+    clears = np.flatnonzero(states == CLEAR)
+    head = empty
+    if len(starts) and starts[0] == 0:
+        # Up to the first value past for_seconds, which always fires.
+        reach = np.searchsorted(times, times[0] + for_seconds, side="right") + 1
+        head = times[: min(reach, stops[0])]
+    return SliceResult(
+        samples=len(events),
+        last_time=last_time,
+        first=times[starts],
+        last=times[stops - 1],
+        fire=fire,
+        end=padded[stops],
+        first_clear=float(times[clears[0]]) if len(clears) else math.nan,
+        head=head,
+    )
+
+
+def merge_slices(results: Sequence[SliceResult], for_seconds: float) -> BacktestResult:
+    """
+    Join the runs of consecutive slices into firing intervals.
+
+    A run still breaching at the end of a slice goes on with the first
+    run of the next slice when it starts with a breach, and ends on its
+    first clearing value otherwise.
+
+    :param results: runs of every slice, in time order.
+    :param for_seconds: how long a breach lasts before firing.
+    :return: firings.
+    """
+    backtest = BacktestResult()
+    last_time = math.nan
+    open_start: Optional[float] = None
+    open_fire = math.nan
+
+    def close(fire: float, end: float) -> None:  # noqa: WPS430
+        if math.isnan(fire):
+            return
+        stop = None if math.isnan(end) else end
+        backtest.intervals.append((fire, stop))
+        backtest.firing_seconds += (last_time if stop is None else stop) - fire
+
+    for result in results:
+        backtest.samples += result.samples
+        if not math.isnan(result.last_time):
+            last_time = result.last_time
+        runs = range(len(result.first))
+        if open_start is not None:
+            # Only a slice starting with a breach has a head.
+            if len(result.head):
+                if math.isnan(open_fire) and result.last[0] >= open_start + for_seconds:
+                    head = result.head
+                    open_fire = float(
+                        head[np.searchsorted(head, open_start + for_seconds)],
+                    )
+                runs = range(1, len(result.first))
+                if math.isnan(result.end[0]):
+                    continue
+                close(open_fire, result.end[0])
+            elif not math.isnan(result.first_clear):
+                close(open_fire, result.first_clear)
+            else:
+                continue
+            open_start = None
+        for run in runs:
+            if math.isnan(result.end[run]):
+                open_start, open_fire = result.first[run], result.fire[run]
+            else:
+                close(result.fire[run], result.end[run])
+    if open_start is not None:
+        close(open_fire, math.nan)
+    return backtest
+
+
+async def load_values(
+    session: AsyncSession,
+    tag_id: int,
+    start: int,
+    end: int,
+    spec: BacktestSpec,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Read the values of a tag in a time range, and those before it that
+    windows and anomaly statistics depend on.
+
+    Rows are read ``backtest_chunk_rows`` at a time, in keyset order.
+    Every chunk comes back as one row of arrays aggregated by Postgres,
+    which skips building a Python row per value.
+
+    :param session: database session.
+    :param tag_id: tag.
+    :param start: first unix time.
+    :param end: unix time after the last one.
+    :param spec: candidate alert.
+    :return: times, values and index of the first value of the range.
+    """
+    begin: Optional[float] = start - spec.lookback_seconds
+    if spec.lookback_rows:
+        earliest = await session.scalar(
+            select(Message.time)
+            .where(Message.tag_id == tag_id, Message.time < start)
+            .order_by(Message.time.desc())
+            .offset(spec.lookback_rows - 1)
+            .limit(1),
+        )
+        begin = None if earliest is None else min(begin, earliest)  # type: ignore[type-var]
+    query = select(Message.time, Message.value, Message.id).where(
+        Message.tag_id == tag_id,
+        Message.time < end,
+    )
+    if begin is not None:
+        query = query.where(Message.time >= begin)
+    times: List[np.ndarray] = []
+    values: List[np.ndarray] = []
+    after: Optional[Tuple[int, int]] = None
+    while True:  # noqa: WPS457
+        page = query
+        if after is not None:
+            page = page.where(tuple_(Message.time, Message.id) > after)
+        chunk = (
+            page.order_by(Message.time, Message.id)
+            .limit(settings.backtest_chunk_rows)
+            .subquery()
+        )
+        order = (chunk.c.time, chunk.c.id)
+        chunk_times, chunk_values, chunk_ids = (
+            await session.execute(
+                select(
+                    func.array_agg(aggregate_order_by(chunk.c.time, *order)),
+                    func.array_agg(aggregate_order_by(chunk.c.value, *order)),
+                    func.array_agg(aggregate_order_by(chunk.c.id, *order)),
+                ),
+            )
+        ).one()
+        if not chunk_ids:
+            break
+        times.append(np.array(chunk_times, dtype=np.float64))
+        values.append(np.array(chunk_values, dtype=np.float64))
+        if len(chunk_ids) < settings.backtest_chunk_rows:
+            break
+        after = (chunk_times[-1], chunk_ids[-1])
+    all_times = np.concatenate(times) if times else np.empty(0)
+    all_values = np.concatenate(values) if values else np.empty(0)
+    return all_times, all_values, int(np.searchsorted(all_times, start))
+
+
+async def evaluate_slice(
+    session: AsyncSession,
+    tag_id: int,
+    spec: BacktestSpec,
+    start: int,
+    end: int,
+) -> SliceResult:
+    """
+    Replay the values of a tag in a time range.
+
+    :param session: database session.
+    :param tag_id: tag.
+    :param spec: candidate alert.
+    :param start: first unix time.
+    :param end: unix time after the last one.
+    :return: runs of the range.
+    """
+    times, values, first = await load_values(session, tag_id, start, end, spec)
+    states = conditions(spec, times, values)
+    return find_runs(times[first:], states[first:], spec.for_seconds)
+
+
+def run_slice(tag_id: int, spec: BacktestSpec, start: int, end: int) -> SliceResult:
+    """
+    Replay a time range in a worker process, with its own connection.
+
+    :param tag_id: tag.
+    :param spec: candidate alert.
+    :param start: first unix time.
+    :param end: unix time after the last one.
+    :return: runs of the range.
+    """
+    # A spawned worker only imported this module, relationships need all.
+    load_all_models()
+
+    async def _run() -> SliceResult:  # noqa: WPS430
+        engine = create_async_engine(str(settings.db_url), poolclass=NullPool)
+        try:
+            async with AsyncSession(engine) as session:
+                return await evaluate_slice(session, tag_id, spec, start, end)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(_run())
+
+
+async def backtest(
+    session: AsyncSession,
+    tag_id: int,
+    spec: BacktestSpec,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    pool: Optional[Executor] = None,
+) -> BacktestResult:
+    """
+    Replay stored values of a tag through a candidate alert.
+
+    The range, narrowed to the stored values, is split into slices of
+    ``backtest_slice_seconds``, longer if there would be more than
+    ``backtest_max_slices``. Slices are replayed in parallel by the process
+    pool and joined. Without a pool they are replayed one after the other
+    in this process.
+
+    :param session: database session.
+    :param tag_id: tag.
+    :param spec: candidate alert.
+    :param start: first unix time, the first stored value by default.
+    :param end: unix time after the last one, after the last value by default.
+    :param pool: process pool.
+    :return: firings.
+    :raises ValueError: if the range is longer than ``backtest_max_seconds``.
+    """
+    first, last = (
+        await session.execute(
+            select(func.min(Message.time), func.max(Message.time)).where(
+                Message.tag_id == tag_id,
+            ),
+        )
+    ).one()
+    if first is None:
+        return BacktestResult()
+    start = first if start is None else max(start, first)
+    end = last + 1 if end is None else min(end, last + 1)
+    if end - start > settings.backtest_max_seconds:
+        raise ValueError(
+            f"ranges are replayed up to {int(settings.backtest_max_seconds)} seconds",
+        )
+    step = max(
+        1,
+        int(settings.backtest_slice_seconds),
+        -(-(end - start) // max(1, settings.backtest_max_slices)),
+    )
+    bounds = [(low, min(low + step, end)) for low in range(start, end, step)]
+    if pool is None or len(bounds) < 2:
+        results = [
+            await evaluate_slice(session, tag_id, spec, low, high)
+            for low, high in bounds
+        ]
+    else:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, run_slice, tag_id, spec, low, high)
+                for low, high in bounds
+            ),
+        )
+    return merge_slices(results, spec.for_seconds)
@@ -0,0 +1,26 @@
+from concurrent.futures import Executor
+from typing import Optional
+
+from starlette.requests import Request
+
+from iot_backend.services.alerts.engine import AlertEngine
+
+
+def get_alert_engine(request: Request) -> Optional[AlertEngine]:  # pragma: no cover
+    """
+    Returns the alert engine of the application.
+
+    :param request: current request.
+    :returns: alert engine or None when alerts are not evaluated.
+    """
+    return getattr(request.app.state, "alert_engine", None)
+
+
+def get_backtest_pool(request: Request) -> Optional[Executor]:  # pragma: no cover
+    """
+    Returns the process pool replaying alert backtests.
+
+    :param request: current request.
+    :returns: pool or None to replay in the request.
+    """
+    return getattr(request.app.state, "backtest_pool", None)
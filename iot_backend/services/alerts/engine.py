@@ -0,0 +1,914 @@
+import asyncio
+import operator
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+import orjson
+from loguru import logger
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from iot_backend.db.models.alert import Alert
+from iot_backend.db.models.message import Message
+from iot_backend.services.alerts.anomaly import AnomalySpec, Ewma
+from iot_backend.services.alerts.states import (
+    FIRING,
+    RESOLVED,
+    TRANSITION_SCRIPT,
+    LocalState,
+)
+from iot_backend.services.alerts.windows import (
+    WINDOW_FUNCTIONS,
+    SlidingWindow,
+    WindowSpec,
+)
+from iot_backend.services.notifications.outbox import publish_notifications
+from iot_backend.settings import settings
+
+Predicate = Callable[[float], bool]
+RuleKey = Tuple[int, Optional[int]]
+# Rule, tag, whether the value breaches, time and compared value.
+Transition = Tuple["Rule", Optional[int], bool, float, float]
+# Device, tag, value and time of a value forwarded to the owner of windows.
+Forwarded = Tuple[int, Optional[int], float, float]
+
+ENABLED = "enabled"
+# Comparator of alerts on the z-score of values, ``threshold`` is in
+# standard deviations.
+ANOMALY = "Anomaly"
+ENGINE_ENDPOINT = "alert-engine"
+NOTIFICATION_LEVELS = {FIRING: "crit", RESOLVED: "ok"}
+# Redis hash of window snapshots, one field per rule and tag.
+WINDOWS_KEY = "alerts:windows"
+# Prefix of the Redis hashes holding the state of every rule and tag.
+STATE_KEY_PREFIX = "alerts:state:"
+# Lease of the process keeping windows and anomaly statistics, and the
+# stream other processes forward values of those rules to.
+OWNER_KEY = "alerts:owner"
+VALUES_STREAM = "alerts:values"
+
+# Takes the lease when it's free or already ours, and extends it.
+LEASE_SCRIPT = """
+local owner = redis.call("GET", KEYS[1])
+if owner and owner ~= ARGV[1] then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[1], "PX", ARGV[2])
+return 1
+"""
+# Gives the lease up, unless another process took it meanwhile.
+RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+def _outside(low: float, high: float, value: float) -> bool:
+    return not low <= value <= high
+
+
+def _inside(low: float, high: float, value: float) -> bool:
+    return low <= value <= high
+
+
+def compile_predicate(
+    comparator: str,
+    threshold: float,
+    upper_threshold: Optional[float] = None,
+) -> Optional[Predicate]:
+    """
+    Compile a comparator of an alert into a predicate of one value.
+
+    Comparisons are partials of the ``operator`` functions, so calling a
+    predicate doesn't run any Python bytecode. ``threshold < value`` reads
+    as ``lt(threshold, value)``, which is why "Greater than" binds ``lt``.
+
+    A "Range" alert matches values outside of its bounds. An "Anomaly"
+    alert is given z-scores and matches those above its threshold.
+
+    :param comparator: "Greater than", "Less than", "Range" or "Anomaly".
+    :param threshold: threshold, the lower bound of a range.
+    :param upper_threshold: upper bound of a range.
+    :return: predicate or None when the alert can't be evaluated.
+    """
+    if comparator in {"Greater than", ANOMALY}:
+        return partial(operator.lt, threshold)
+    if comparator == "Less than":
+        return partial(operator.gt, threshold)
+    if comparator == "Range" and upper_threshold is not None:
+        return partial(_outside, threshold, upper_threshold)
+    return None
+
+
+def compile_clear_predicate(
+    comparator: str,
+    threshold: float,
+    upper_threshold: Optional[float] = None,
+    hysteresis: float = 0,
+) -> Optional[Predicate]:
+    """
+    Compile the condition a value must meet to clear an alert.
+
+    Without hysteresis it's the opposite of ``compile_predicate``. With
+    it, a value must get ``hysteresis`` past the threshold, back into the
+    normal range, so a value hovering around the threshold neither
+    breaches nor clears.
+
+    :param comparator: "Greater than", "Less than", "Range" or "Anomaly".
+    :param threshold: threshold, the lower bound of a range.
+    :param upper_threshold: upper bound of a range.
+    :param hysteresis: width of the band.
+    :return: predicate or None when the alert can't be evaluated.
+    """
+    if comparator in {"Greater than", ANOMALY}:
+        return partial(operator.ge, threshold - hysteresis)
+    if comparator == "Less than":
+        return partial(operator.le, threshold + hysteresis)
+    if comparator == "Range" and upper_threshold is not None:
+        return partial(_inside, threshold + hysteresis, upper_threshold - hysteresis)
+    return None
+
+
+@dataclass(eq=False)
+class Rule:
+    """An enabled alert compiled for evaluation."""
+
+    alert_id: int
+    name: str
+    description: str
+    predicate: Predicate
+    clear: Predicate
+    device_id: int
+    user_id: Optional[UUID]
+    check_id: str
+    rule_id: str
+    tag_id: Optional[int] = None
+    window: Optional[WindowSpec] = None
+    anomaly: Optional[AnomalySpec] = None
+    for_seconds: float = 0
+    renotify_seconds: Optional[float] = None
+    # Window, detector and state of every tag the rule has seen values of.
+    windows: Dict[Optional[int], SlidingWindow] = field(default_factory=dict)
+    detectors: Dict[Optional[int], Ewma] = field(default_factory=dict)
+    states: Dict[Optional[int], LocalState] = field(default_factory=dict)
+
+
+def compile_window(alert: Alert) -> Optional[WindowSpec]:
+    """
+    Get the window of an alert.
+
+    Windows are capped at ``alert_window_max_samples`` values, so a window
+    over seconds still has bounded memory on a chatty stream.
+
+    :param alert: alert row.
+    :return: window or None for an alert on single values.
+    :raises ValueError: if the window is incomplete.
+    """
+    if alert.window_function is None:
+        return None
+    if alert.window_function not in WINDOW_FUNCTIONS:
+        raise ValueError(f"unknown window function {alert.window_function}")
+    if not alert.window_seconds and not alert.window_samples:
+        raise ValueError("a window needs seconds or samples")
+    limit = settings.alert_window_max_samples
+    return WindowSpec(
+        function=alert.window_function,
+        seconds=alert.window_seconds or None,
+        samples=min(alert.window_samples or limit, limit),
+    )
+
+
+def compile_anomaly(alert: Alert) -> Optional[AnomalySpec]:
+    """
+    Get the weighting of an anomaly alert.
+
+    :param alert: alert row.
+    :return: weighting or None for an alert on values.
+    :raises ValueError: if the alert also has a window.
+    """
+    if alert.comparator != ANOMALY:
+        return None
+    if alert.window_function is not None:
+        raise ValueError("an anomaly alert can't have a window")
+    return AnomalySpec.from_span(
+        alert.anomaly_span or settings.alert_anomaly_default_span,
+    )
+
+
+def describe(alert: Alert, window: Optional[WindowSpec]) -> str:
+    """
+    Describe the condition of an alert, for notification messages.
+
+    :param alert: alert row.
+    :param window: window of the alert.
+    :return: description, e.g. "mean of 60s greater than 80".
+    """
+    if alert.comparator == ANOMALY:
+        span = alert.anomaly_span or settings.alert_anomaly_default_span
+        return f"more than {alert.threshold:g} sigma off the mean of ~{span} samples"
+    if alert.comparator == "Range":
+        condition = f"outside of {alert.threshold:g}..{alert.upper_threshold:g}"
+    else:
+        condition = f"{alert.comparator.lower()} {alert.threshold:g}"
+    if window is None:
+        return condition
+    if alert.window_seconds:
+        span = f"{window.seconds:g}s"
+    else:
+        span = f"{window.samples} samples"
+    return f"{window.function} of {span} {condition}"
+
+
+def compile_rule(alert: Alert) -> Optional[Rule]:
+    """
+    Compile an alert.
+
+    :param alert: alert row.
+    :return: rule or None when the alert can't be evaluated.
+    """
+    predicate = compile_predicate(
+        alert.comparator,
+        alert.threshold,
+        alert.upper_threshold,
+    )
+    clear = compile_clear_predicate(
+        alert.comparator,
+        alert.threshold,
+        alert.upper_threshold,
+        alert.hysteresis or 0,
+    )
+    if predicate is None or clear is None or alert.device_id is None:
+        return None
+    try:
+        window = compile_window(alert)
+        anomaly = compile_anomaly(alert)
+    except ValueError as exc:
+        logger.warning("Alert {} is skipped: {}", alert.name, exc)
+        return None
+    return Rule(
+        alert_id=alert.id,
+        name=alert.name,
+        description=describe(alert, window),
+        predicate=predicate,
+        clear=clear,
+        device_id=alert.device_id,
+        user_id=alert.user_id,
+        check_id=alert.check_external_id,
+        rule_id=str(alert.uuid),
+        tag_id=alert.tag_id,
+        window=window,
+        anomaly=anomaly,
+        for_seconds=alert.for_seconds or 0,
+        renotify_seconds=alert.renotify_seconds,
+    )
+
+
+class AlertEngine:
+    """
+    Evaluates enabled alerts against values as they are ingested.
+
+    Rules are indexed by ``(device_id, tag_id)``; alerts without a tag are
+    kept under ``(device_id, None)`` and apply to every tag of the device.
+    A value is checked against only the rules of its stream, with a
+    compiled predicate each.
+
+    Every rule and tag goes through OK, PENDING (breached for less than
+    ``for_seconds``), FIRING and RESOLVED. The state is shared by workers
+    in Redis: values that may move it are queued as transitions, applied
+    by ``run_transitions`` with a Lua script. Firing, re-notifying and
+    resolving queue notifications, sent to the notification outbox by
+    ``run_publisher``. All of it is off the ingest path.
+
+    Windowed rules check the aggregate of a sliding window per tag
+    instead of the value. Windows are snapshotted to Redis by
+    ``run_snapshotter`` and restored on start.
+
+    Anomaly rules check the z-score of the value against exponentially
+    weighted statistics per tag. Statistics of new rules are backfilled
+    from stored messages when rules are reloaded.
+
+    Windows and statistics are kept by a single process, the owner of a
+    lease in Redis taken by ``run_lease``. Other processes forward the
+    values of those rules to the owner through a Redis stream, with
+    ``run_forwarder``, and the owner reads them with ``run_consumer``.
+    An engine built without a lease owns its windows.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 500,
+        queue_size: int = 10000,
+        is_owner: bool = True,
+    ):
+        self.batch_size = batch_size
+        self.index: Dict[RuleKey, Tuple[Rule, ...]] = {}
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(queue_size)
+        self.transitions: "asyncio.Queue[Transition]" = asyncio.Queue(queue_size)
+        self.sync_seconds = settings.alert_state_sync_seconds
+        self.dropped = 0
+        # Anomaly rules whose statistics weren't backfilled yet.
+        self.unprimed: List[Rule] = []
+        self.is_owner = is_owner
+        # Until when the lease is known to be ours, on the monotonic clock.
+        self.owned_until = 0.0
+        # Values of windowed and anomaly rules waiting to go to the owner.
+        self.forwarded: "asyncio.Queue[Forwarded]" = asyncio.Queue(queue_size)
+        # Last entry of the forwarded values read by the owner.
+        self.values_id = "0-0"
+
+    @property
+    def rule_count(self) -> int:
+        """
+        Count loaded rules.
+
+        :return: number of rules.
+        """
+        return sum(len(rules) for rules in self.index.values())
+
+    def load_rules(self, alerts: Sequence[Alert]) -> None:
+        """
+        Replace the loaded rules.
+
+        States are kept, and windows and anomaly statistics too unless
+        the window or the weighting of the alert changed.
+
+        :param alerts: enabled alerts.
+        """
+        previous = {rule.alert_id: rule for rule in self.rules()}
+        index: Dict[RuleKey, List[Rule]] = {}
+        for alert in alerts:
+            rule = compile_rule(alert)
+            if rule is None:
+                continue
+            old = previous.get(rule.alert_id)
+            if old is not None:
+                rule.states = old.states
+                if old.window == rule.window:
+                    rule.windows = old.windows
+                if old.anomaly == rule.anomaly:
+                    rule.detectors = old.detectors
+            if rule.anomaly is not None and (old is None or old.anomaly != rule.anomaly):
+                self.unprimed.append(rule)
+            index.setdefault((alert.device_id, alert.tag_id), []).append(rule)
+        self.index = {key: tuple(rules) for key, rules in index.items()}
+
+    def rules(self) -> List[Rule]:
+        """
+        List loaded rules.
+
+        :return: rules.
+        """
+        return [rule for rules in self.index.values() for rule in rules]
+
+    async def reload(self, session: AsyncSession) -> int:
+        """
+        Load enabled alerts from the database.
+
+        :param session: database session.
+        :return: number of loaded rules.
+        """
+        alerts = await session.scalars(select(Alert).where(Alert.status == ENABLED))
+        self.load_rules(alerts.all())
+        await self.backfill_detectors(session)
+        return self.rule_count
+
+    async def backfill_detectors(self, session: AsyncSession) -> int:
+        """
+        Feed the latest stored values to the statistics of new anomaly rules.
+
+        Values are scored in one vectorized pass per tag, without
+        notifying, so a new rule doesn't wait ``warmup`` values to start.
+
+        Only the owner keeps statistics, other engines keep the rules
+        unprimed until they own them.
+
+        :param session: database session.
+        :return: number of values fed.
+        """
+        if not self.is_owner:
+            return 0
+        fed = 0
+        unprimed, self.unprimed = self.unprimed, []
+        for rule in unprimed:
+            query = select(Message.tag_id, Message.value).where(
+                Message.device_id == rule.device_id,
+            )
+            if rule.tag_id is not None:
+                query = query.where(Message.tag_id == rule.tag_id)
+            rows = await session.execute(
+                query.order_by(Message.time.desc()).limit(
+                    settings.alert_anomaly_backfill_samples,
+                ),
+            )
+            values: Dict[Optional[int], List[float]] = {}
+            for tag_id, value in reversed(rows.all()):
+                values.setdefault(tag_id, []).append(value)
+            for tag_id, tag_values in values.items():
+                detector = rule.detectors.setdefault(tag_id, Ewma())
+                detector.score_many(np.array(tag_values), rule.anomaly)  # type: ignore[arg-type]
+                fed += len(tag_values)
+        return fed
+
+    def evaluate(
+        self,
+        device_id: int,
+        tag_id: Optional[int],
+        value: Optional[float],
+        timestamp: Optional[float] = None,
+        stateful_only: bool = False,
+    ) -> int:
+        """
+        Check a value against the rules of its stream.
+
+        Windowed and anomaly rules are skipped when the engine doesn't own
+        them, the value is forwarded to the owner instead.
+
+        :param device_id: device the value was sent by.
+        :param tag_id: tag the value belongs to.
+        :param value: value, skipped when missing.
+        :param timestamp: unix time of the value, now when missing.
+        :param stateful_only: check only windowed and anomaly rules, for
+            values forwarded by other engines.
+        :return: number of queued transitions.
+        """
+        if value is None:
+            return 0
+        index = self.index
+        now = timestamp or time.time()
+        queued = 0
+        forward = False
+        for key in ((device_id, tag_id), (device_id, None)):
+            for rule in index.get(key, ()):
+                stateful = rule.window is not None or rule.anomaly is not None
+                if stateful and not self.is_owner:
+                    forward = True
+                    continue
+                if stateful_only and not stateful:
+                    continue
+                subject = value
+                if rule.window is not None:
+                    window = rule.windows.get(tag_id)
+                    if window is None:
+                        window = rule.windows[tag_id] = SlidingWindow(rule.window)
+                    subject = window.push(now, value)
+                elif rule.anomaly is not None:
+                    detector = rule.detectors.get(tag_id)
+                    if detector is None:
+                        detector = rule.detectors[tag_id] = Ewma()
+                    subject = detector.score(value, rule.anomaly)
+                breached = rule.predicate(subject)
+                if not breached and not rule.clear(subject):
+                    continue
+                state = rule.states.get(tag_id)
+                if state is None:
+                    state = rule.states[tag_id] = LocalState()
+                if state.observe(
+                    breached,
+                    now,
+                    rule.for_seconds,
+                    rule.renotify_seconds,
+                    self.sync_seconds,
+                ):
+                    queued += self._transition(rule, tag_id, breached, now, subject)
+        if forward:
+            self._forward(device_id, tag_id, value, now)
+        return queued
+
+    def evaluate_rows(self, rows: Sequence[Dict[str, Any]]) -> int:
+        """
+        Check message rows, e.g. a batch copied from the reader.
+
+        :param rows: column values of messages, oldest first.
+        :return: number of queued transitions.
+        """
+        return sum(
+            self.evaluate(
+                row["device_id"],
+                row.get("tag_id"),
+                row.get("value"),
+                row.get("time"),
+            )
+            for row in rows
+        )
+
+    async def publish_pending(
+        self,
+        redis: Redis,
+        rows: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """
+        Move queued notifications to the notification outbox.
+
+        :param redis: redis client.
+        :param rows: notifications already taken from the queue.
+        :return: number of published notifications.
+        """
+        rows = rows or []
+        while len(rows) < self.batch_size and not self.queue.empty():
+            rows.append(self.queue.get_nowait())
+        if rows:
+            await publish_notifications(redis, rows)
+        return len(rows)
+
+    async def run_publisher(self, redis_pool: ConnectionPool) -> None:
+        """
+        Publish queued notifications forever, in batches.
+
+        :param redis_pool: redis connection pool.
+        """
+        while True:  # noqa: WPS457
+            rows = [await self.queue.get()]
+            try:
+                async with Redis(connection_pool=redis_pool) as redis:
+                    await self.publish_pending(redis, rows)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Publishing alert notifications failed")
+
+    async def forward_pending(
+        self,
+        redis: Redis,
+        rows: Optional[List[Forwarded]] = None,
+    ) -> int:
+        """
+        Send queued values of windowed and anomaly rules to the owner.
+
+        A batch is a single stream entry.
+
+        :param redis: redis client.
+        :param rows: values already taken from the queue.
+        :return: number of forwarded values.
+        """
+        rows = rows or []
+        while len(rows) < self.batch_size and not self.forwarded.empty():
+            rows.append(self.forwarded.get_nowait())
+        if rows:
+            await redis.xadd(
+                VALUES_STREAM,
+                {"values": orjson.dumps(rows)},
+                maxlen=settings.alert_values_stream_maxlen,
+                approximate=True,
+            )
+        return len(rows)
+
+    async def run_forwarder(self, redis_pool: ConnectionPool) -> None:
+        """
+        Forward queued values forever, in batches.
+
+        :param redis_pool: redis connection pool.
+        """
+        while True:  # noqa: WPS457
+            rows = [await self.forwarded.get()]
+            try:
+                async with Redis(connection_pool=redis_pool) as redis:
+                    await self.forward_pending(redis, rows)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Forwarding alert values failed")
+
+    async def consume_values(
+        self,
+        redis: Redis,
+        block: Optional[int] = None,
+    ) -> int:
+        """
+        Check values forwarded by other engines against the owned rules.
+
+        :param redis: redis client.
+        :param block: how long to wait for values in milliseconds.
+        :return: number of checked values.
+        """
+        streams = await redis.xread(
+            {VALUES_STREAM: self.values_id},
+            count=self.batch_size,
+            block=block,
+        )
+        checked = 0
+        for _, entries in streams:
+            for entry_id, fields in entries:
+                self.values_id = entry_id
+                for device_id, tag_id, value, timestamp in orjson.loads(
+                    fields[b"values"],
+                ):
+                    self.evaluate(
+                        device_id,
+                        tag_id,
+                        value,
+                        timestamp,
+                        stateful_only=True,
+                    )
+                    checked += 1
+        return checked
+
+    async def run_consumer(self, redis_pool: ConnectionPool, block: float) -> None:
+        """
+        Check forwarded values forever, while the engine is the owner.
+
+        :param redis_pool: redis connection pool.
+        :param block: longest wait for values in seconds.
+        """
+        while True:  # noqa: WPS457
+            if not self.is_owner:
+                await asyncio.sleep(block)
+                continue
+            try:
+                async with Redis(connection_pool=redis_pool) as redis:
+                    await self.consume_values(redis, block=int(block * 1000))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reading forwarded alert values failed")
+                await asyncio.sleep(block)
+
+    async def claim(self, redis: Redis, token: str, ttl: float) -> bool:
+        """
+        Take or extend the lease on windows and anomaly statistics.
+
+        A new owner restores the windows, reads forwarded values from the
+        newest one on, and backfills anomaly statistics on the next
+        reload. A former owner forgets its windows and statistics.
+
+        :param redis: redis client.
+        :param token: name of this process.
+        :param ttl: lifetime of the lease in seconds.
+        :return: whether the engine is the owner.
+        """
+        script = redis.register_script(LEASE_SCRIPT)
+        owned = bool(await script(keys=[OWNER_KEY], args=[token, int(ttl * 1000)]))
+        if owned:
+            self.owned_until = time.monotonic() + ttl
+            if not self.is_owner:
+                self.is_owner = True
+                await self.restore_windows(redis)
+                self.unprimed = [
+                    rule for rule in self.rules() if rule.anomaly is not None
+                ]
+                newest = await redis.xrevrange(VALUES_STREAM, count=1)
+                self.values_id = newest[0][0] if newest else "0-0"
+                logger.info("Alert windows are evaluated by {}", token)
+        elif self.is_owner:
+            self.disown()
+        return owned
+
+    async def release(self, redis: Redis, token: str) -> None:
+        """
+        Give the lease up, so another process owns the windows at once.
+
+        :param redis: redis client.
+        :param token: name of this process.
+        """
+        script = redis.register_script(RELEASE_SCRIPT)
+        await script(keys=[OWNER_KEY], args=[token])
+        self.disown()
+
+    def disown(self) -> None:
+        """Stop keeping windows and anomaly statistics."""
+        if self.is_owner:
+            logger.warning("Alert windows are no longer evaluated here")
+        self.is_owner = False
+        self.unprimed = []
+        for rule in self.rules():
+            rule.windows = {}
+            rule.detectors = {}
+
+    async def run_lease(
+        self,
+        redis_pool: ConnectionPool,
+        token: str,
+        ttl: float,
+    ) -> None:
+        """
+        Take or extend the lease forever, three times per lifetime.
+
+        :param redis_pool: redis connection pool.
+        :param token: name of this process.
+        :param ttl: lifetime of the lease in seconds.
+        """
+        while True:  # noqa: WPS457
+            try:
+                async with Redis(connection_pool=redis_pool) as redis:
+                    await self.claim(redis, token, ttl)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Renewing the alert windows lease failed")
+                if self.is_owner and time.monotonic() > self.owned_until:
+                    self.disown()
+            await asyncio.sleep(ttl / 3)
+
+    async def run_reloader(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+    ) -> None:
+        """
+        Reload rules forever, so alert changes are picked up.
+
+        :param session_factory: factory of database sessions.
+        :param interval: pause between reloads in seconds.
+        """
+        while True:  # noqa: WPS457
+            try:
+                async with session_factory() as session:
+                    await self.reload(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reloading alert rules failed")
+            await asyncio.sleep(interval)
+
+    async def apply_transitions(
+        self,
+        redis: Redis,
+        transitions: Optional[List[Transition]] = None,
+    ) -> int:
+        """
+        Run queued transitions in Redis, in one pipeline.
+
+        :param redis: redis client.
+        :param transitions: transitions already taken from the queue.
+        :return: number of queued notifications.
+        """
+        transitions = transitions or []
+        while len(transitions) < self.batch_size and not self.transitions.empty():
+            transitions.append(self.transitions.get_nowait())
+        if not transitions:
+            return 0
+        script = redis.register_script(TRANSITION_SCRIPT)
+        async with redis.pipeline(transaction=False) as pipe:
+            for rule, tag_id, breached, now, _ in transitions:
+                await script(
+                    keys=[STATE_KEY_PREFIX + _rule_field(rule, tag_id)],
+                    args=[
+                        int(breached),
+                        repr(now),
+                        rule.for_seconds,
+                        rule.renotify_seconds or 0,
+                        int(settings.alert_state_ttl_seconds),
+                    ],
+                    client=pipe,
+                )
+            results = await pipe.execute()
+        notified = 0
+        for (rule, tag_id, _, now, subject), result in zip(transitions, results):
+            state, since, last_notified, notify = result
+            state = state.decode()
+            local = rule.states.setdefault(tag_id, LocalState())
+            local.update(state, float(since), float(last_notified), now)
+            if notify:
+                notified += self._enqueue(rule, state, subject)
+        return notified
+
+    async def run_transitions(self, redis_pool: ConnectionPool) -> None:
+        """
+        Apply queued transitions forever, in batches.
+
+        :param redis_pool: redis connection pool.
+        """
+        while True:  # noqa: WPS457
+            transitions = [await self.transitions.get()]
+            try:
+                async with Redis(connection_pool=redis_pool) as redis:
+                    await self.apply_transitions(redis, transitions)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Applying alert transitions failed")
+
+    async def save_windows(self, redis: Redis) -> int:
+        """
+        Snapshot windows that changed since the last save to Redis.
+
+        :param redis: redis client.
+        :return: number of saved windows.
+        """
+        snapshots = {}
+        for rule in self.rules():
+            for tag_id, window in rule.windows.items():
+                if window.dirty:
+                    window.dirty = False
+                    snapshots[_rule_field(rule, tag_id)] = orjson.dumps(
+                        window.snapshot(),
+                    )
+        if snapshots:
+            await redis.hset(WINDOWS_KEY, mapping=snapshots)
+        return len(snapshots)
+
+    async def restore_windows(self, redis: Redis) -> int:
+        """
+        Rebuild windows of the loaded rules from the Redis snapshots.
+
+        Snapshots of deleted alerts are removed.
+
+        :param redis: redis client.
+        :return: number of restored windows.
+        """
+        snapshots = await redis.hgetall(WINDOWS_KEY)
+        windowed = {}
+        for rule in self.rules():
+            if rule.window is not None:
+                windowed[str(rule.alert_id)] = rule
+        stale = []
+        restored = 0
+        for key, samples in snapshots.items():
+            alert_id, _, tag = key.decode().partition(":")
+            rule = windowed.get(alert_id)
+            if rule is None:
+                stale.append(key)
+                continue
+            tag_id = None if tag == "*" else int(tag)
+            rule.windows[tag_id] = SlidingWindow.restore(
+                rule.window,  # type: ignore[arg-type]
+                orjson.loads(samples),
+            )
+            restored += 1
+        if stale:
+            await redis.hdel(WINDOWS_KEY, *stale)
+        return restored
+
+    async def run_snapshotter(
+        self,
+        redis_pool: ConnectionPool,
+        interval: float,
+    ) -> None:
+        """
+        Snapshot changed windows forever.
+
+        :param redis_pool: redis connection pool.
+        :param interval: pause between snapshots in seconds.
+        """
+        while True:  # noqa: WPS457
+            await asyncio.sleep(interval)
+            try:
+                async with Redis(connection_pool=redis_pool) as redis:
+                    await self.save_windows(redis)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Saving alert windows failed")
+
+    def _transition(
+        self,
+        rule: Rule,
+        tag_id: Optional[int],
+        breached: bool,
+        now: float,
+        subject: float,
+    ) -> int:
+        try:
+            self.transitions.put_nowait((rule, tag_id, breached, now, subject))
+        except asyncio.QueueFull:
+            # Forget the state, the next value syncs it again.
+            rule.states.pop(tag_id, None)
+            logger.warning("Alert transition queue is full, dropped {}", rule.name)
+            return 0
+        return 1
+
+    def _forward(
+        self,
+        device_id: int,
+        tag_id: Optional[int],
+        value: float,
+        now: float,
+    ) -> None:
+        try:
+            self.forwarded.put_nowait((device_id, tag_id, value, now))
+        except asyncio.QueueFull:
+            logger.warning("Alert forwarding queue is full, dropped a value")
+
+    def _enqueue(self, rule: Rule, state: str, subject: float) -> int:
+        if state == RESOLVED:
+            message = f"{rule.name}: resolved, {subject:g} is not {rule.description}"
+        else:
+            message = f"{rule.name}: {subject:g} is {rule.description}"
+        try:
+            self.queue.put_nowait(
+                {
+                    "message": message,
+                    "level": NOTIFICATION_LEVELS[state],
+                    "check_id": rule.check_id,
+                    "notification_endpoint_id": ENGINE_ENDPOINT,
+                    "notification_rule_id": rule.rule_id,
+                    "alert_id": rule.alert_id,
+                    "device_id": rule.device_id,
+                    "user_id": rule.user_id,
+                },
+            )
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("Alert notification queue is full, dropped {}", rule.name)
+            return 0
+        return 1
+
+
+def _rule_field(rule: Rule, tag_id: Optional[int]) -> str:
+    return f"{rule.alert_id}:{'*' if tag_id is None else tag_id}"
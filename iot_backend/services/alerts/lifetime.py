@@ -0,0 +1,112 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import FastAPI
+from redis.asyncio import Redis
+
+from iot_backend.services.alerts.engine import AlertEngine
+from iot_backend.settings import settings
+
+
+async def init_alert_engine(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Loads alert rules and starts writing notifications in the background.
+
+    Windows and anomaly statistics are kept by one process only, the one
+    holding the lease, every other process forwards their values to it.
+
+    :param app: current fastapi application.
+    """
+    app.state.alert_engine = None
+    app.state.alert_engine_tasks = []
+    if not settings.alert_engine_enabled:
+        return
+    engine = AlertEngine(
+        batch_size=settings.alert_notification_batch_size,
+        queue_size=settings.alert_notification_queue_size,
+        is_owner=False,
+    )
+    token = f"{socket.gethostname()}:{os.getpid()}"
+    lease = settings.alert_owner_lease_seconds
+    async with app.state.db_session_factory() as session:
+        await engine.reload(session)
+        async with Redis(connection_pool=app.state.redis_pool) as redis:
+            await engine.claim(redis, token, lease)
+        await engine.backfill_detectors(session)
+    app.state.alert_engine = engine
+    app.state.alert_engine_token = token
+    app.state.alert_engine_tasks = [
+        asyncio.create_task(engine.run_transitions(app.state.redis_pool)),
+        asyncio.create_task(engine.run_publisher(app.state.redis_pool)),
+        asyncio.create_task(engine.run_forwarder(app.state.redis_pool)),
+        asyncio.create_task(engine.run_lease(app.state.redis_pool, token, lease)),
+        asyncio.create_task(engine.run_consumer(app.state.redis_pool, block=1)),
+        asyncio.create_task(
+            engine.run_reloader(
+                app.state.db_session_factory,
+                interval=settings.alert_rules_reload_seconds,
+            ),
+        ),
+        asyncio.create_task(
+            engine.run_snapshotter(
+                app.state.redis_pool,
+                interval=settings.alert_window_snapshot_seconds,
+            ),
+        ),
+    ]
+
+
+async def shutdown_alert_engine(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops the alert engine, applying transitions, publishing notifications
+    and forwarding values still queued, then saving windows and giving
+    the lease up.
+
+    :param app: current FastAPI app.
+    """
+    for task in app.state.alert_engine_tasks:
+        task.cancel()
+    await asyncio.gather(*app.state.alert_engine_tasks, return_exceptions=True)
+    engine = app.state.alert_engine
+    if engine is None:
+        return
+    async with Redis(connection_pool=app.state.redis_pool) as redis:
+        while not engine.transitions.empty():
+            await engine.apply_transitions(redis)
+        while await engine.publish_pending(redis):
+            pass  # noqa: WPS420
+        while await engine.forward_pending(redis):
+            pass  # noqa: WPS420
+        if engine.is_owner:
+            await engine.save_windows(redis)
+            await engine.release(redis, app.state.alert_engine_token)
+
+
+def init_backtest_pool(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the process pool replaying alert backtests.
+
+    Workers are spawned, not forked, so they don't inherit the event loop
+    and connections of the application.
+
+    :param app: current fastapi application.
+    """
+    app.state.backtest_pool = None
+    if settings.backtest_workers > 0:
+        app.state.backtest_pool = ProcessPoolExecutor(
+            max_workers=settings.backtest_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+
+def shutdown_backtest_pool(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops the backtest workers.
+
+    :param app: current FastAPI app.
+    """
+    if app.state.backtest_pool is not None:
+        app.state.backtest_pool.shutdown(cancel_futures=True)
@@ -0,0 +1,130 @@
+from typing import Optional
+
+OK = "OK"
+PENDING = "PENDING"
+FIRING = "FIRING"
+RESOLVED = "RESOLVED"
+# Nothing known yet, the first observation is sent to Redis.
+UNKNOWN = "UNKNOWN"
+
+# Moves the state of one alert and tag, kept in a hash, on a breach or a
+# clear. Returns the new state, since when it holds, when it was last
+# notified and whether to notify now. Numbers go back as strings, Redis
+# would truncate Lua numbers to integers. Every run extends the life of
+# the hash, so states of deleted alerts and silent tags expire.
+TRANSITION_SCRIPT = """
+local key = KEYS[1]
+local breached = ARGV[1] == "1"
+local now = tonumber(ARGV[2])
+local for_seconds = tonumber(ARGV[3])
+local renotify_seconds = tonumber(ARGV[4])
+local stored = redis.call("HMGET", key, "state", "since", "notified")
+local state = stored[1] or "OK"
+local since = tonumber(stored[2]) or now
+local notified = tonumber(stored[3]) or 0
+local notify = 0
+if breached then
+    if state == "OK" or state == "RESOLVED" then
+        state = "PENDING"
+        since = now
+    end
+    if state == "PENDING" and now - since >= for_seconds then
+        state = "FIRING"
+        since = now
+        notified = now
+        notify = 1
+    elseif state == "FIRING" and renotify_seconds > 0
+            and now - notified >= renotify_seconds then
+        notified = now
+        notify = 1
+    end
+elseif state == "PENDING" then
+    state = "OK"
+    since = now
+elseif state == "FIRING" then
+    state = "RESOLVED"
+    since = now
+    notified = now
+    notify = 1
+end
+redis.call("HSET", key, "state", state, "since", since, "notified", notified)
+redis.call("EXPIRE", key, ARGV[5])
+return {state, tostring(since), tostring(notified), notify}
+"""
+
+
+class LocalState:
+    """
+    What a worker knows about the state of one alert and tag.
+
+    The state itself lives in Redis and every worker moves it with
+    ``TRANSITION_SCRIPT``. A worker only runs the script when its copy
+    says that a value may change the state, so values repeating the
+    current condition cost no round trip. The copy is updated right away,
+    then replaced by the outcome of the script, and trusted for
+    ``sync_seconds`` at most as other workers may move the state too.
+    """
+
+    __slots__ = ("state", "since", "notified", "synced")
+
+    def __init__(self) -> None:
+        self.state = UNKNOWN
+        self.since = 0.0
+        self.notified = 0.0
+        self.synced = 0.0
+
+    def observe(
+        self,
+        breached: bool,
+        now: float,
+        for_seconds: float,
+        renotify_seconds: Optional[float],
+        sync_seconds: float,
+    ) -> bool:
+        """
+        Record a value breaching or clearing the alert.
+
+        :param breached: whether the value breaches the alert.
+        :param now: time of the value.
+        :param for_seconds: how long a breach lasts before firing.
+        :param renotify_seconds: pause between notifications while firing.
+        :param sync_seconds: how long the copy is trusted.
+        :return: whether to run the transition in Redis.
+        """
+        state = self.state
+        send = now - self.synced >= sync_seconds
+        if send:
+            self.synced = now
+        if breached:
+            if state in {OK, RESOLVED, UNKNOWN}:
+                self.state = FIRING if for_seconds <= 0 else PENDING
+                self.since = now
+                return True
+            if state == PENDING and now - self.since >= for_seconds:
+                self.state = FIRING
+                return True
+            if (
+                state == FIRING
+                and renotify_seconds
+                and now - self.notified >= renotify_seconds
+            ):
+                self.notified = now
+                return True
+        elif state in {PENDING, FIRING, UNKNOWN}:
+            self.state = RESOLVED if state == FIRING else OK
+            return True
+        return send
+
+    def update(self, state: str, since: float, notified: float, now: float) -> None:
+        """
+        Replace the copy with the state stored in Redis.
+
+        :param state: state.
+        :param since: when the state was entered.
+        :param notified: when the alert was last notified.
+        :param now: time of the transition.
+        """
+        self.state = state
+        self.since = since
+        self.notified = notified
+        self.synced = max(self.synced, now)
@@ -0,0 +1,125 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Sequence, Tuple
+
+WINDOW_FUNCTIONS = ("mean", "min", "max", "count", "rate")
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """Aggregate of an alert over its last seconds and/or samples."""
+
+    function: str
+    seconds: Optional[float]
+    samples: int
+
+
+class SlidingWindow:
+    """
+    Incremental aggregate of the last values of one stream.
+
+    Samples are kept oldest first, with a running sum for the mean, and
+    for min and max a monotonic deque whose head is the extreme of the
+    window, so every push is amortized O(1). The window never holds more
+    than ``spec.samples`` values, which bounds its memory.
+    """
+
+    __slots__ = ("spec", "values", "sum", "extremes", "sequence", "dirty")
+
+    def __init__(self, spec: WindowSpec):
+        self.spec = spec
+        # (sequence, time, value) of every sample in the window.
+        self.values: Deque[Tuple[int, float, float]] = deque()
+        self.sum = 0.0
+        # (sequence, value) with values increasing (min) or decreasing (max).
+        self.extremes: Deque[Tuple[int, float]] = deque()
+        self.sequence = 0
+        self.dirty = False
+
+    def push(self, timestamp: float, value: float) -> float:
+        """
+        Add a value and get the new aggregate.
+
+        :param timestamp: unix time of the value.
+        :param value: value.
+        :return: aggregate of the window.
+        """
+        spec = self.spec
+        values = self.values
+        extremes = self.extremes
+        self.sequence += 1
+        values.append((self.sequence, timestamp, value))
+        self.sum += value
+        if spec.function == "min":
+            while extremes and extremes[-1][1] >= value:
+                extremes.pop()
+            extremes.append((self.sequence, value))
+        elif spec.function == "max":
+            while extremes and extremes[-1][1] <= value:
+                extremes.pop()
+            extremes.append((self.sequence, value))
+        while len(values) > spec.samples:
+            self._evict()
+        if spec.seconds is not None:
+            start = timestamp - spec.seconds
+            while values and values[0][1] <= start:
+                self._evict()
+        self.dirty = True
+        return self.aggregate()
+
+    def aggregate(self) -> float:
+        """
+        Compute the aggregate of the window from the kept state.
+
+        :return: aggregate, 0 for an empty window.
+        """
+        values = self.values
+        if not values:
+            return 0.0
+        function = self.spec.function
+        if function == "mean":
+            return self.sum / len(values)
+        if function in {"min", "max"}:
+            return self.extremes[0][1]
+        if function == "count":
+            return float(len(values))
+        elapsed = values[-1][1] - values[0][1]
+        if elapsed <= 0:
+            return 0.0
+        return (values[-1][2] - values[0][2]) / elapsed
+
+    def snapshot(self) -> List[Tuple[float, float]]:
+        """
+        Get the samples of the window, enough to rebuild it.
+
+        :return: (time, value) pairs, oldest first.
+        """
+        return [(timestamp, value) for _, timestamp, value in self.values]
+
+    @classmethod
+    def restore(
+        cls,
+        spec: WindowSpec,
+        samples: Sequence[Sequence[float]],
+    ) -> "SlidingWindow":
+        """
+        Rebuild a window from a snapshot.
+
+        :param spec: spec of the window.
+        :param samples: (time, value) pairs, oldest first.
+        :return: window.
+        """
+        window = cls(spec)
+        for timestamp, value in samples:
+            window.push(timestamp, value)
+        window.dirty = False
+        return window
+
+    def _evict(self) -> None:
+        sequence, _, value = self.values.popleft()
+        self.sum -= value
+        if self.extremes and self.extremes[0][0] == sequence:
+            self.extremes.popleft()
+        if not self.values:
+            # Don't carry rounding errors of the running sum over.
+            self.sum = 0.0
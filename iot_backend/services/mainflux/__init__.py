@@ -1,4 +1,7 @@
+from .circuit_breaker import CircuitBreaker, MainfluxUnavailableError
 from .mainflux_service import (
+    call_mainflux,
+    mainflux_breaker,
     get_users_api,
     get_channels_api,
     get_things_api,
@@ -0,0 +1,305 @@
+import math
+import threading
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Any, Callable, Deque, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+from prometheus_client import Gauge
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+
+from iot_backend.settings import settings
+
+ResultType = TypeVar("ResultType")
+
+BREAKER_STATE = Gauge(
+    "mainflux_circuit_breaker_state",
+    "Circuit breaker state (0 - closed, 1 - half-open, 2 - open).",
+    ["breaker"],
+    multiprocess_mode="liveall",
+)
+BREAKER_ERROR_RATE = Gauge(
+    "mainflux_circuit_breaker_error_rate",
+    "Share of failed calls in the breaker rolling window.",
+    ["breaker"],
+    multiprocess_mode="liveall",
+)
+BREAKER_TIMEOUT = Gauge(
+    "mainflux_circuit_breaker_timeout_seconds",
+    "Adaptive request timeout currently applied to upstream calls.",
+    ["breaker"],
+    multiprocess_mode="liveall",
+)
+
+
+class BreakerState(IntEnum):
+    """Possible circuit breaker states."""
+
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class MainfluxUnavailableError(HTTPException):
+    """Raised instead of calling Mainflux while the breaker is open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Mainflux is temporarily unavailable.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Decide whether an exception means that the upstream is unhealthy.
+
+    Client errors (4xx) are answers from a healthy service and
+    must not trip the breaker.
+
+    Args:
+        exc (BaseException): exception raised by the call.
+
+    Returns:
+        bool: True if the exception should be counted as a failure.
+    """
+    if isinstance(exc, (Urllib3HTTPError, TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(exc, "status", None)
+    return status_code is None or status_code == 0 or status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with rolling error-rate and latency windows.
+
+    Outcomes of the calls made during the last ``window_seconds`` are kept
+    in a deque. The breaker opens when there are at least ``min_calls``
+    in the window and either the error rate or the slow call rate exceeds
+    its limit. While open, calls fail fast with a 503 and a Retry-After
+    header. After ``open_seconds`` the breaker lets ``half_open_probes``
+    calls through: a single failure opens it again, and when all of them
+    succeed it closes.
+
+    The request timeout adapts to the observed latency: it is the 95th
+    percentile of successful calls in the window multiplied by
+    ``timeout_factor``, clamped between ``timeout_min`` and ``timeout_max``.
+    """
+
+    def __init__(  # noqa: WPS211
+        self,
+        name: str,
+        window_seconds: float,
+        min_calls: int,
+        error_rate: float,
+        slow_call_seconds: float,
+        slow_call_rate: float,
+        open_seconds: float,
+        half_open_probes: int,
+        timeout_min: float,
+        timeout_max: float,
+        timeout_factor: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.timeout_min = timeout_min
+        self.timeout_max = timeout_max
+        self.timeout_factor = timeout_factor
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (finished_at, failed, duration)
+        self._calls: Deque[Tuple[float, bool, float]] = deque()
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probes_succeeded = 0
+        self._export_metrics()
+
+    @classmethod
+    def from_settings(cls, name: str) -> "CircuitBreaker":
+        """
+        Build a breaker configured from application settings.
+
+        Args:
+            name (str): name used in metric labels.
+
+        Returns:
+            CircuitBreaker: new breaker instance.
+        """
+        return cls(
+            name=name,
+            window_seconds=settings.mainflux_breaker_window_seconds,
+            min_calls=settings.mainflux_breaker_min_calls,
+            error_rate=settings.mainflux_breaker_error_rate,
+            slow_call_seconds=settings.mainflux_breaker_slow_call_seconds,
+            slow_call_rate=settings.mainflux_breaker_slow_call_rate,
+            open_seconds=settings.mainflux_breaker_open_seconds,
+            half_open_probes=settings.mainflux_breaker_half_open_probes,
+            timeout_min=settings.mainflux_timeout_min_seconds,
+            timeout_max=settings.mainflux_timeout_max_seconds,
+        )
+
+    @property
+    def state(self) -> BreakerState:
+        """
+        Current state, moving from OPEN to HALF_OPEN once the cool-down ends.
+
+        Returns:
+            BreakerState: state of the breaker.
+        """
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    @property
+    def timeout(self) -> float:
+        """
+        Adaptive timeout for the next upstream call.
+
+        Returns:
+            float: timeout in seconds.
+        """
+        with self._lock:
+            return self._timeout()
+
+    def before_call(self) -> None:
+        """
+        Reserve a slot for a call or fail fast.
+
+        Raises:
+            MainfluxUnavailableError: if the breaker is open or all
+                half-open probe slots are taken.
+        """
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == BreakerState.OPEN:
+                raise MainfluxUnavailableError(self._retry_after())
+            if self._state == BreakerState.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    raise MainfluxUnavailableError(self.open_seconds)
+                self._probes_in_flight += 1
+
+    def record(self, failed: bool, duration: float) -> None:
+        """
+        Record the outcome of a call made after :meth:`before_call`.
+
+        Args:
+            failed (bool): whether the upstream failed.
+            duration (float): call duration in seconds.
+        """
+        with self._lock:
+            now = self._clock()
+            if self._state == BreakerState.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                if failed:
+                    self._open(now)
+                else:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self.half_open_probes:
+                        self._close()
+                self._export_metrics()
+                return
+            self._calls.append((now, failed, duration))
+            self._evict(now)
+            if self._state == BreakerState.CLOSED and self._should_open():
+                self._open(now)
+            self._export_metrics()
+
+    def call(
+        self,
+        func: Callable[..., ResultType],
+        *args: Any,
+        **kwargs: Any,
+    ) -> ResultType:
+        """
+        Call ``func`` through the breaker with the adaptive timeout.
+
+        The timeout is passed as ``_request_timeout``, which is understood
+        by every method of the generated Mainflux client.
+
+        Args:
+            func (Callable): upstream call.
+            args (Any): positional arguments for ``func``.
+            kwargs (Any): keyword arguments for ``func``.
+
+        Returns:
+            ResultType: whatever ``func`` returns.
+        """
+        self.before_call()
+        kwargs.setdefault("_request_timeout", self.timeout)
+        started = self._clock()
+        try:
+            response = func(*args, **kwargs)
+        except Exception as exc:
+            self.record(is_upstream_failure(exc), self._clock() - started)
+            raise
+        self.record(False, self._clock() - started)
+        return response
+
+    def _maybe_half_open(self) -> None:
+        if self._state != BreakerState.OPEN:
+            return
+        if self._clock() - self._opened_at >= self.open_seconds:
+            self._state = BreakerState.HALF_OPEN
+            self._probes_in_flight = 0
+            self._probes_succeeded = 0
+            self._export_metrics()
+
+    def _retry_after(self) -> float:
+        return self.open_seconds - (self._clock() - self._opened_at)
+
+    def _evict(self, now: float) -> None:
+        horizon = now - self.window_seconds
+        while self._calls and self._calls[0][0] < horizon:
+            self._calls.popleft()
+
+    def _rates(self) -> Tuple[float, float]:
+        total = len(self._calls)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        slow = sum(
+            1 for _, _, duration in self._calls
+            if duration >= self.slow_call_seconds
+        )
+        return failures / total, slow / total
+
+    def _should_open(self) -> bool:
+        if len(self._calls) < self.min_calls:
+            return False
+        error_rate, slow_rate = self._rates()
+        return error_rate >= self.error_rate or slow_rate >= self.slow_call_rate
+
+    def _open(self, now: float) -> None:
+        self._state = BreakerState.OPEN
+        self._opened_at = now
+        self._probes_in_flight = 0
+        self._probes_succeeded = 0
+
+    def _close(self) -> None:
+        self._state = BreakerState.CLOSED
+        self._calls.clear()
+
+    def _timeout(self) -> float:
+        durations = sorted(
+            duration for _, failed, duration in self._calls if not failed
+        )
+        if not durations:
+            return self.timeout_max
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        adaptive = p95 * self.timeout_factor
+        return min(self.timeout_max, max(self.timeout_min, adaptive))
+
+    def _export_metrics(self) -> None:
+        BREAKER_STATE.labels(self.name).set(int(self._state))
+        BREAKER_ERROR_RATE.labels(self.name).set(self._rates()[0])
+        BREAKER_TIMEOUT.labels(self.name).set(self._timeout())
@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import FastAPI
+
+from iot_backend.services.mainflux.mainflux_service import get_reader_api
+from iot_backend.services.mainflux.sync import MainfluxSyncWorker
+from iot_backend.settings import settings
+
+
+def init_mainflux_sync(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts the Mainflux reader sync in the background.
+
+    :param app: current fastapi application.
+    """
+    app.state.mainflux_sync_task = None
+    if not settings.mainflux_sync_enabled:
+        return
+    worker = MainfluxSyncWorker(
+        reader=get_reader_api(settings.mainflux_token),
+        batch_size=settings.mainflux_sync_batch_size,
+        alert_engine=app.state.alert_engine,
+    )
+    app.state.mainflux_sync_task = asyncio.create_task(
+        worker.run(
+            app.state.db_session_factory,
+            interval=settings.mainflux_sync_interval_seconds,
+        ),
+    )
+
+
+async def shutdown_mainflux_sync(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops the Mainflux reader sync.
+
+    :param app: current FastAPI app.
+    """
+    task = app.state.mainflux_sync_task
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass  # noqa: WPS420
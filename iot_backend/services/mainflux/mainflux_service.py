@@ -1,3 +1,5 @@
+from typing import Any, Callable, TypeVar
+
 from fastapi import HTTPException, status
 from mainflux_client import (
     Configuration,
@@ -7,8 +9,35 @@ from mainflux_client import (
     MessagesApi,
     UsersApi
     )
+from iot_backend.services.mainflux.circuit_breaker import CircuitBreaker
 from iot_backend.settings import settings
 
+ResultType = TypeVar("ResultType")
+
+mainflux_breaker = CircuitBreaker.from_settings("mainflux")
+
+
+def call_mainflux(
+    func: Callable[..., ResultType],
+    *args: Any,
+    **kwargs: Any,
+) -> ResultType:
+    """
+    Call a Mainflux client method through the circuit breaker.
+
+    Args:
+        func (Callable): bound method of one of the Mainflux APIs.
+        args (Any): positional arguments for the method.
+        kwargs (Any): keyword arguments for the method.
+
+    Returns:
+        ResultType: the method's result.
+
+    Raises:
+        MainfluxUnavailableError: if the breaker is open.
+    """
+    return mainflux_breaker.call(func, *args, **kwargs)
+
 
 def get_mainflux_config(
     access_token: str = None, thing_secret: str = None, port: int = None
@@ -149,7 +178,7 @@ def get_channel_id(uuid: str = None, name: str = None) -> str:
 
     channel_name = f"actions_{uuid}" if uuid else name
     channels_api = get_channels_api(access_token=settings.mainflux_token)
-    channels = channels_api.channels_get(name=channel_name).channels
+    channels = call_mainflux(channels_api.channels_get, name=channel_name).channels
     if len(channels) == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No channels Found")
     return channels[0].id
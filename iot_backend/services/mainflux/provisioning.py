@@ -0,0 +1,424 @@
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.device_dao import DeviceDAO
+from iot_backend.db.dao.ownership_dao import OwnershipDAO
+from iot_backend.services.mainflux.mainflux_service import (
+    call_mainflux,
+    get_channels_api,
+    get_things_api,
+)
+from iot_backend.settings import settings
+from iot_backend.web.api.devices.schema import (
+    ProvisionDeviceDTO,
+    ProvisionManifestDTO,
+    ProvisionResultDTO,
+    ProvisionStatus,
+)
+from iot_backend.web.api.tags.schema import TagInputDTO
+
+# Namespace of device UUIDs derived from (user, manifest key).
+PROVISIONING_NAMESPACE = uuid.UUID("93ab08c7-4395-485f-b870-16a4ab11144d")
+
+
+def device_uuid(user_id: uuid.UUID, key: str) -> uuid.UUID:
+    """
+    Get the stable UUID of a manifest device.
+
+    Args:
+        user_id (UUID): owner of the device.
+        key (str): manifest key of the device.
+
+    Returns:
+        UUID: device UUID, the same for every run of the manifest.
+    """
+    return uuid.uuid5(PROVISIONING_NAMESPACE, f"{user_id}/{key}")
+
+
+def tag_name(device: uuid.UUID, template: str) -> str:
+    """
+    Get the name of a tag created from a template.
+
+    Tag names are unique across users, so they are built from the device
+    UUID rather than the manifest key, which other users may share.
+
+    Args:
+        device (UUID): stable UUID of the device.
+        template (str): name of the tag template.
+
+    Returns:
+        str: tag name.
+    """
+    return f"{device}.{template}"
+
+
+def _mainflux_error(exc: Exception) -> str:
+    if isinstance(exc, HTTPException):
+        return f"Mainflux error: {exc.detail}"
+    return f"Mainflux error: {exc}"
+
+
+def _stored_thing(device: Any) -> Optional[Dict[str, str]]:
+    if device.mainflux_thing_uuid is None or device.mainflux_thing_secret is None:
+        return None
+    return {
+        "id": str(device.mainflux_thing_uuid),
+        "key": str(device.mainflux_thing_secret),
+    }
+
+
+def _field(obj: Any, name: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+@dataclass
+class PendingDevice:
+    """A provisioned device whose thing or channels are missing or not connected."""
+
+    key: str
+    device_id: int
+    device_uuid: uuid.UUID
+    thing: Optional[Dict[str, str]] = None
+    # Whether the thing is connected to every channel that already exists.
+    is_configured: bool = False
+    channels: Dict[str, Optional[str]] = field(default_factory=dict)
+    tag_ids: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class ChunkResult:
+    """Things and channels created in Mainflux for one chunk of devices."""
+
+    devices: List[PendingDevice]
+    things: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    channels: Dict[str, str] = field(default_factory=dict)
+    connect_errors: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+class DeviceProvisioner:
+    """
+    Creates devices, tags and their Mainflux things from a manifest.
+
+    Database rows are written with a handful of set-based statements
+    and committed before Mainflux is called. Devices without a thing are
+    then split into chunks; every chunk is created in Mainflux with bulk
+    calls, chunks run concurrently up to ``concurrency`` at a time, and
+    each finished chunk is written back and committed on its own.
+
+    Device UUIDs are derived from the owner and the manifest key, so
+    sending the same manifest again skips what already exists and only
+    retries the failed parts.
+    """
+
+    def __init__(
+        self,
+        things_api: Any,
+        channels_api: Any,
+        concurrency: int = 8,
+        chunk_size: int = 50,
+    ):
+        self.things_api = things_api
+        self.channels_api = channels_api
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_settings(cls) -> "DeviceProvisioner":
+        """
+        Build a provisioner talking to the configured Mainflux.
+
+        Returns:
+            DeviceProvisioner: provisioner instance.
+        """
+        return cls(
+            things_api=get_things_api(settings.mainflux_token),
+            channels_api=get_channels_api(settings.mainflux_token),
+            concurrency=settings.mainflux_provisioning_concurrency,
+            chunk_size=settings.mainflux_provisioning_chunk_size,
+        )
+
+    async def provision(
+        self,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        org_id: Optional[int],
+        manifest: ProvisionManifestDTO,
+    ) -> List[ProvisionResultDTO]:
+        """
+        Provision every device of the manifest.
+
+        Args:
+            session (AsyncSession): database session.
+            user_id (UUID): owner of the devices.
+            org_id (Optional[int]): organization of the devices.
+            manifest (ProvisionManifestDTO): devices and tag templates.
+
+        Returns:
+            List[ProvisionResultDTO]: outcome of every device, in input order.
+        """
+        # tag_dao imports the tags API package, which imports tag_dao back.
+        from iot_backend.db.dao.tag_dao import TagDAO  # noqa: WPS433
+
+        results = {
+            item.key: ProvisionResultDTO(key=item.key, status=ProvisionStatus.FAILED)
+            for item in manifest.devices
+        }
+        items = await self._validate(session, user_id, manifest, results)
+        uuids = {item.key: device_uuid(user_id, item.key) for item in items}
+
+        device_dao = DeviceDAO(session)
+        created = await device_dao.bulk_insert(
+            [
+                {
+                    "uuid": uuids[item.key],
+                    "name": item.name or item.key,
+                    "type": item.type.value,
+                    "meta_data": item.meta_data,
+                    "user_id": user_id,
+                    "org_id": org_id,
+                }
+                for item in items
+            ],
+        )
+        rows = {row.uuid: row for row in await device_dao.get_by_uuids(uuids.values())}
+        ids = {key: rows[value].id for key, value in uuids.items()}
+
+        parents = []
+        for item in items:
+            row = rows[uuids[item.key]]
+            parent_id = ids[item.parent_key] if item.parent_key else item.parent_id
+            if parent_id is not None and row.parent_id != parent_id:
+                parents.append({"id": row.id, "parent_id": parent_id})
+            result = results[item.key]
+            result.device_id = row.id
+            result.mainflux_thing_uuid = row.mainflux_thing_uuid
+            result.status = (
+                ProvisionStatus.CREATED
+                if uuids[item.key] in created
+                else ProvisionStatus.EXISTS
+            )
+        await device_dao.bulk_update(parents)
+
+        tag_dao = TagDAO(session)
+        await tag_dao.create_tags(
+            user_id=user_id,
+            tags=[
+                TagInputDTO(
+                    name=tag_name(uuids[item.key], template),
+                    device_id=ids[item.key],
+                    **manifest.tag_templates[template].model_dump(),
+                )
+                for item in items
+                for template in item.tags
+            ],
+        )
+        pending = {
+            item.key: PendingDevice(
+                key=item.key,
+                device_id=ids[item.key],
+                device_uuid=uuids[item.key],
+                thing=_stored_thing(rows[uuids[item.key]]),
+                is_configured=rows[uuids[item.key]].is_configured,
+            )
+            for item in items
+        }
+        by_id = {device.device_id: device for device in pending.values()}
+        for tag in await tag_dao.get_device_tags(by_id):
+            device = by_id[tag.device_id]
+            results[device.key].tags += 1
+            channel = tag.mainflux_channel_uuid
+            device.channels[tag.name] = str(channel) if channel else None
+            device.tag_ids[tag.name] = tag.id
+        for item in items:
+            device = pending[item.key]
+            # Created or not, a tag of the device must now carry the name.
+            taken = sorted(
+                template
+                for template in item.tags
+                if tag_name(device.device_uuid, template) not in device.tag_ids
+            )
+            if taken:
+                results[item.key].detail = f"Tag names already taken: {taken}."
+        # Devices whose thing is missing or wasn't connected on a past run,
+        # or with new tags that have no channel yet.
+        missing = [
+            device
+            for device in pending.values()
+            if not device.is_configured or None in device.channels.values()
+        ]
+        await session.commit()
+
+        if manifest.create_things:
+            await self._create_things(session, tag_dao, missing, results)
+        return [results[item.key] for item in manifest.devices]
+
+    async def _validate(
+        self,
+        session: AsyncSession,
+        user_id: uuid.UUID,
+        manifest: ProvisionManifestDTO,
+        results: Dict[str, ProvisionResultDTO],
+    ) -> List[ProvisionDeviceDTO]:
+        by_key: Dict[str, ProvisionDeviceDTO] = {}
+        errors: Dict[str, str] = {}
+        for item in manifest.devices:
+            if item.key in by_key:
+                errors[item.key] = "Duplicate device key."
+            by_key[item.key] = item
+        owners = await OwnershipDAO(session).get_device_owners(
+            item.parent_id for item in manifest.devices if item.parent_id is not None
+        )
+        for item in manifest.devices:
+            unknown = sorted(set(item.tags) - manifest.tag_templates.keys())
+            if unknown:
+                errors.setdefault(item.key, f"Unknown tag templates: {unknown}.")
+            if item.parent_key and item.parent_key not in by_key:
+                errors.setdefault(item.key, "Parent key is not in the manifest.")
+            if item.parent_id is not None and owners.get(item.parent_id) != user_id:
+                errors.setdefault(item.key, "Parent device not found.")
+        for item in manifest.devices:
+            # A device can't be created when any of its ancestors can't.
+            seen = {item.key}
+            parent = by_key.get(item.parent_key or "")
+            while parent is not None and item.key not in errors:
+                if parent.key in seen:
+                    errors[item.key] = "Parent keys form a cycle."
+                elif parent.key in errors:
+                    errors[item.key] = f"Parent {parent.key} can't be provisioned."
+                seen.add(parent.key)
+                parent = by_key.get(parent.parent_key or "")
+        for key, detail in errors.items():
+            results[key].detail = detail
+        return [item for key, item in by_key.items() if key not in errors]
+
+    async def _create_things(
+        self,
+        session: AsyncSession,
+        tag_dao: Any,
+        devices: List[PendingDevice],
+        results: Dict[str, ProvisionResultDTO],
+    ) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def create(chunk: List[PendingDevice]) -> ChunkResult:  # noqa: WPS430
+            async with semaphore:
+                return await run_in_threadpool(self._create_chunk, chunk)
+
+        chunks = [
+            devices[start : start + self.chunk_size]
+            for start in range(0, len(devices), self.chunk_size)
+        ]
+        device_dao = DeviceDAO(session)
+        for task in asyncio.as_completed([create(chunk) for chunk in chunks]):
+            chunk_result = await task
+            device_rows = []
+            tag_rows = []
+            for device in chunk_result.devices:
+                tag_rows.extend(
+                    {
+                        "id": device.tag_ids[name],
+                        "mainflux_channel_uuid": uuid.UUID(
+                            chunk_result.channels[name],
+                        ),
+                    }
+                    for name, channel in device.channels.items()
+                    if channel is None and name in chunk_result.channels
+                )
+                thing = chunk_result.things.get(str(device.device_uuid))
+                if thing is None:
+                    results[device.key].status = ProvisionStatus.FAILED
+                    results[device.key].detail = (
+                        chunk_result.error or "Mainflux thing was not created."
+                    )
+                    continue
+                # The thing is stored even when connecting it failed, so a
+                # rerun connects it instead of creating another one.
+                connect_error = chunk_result.connect_errors.get(
+                    str(device.device_uuid),
+                )
+                if connect_error is None and chunk_result.error is not None:
+                    connect_error = chunk_result.error
+                device_rows.append(
+                    {
+                        "id": device.device_id,
+                        "mainflux_thing_uuid": uuid.UUID(thing["id"]),
+                        "mainflux_thing_secret": uuid.UUID(thing["key"]),
+                        "is_configured": connect_error is None,
+                    },
+                )
+                results[device.key].mainflux_thing_uuid = uuid.UUID(thing["id"])
+                if connect_error is not None:
+                    results[device.key].status = ProvisionStatus.FAILED
+                    results[device.key].detail = (
+                        f"Thing created but not connected. {connect_error}"
+                    )
+            await device_dao.bulk_update(device_rows)
+            await tag_dao.bulk_update(tag_rows)
+            await session.commit()
+
+    def _create_chunk(self, devices: List[PendingDevice]) -> ChunkResult:
+        result = ChunkResult(devices=devices)
+        try:
+            new_channels = [
+                {"name": name, "metadata": {"tag_id": device.tag_ids[name]}}
+                for device in devices
+                for name, channel in device.channels.items()
+                if channel is None
+            ]
+            if new_channels:
+                response = call_mainflux(
+                    self.channels_api.channels_bulk_post,
+                    new_channels,
+                )
+                for channel in _field(response, "channels") or []:
+                    result.channels[_field(channel, "name")] = _field(channel, "id")
+            for device in devices:
+                if device.thing is not None:
+                    result.things[str(device.device_uuid)] = device.thing
+            new_things = [
+                {
+                    "name": str(device.device_uuid),
+                    "metadata": {"device_id": device.device_id},
+                }
+                for device in devices
+                if device.thing is None
+            ]
+            if new_things:
+                response = call_mainflux(self.things_api.things_bulk_post, new_things)
+                # Recorded at once: things exist in Mainflux from now on.
+                for thing in _field(response, "things") or []:
+                    result.things[_field(thing, "name")] = {
+                        "id": _field(thing, "id"),
+                        "key": _field(thing, "key"),
+                    }
+        except Exception as exc:
+            result.error = _mainflux_error(exc)
+            return result
+        for device in devices:
+            thing = result.things.get(str(device.device_uuid))
+            # A configured thing is only connected to its new channels.
+            channel_ids = [
+                channel or result.channels.get(name)
+                for name, channel in device.channels.items()
+                if not (device.is_configured and channel)
+            ]
+            channel_ids = [channel for channel in channel_ids if channel]
+            if thing is None or not channel_ids:
+                continue
+            try:
+                call_mainflux(
+                    self.things_api.connect_post,
+                    {"channel_ids": channel_ids, "thing_ids": [thing["id"]]},
+                )
+            except Exception as exc:
+                result.connect_errors[str(device.device_uuid)] = _mainflux_error(exc)
+        return result
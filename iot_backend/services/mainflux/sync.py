@@ -0,0 +1,333 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from iot_backend.db.dao.message_dao import MessageDAO
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.sync_watermark import MainfluxSyncWatermark
+from iot_backend.db.models.tag import Tag
+from iot_backend.services.alerts.engine import AlertEngine
+from iot_backend.services.mainflux.mainflux_service import call_mainflux
+
+# How many times a batch is re-read when new messages shift reader offsets.
+MAX_SHIFT_RETRIES = 3
+
+
+@dataclass(frozen=True)
+class SyncTarget:
+    """A reader stream (channel, publisher) and the rows it belongs to."""
+
+    channel_id: str
+    publisher: str
+    tag_id: int
+    device_id: int
+    user_id: Optional[UUID]
+
+
+def _as_dict(message: Any) -> Dict[str, Any]:
+    if isinstance(message, dict):
+        return message
+    if hasattr(message, "to_dict"):
+        return message.to_dict()
+    return vars(message)
+
+
+def message_row(target: SyncTarget, message: Any) -> Dict[str, Any]:
+    """
+    Map a normalized SenML message from the reader to a messages row.
+
+    Mainflux resolves base values while normalizing, so the base columns
+    are filled with neutral values.
+
+    Args:
+        target (SyncTarget): stream the message was read from.
+        message (Any): reader message (client model or dict).
+
+    Returns:
+        Dict[str, Any]: column values for the messages table.
+    """
+    data = _as_dict(message)
+    return {
+        "channel_id": target.channel_id,
+        "publisher": target.publisher,
+        "protocol": data.get("protocol") or "http",
+        "subtopic": data.get("subtopic"),
+        "base_name": "",
+        "base_unit": "",
+        "base_value": 0.0,
+        "base_time": 0,
+        "name": data.get("name") or "",
+        "unit": data.get("unit") or "",
+        "value": float(data.get("value") or 0),
+        "time": int(data.get("time") or 0),
+        "string_value": data.get("string_value"),
+        "bool_value": data.get("bool_value"),
+        "data_value": data.get("data_value"),
+        "sum_value": data.get("sum"),
+        "device_id": target.device_id,
+        "tag_id": target.tag_id,
+        "user_id": target.user_id,
+    }
+
+
+class MainfluxSyncWorker:
+    """
+    Copies messages from the Mainflux reader into the local messages table.
+
+    The reader returns messages newest first with a ``total`` count,
+    so for every stream we persist how many messages were already copied
+    (the watermark). New messages are the first ``total - synced_count``
+    offsets; they are copied oldest first in batches, and every batch is
+    inserted in the same transaction that advances the watermark, which
+    makes the job safe to restart at any point. Committed batches are
+    evaluated by the alert engine, when one is given.
+
+    When the reader drops old messages (retention, deletes) its total
+    falls below the watermark, and the copied messages are found again
+    by the time of the newest one.
+
+    The reader is called outside of any transaction. The watermark row is
+    then locked with ``FOR UPDATE SKIP LOCKED`` only to insert a batch and
+    advance it, and a batch is dropped when another worker moved the
+    watermark meanwhile, so several workers can run the job without
+    copying a stream twice.
+    """
+
+    def __init__(
+        self,
+        reader: Any,
+        batch_size: int = 100,
+        alert_engine: Optional[AlertEngine] = None,
+    ):
+        self.reader = reader
+        self.batch_size = batch_size
+        self.alert_engine = alert_engine
+
+    async def get_targets(self, session: AsyncSession) -> List[SyncTarget]:
+        """
+        List streams to synchronize: tags with a channel on devices with a thing.
+
+        Args:
+            session (AsyncSession): database session.
+
+        Returns:
+            List[SyncTarget]: streams to copy.
+        """
+        rows = await session.execute(
+            select(
+                Tag.mainflux_channel_uuid,
+                Device.mainflux_thing_uuid,
+                Tag.id,
+                Device.id,
+                Tag.user_id,
+            )
+            .join(Device, Tag.device_id == Device.id)
+            .where(Tag.mainflux_channel_uuid.is_not(None))
+            .where(Device.mainflux_thing_uuid.is_not(None)),
+        )
+        return [
+            SyncTarget(
+                channel_id=str(channel_id),
+                publisher=str(publisher),
+                tag_id=tag_id,
+                device_id=device_id,
+                user_id=user_id,
+            )
+            for channel_id, publisher, tag_id, device_id, user_id in rows
+        ]
+
+    async def sync_once(self, session: AsyncSession) -> int:
+        """
+        Copy all pending messages of every stream.
+
+        Args:
+            session (AsyncSession): database session.
+
+        Returns:
+            int: number of copied messages.
+        """
+        copied = 0
+        for target in await self.get_targets(session):
+            copied += await self.sync_stream(session, target)
+        return copied
+
+    async def sync_stream(self, session: AsyncSession, target: SyncTarget) -> int:
+        """
+        Copy pending messages of a single stream.
+
+        Args:
+            session (AsyncSession): database session.
+            target (SyncTarget): stream to copy.
+
+        Returns:
+            int: number of copied messages.
+        """
+        message_dao = MessageDAO(session)
+        copied = 0
+        retries = 0
+        while retries <= MAX_SHIFT_RETRIES:
+            stored = await self._get_watermark(session, target)
+            synced_count, last_time = stored
+            head = await self._read(target, offset=0, limit=1)
+            if head.total < synced_count:
+                newer = await self._count_newer(target, last_time, head.total)
+                if newer is None:
+                    retries += 1
+                    continue
+                logger.warning(
+                    "Mainflux reader dropped messages of {}/{}, resyncing by time",
+                    target.channel_id,
+                    target.publisher,
+                )
+                synced_count = head.total - newer
+            pending = head.total - synced_count
+            if pending <= 0:
+                break
+            size = min(pending, self.batch_size)
+            page = await self._read(target, offset=pending - size, limit=size)
+            if page.total != head.total:
+                # New messages arrived between the reads and shifted offsets.
+                retries += 1
+                continue
+            messages = [_as_dict(message) for message in reversed(page.messages)]
+            if not messages:
+                break
+            watermark = await self._lock_watermark(session, target)
+            if watermark is None:
+                # Another worker is copying this stream right now.
+                await session.rollback()
+                break
+            if (watermark.synced_count, watermark.last_time) != stored:
+                # Another worker advanced the watermark since it was read.
+                await session.rollback()
+                retries += 1
+                continue
+            rows = [message_row(target, message) for message in messages]
+            await message_dao.bulk_create(rows)
+            watermark.synced_count = head.total - pending + len(rows)
+            # Reader times, not the truncated row times, so messages later
+            # in the same second aren't taken as newer on a resync.
+            watermark.last_time = max(
+                float(message.get("time") or 0) for message in messages
+            )
+            await session.commit()
+            if self.alert_engine is not None:
+                self.alert_engine.evaluate_rows(rows)
+            copied += len(rows)
+            retries = 0
+        return copied
+
+    async def run(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+    ) -> None:
+        """
+        Synchronize forever, sleeping ``interval`` seconds between rounds.
+
+        Args:
+            session_factory (async_sessionmaker): factory of database sessions.
+            interval (float): pause between rounds in seconds.
+        """
+        while True:  # noqa: WPS457
+            try:
+                async with session_factory() as session:
+                    copied = await self.sync_once(session)
+                if copied:
+                    logger.info("Copied {} messages from Mainflux reader", copied)
+            except asyncio.CancelledError:
+                raise
+            except HTTPException as exc:
+                logger.warning("Mainflux sync skipped: {}", exc.detail)
+            except Exception:
+                logger.exception("Mainflux sync failed")
+            await asyncio.sleep(interval)
+
+    async def _get_watermark(
+        self,
+        session: AsyncSession,
+        target: SyncTarget,
+    ) -> Tuple[int, Optional[float]]:
+        await session.execute(
+            insert(MainfluxSyncWatermark)
+            .values(
+                channel_id=target.channel_id,
+                publisher=target.publisher,
+                synced_count=0,
+            )
+            .on_conflict_do_nothing(index_elements=["channel_id", "publisher"]),
+        )
+        row = await session.execute(
+            select(MainfluxSyncWatermark.synced_count, MainfluxSyncWatermark.last_time)
+            .where(MainfluxSyncWatermark.channel_id == target.channel_id)
+            .where(MainfluxSyncWatermark.publisher == target.publisher),
+        )
+        synced_count, last_time = row.one()
+        # No transaction stays open while the reader is called.
+        await session.commit()
+        return synced_count, last_time
+
+    async def _lock_watermark(
+        self,
+        session: AsyncSession,
+        target: SyncTarget,
+    ) -> Optional[MainfluxSyncWatermark]:
+        rows = await session.scalars(
+            select(MainfluxSyncWatermark)
+            .where(MainfluxSyncWatermark.channel_id == target.channel_id)
+            .where(MainfluxSyncWatermark.publisher == target.publisher)
+            .with_for_update(skip_locked=True)
+            .execution_options(populate_existing=True),
+        )
+        return rows.one_or_none()
+
+    async def _count_newer(
+        self,
+        target: SyncTarget,
+        last_time: Optional[float],
+        total: int,
+    ) -> Optional[int]:
+        """
+        Count the newest messages of a stream that were not copied yet.
+
+        Args:
+            target (SyncTarget): stream to read.
+            last_time (Optional[float]): time of the newest copied message.
+            total (int): number of messages in the stream.
+
+        Returns:
+            Optional[int]: number of messages newer than ``last_time``, None
+            when new messages shifted the offsets meanwhile.
+        """
+        if last_time is None:
+            return total
+        newer = 0
+        while newer < total:
+            page = await self._read(target, offset=newer, limit=self.batch_size)
+            if page.total != total:
+                return None
+            for message in page.messages:
+                if float(_as_dict(message).get("time") or 0) <= last_time:
+                    return newer
+                newer += 1
+            if not page.messages:
+                break
+        return newer
+
+    async def _read(self, target: SyncTarget, offset: int, limit: int) -> Any:
+        return await run_in_threadpool(
+            call_mainflux,
+            self.reader.channels_chan_id_messages_get,
+            chan_id=target.channel_id,
+            publisher=target.publisher,
+            offset=offset,
+            limit=limit,
+        )
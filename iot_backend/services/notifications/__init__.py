@@ -0,0 +1,2 @@
+"""Storage and delivery of notifications."""
+from .outbox import publish_notifications
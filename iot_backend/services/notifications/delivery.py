@@ -0,0 +1,213 @@
+import asyncio
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import httpx
+import orjson
+from loguru import logger
+
+from iot_backend.settings import settings
+
+
+class DeliveryError(Exception):
+    """A notification couldn't be delivered to an endpoint."""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TokenBucket:
+    """Rate limiter allowing ``rate`` calls per second, in bursts of ``burst``."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Wait for a token and take it."""
+        while True:  # noqa: WPS457
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Endpoint(ABC):
+    """
+    Destination of notifications.
+
+    Every endpoint limits its own concurrency and rate, so a slow or
+    strict endpoint doesn't hold back the others.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.semaphore = asyncio.Semaphore(settings.notification_endpoint_concurrency)
+        self.bucket = TokenBucket(
+            settings.notification_endpoint_rate,
+            settings.notification_endpoint_burst,
+        )
+
+    @abstractmethod
+    async def send(self, notification: Dict[str, Any]) -> None:
+        """
+        Send one notification.
+
+        :param notification: notification as stored.
+        :raises DeliveryError: if the endpoint didn't accept it.
+        """
+
+
+class WebhookEndpoint(Endpoint):
+    """Posts notifications as JSON to a URL."""
+
+    def __init__(self, name: str, url: str, client: httpx.AsyncClient):
+        super().__init__(name)
+        self.url = url
+        self.client = client
+
+    async def send(self, notification: Dict[str, Any]) -> None:
+        """
+        Post one notification.
+
+        Timeouts, connection errors, 429 and 5xx responses are retried,
+        other error responses are not.
+
+        :param notification: notification as stored.
+        :raises DeliveryError: if the endpoint didn't accept it.
+        """
+        try:
+            response = await self.client.post(
+                self.url,
+                content=orjson.dumps(notification),
+                headers={"Content-Type": "application/json"},
+            )
+        except httpx.HTTPError as exc:
+            raise DeliveryError(f"{type(exc).__name__}: {exc}") from exc
+        if response.status_code == 429 or response.status_code >= 500:
+            raise DeliveryError(f"status {response.status_code}")
+        if response.status_code >= 400:
+            raise DeliveryError(f"status {response.status_code}", retryable=False)
+
+
+class EmailEndpoint(Endpoint):
+    """Stand-in for email delivery until an SMTP service is configured."""
+
+    def __init__(self, name: str, address: str):
+        super().__init__(name)
+        self.address = address
+
+    async def send(self, notification: Dict[str, Any]) -> None:
+        """
+        Log the email that would be sent.
+
+        :param notification: notification as stored.
+        """
+        logger.info(
+            "Email to {}: [{}] {}",
+            self.address,
+            notification["level"],
+            notification["message"],
+        )
+
+
+def build_endpoints(
+    config: Mapping[str, str],
+    client: httpx.AsyncClient,
+) -> List[Endpoint]:
+    """
+    Build endpoints from their configuration.
+
+    :param config: names of the endpoints and their ``http(s)://`` URL or
+        ``mailto:`` address.
+    :param client: HTTP client of the webhooks.
+    :return: endpoints.
+    :raises ValueError: for an unknown kind of endpoint.
+    """
+    endpoints: List[Endpoint] = []
+    for name, target in config.items():
+        if target.startswith("mailto:"):
+            endpoints.append(EmailEndpoint(name, target.removeprefix("mailto:")))
+        elif target.startswith(("http://", "https://")):
+            endpoints.append(WebhookEndpoint(name, target, client))
+        else:
+            raise ValueError(f"Unknown notification endpoint {name}: {target}")
+    return endpoints
+
+
+class Dispatcher:
+    """Delivers notifications to every endpoint, with retries and backoff."""
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        attempts: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+        max_backoff_seconds: Optional[float] = None,
+    ):
+        self.endpoints = endpoints
+        self.attempts = attempts or settings.notification_delivery_attempts
+        self.backoff_seconds = (
+            settings.notification_retry_base_seconds
+            if backoff_seconds is None
+            else backoff_seconds
+        )
+        self.max_backoff_seconds = (
+            max_backoff_seconds or settings.notification_retry_max_seconds
+        )
+
+    async def dispatch(self, notifications: Sequence[Dict[str, Any]]) -> int:
+        """
+        Deliver notifications to all endpoints concurrently.
+
+        :param notifications: notifications as stored.
+        :return: number of failed deliveries.
+        """
+        delivered = await asyncio.gather(
+            *(
+                self.deliver(endpoint, notification)
+                for notification in notifications
+                for endpoint in self.endpoints
+            ),
+        )
+        return delivered.count(False)
+
+    async def deliver(self, endpoint: Endpoint, notification: Dict[str, Any]) -> bool:
+        """
+        Deliver one notification to one endpoint.
+
+        Failed attempts are retried after an exponential backoff with full
+        jitter, so endpoints coming back aren't hit by every retry at once.
+
+        :param endpoint: endpoint.
+        :param notification: notification as stored.
+        :return: whether it was delivered.
+        """
+        for attempt in range(self.attempts):
+            async with endpoint.semaphore:
+                await endpoint.bucket.acquire()
+                try:
+                    await endpoint.send(notification)
+                except DeliveryError as exc:
+                    error = exc
+                else:
+                    return True
+            if not error.retryable or attempt + 1 == self.attempts:
+                break
+            backoff = min(self.max_backoff_seconds, self.backoff_seconds * 2**attempt)
+            await asyncio.sleep(random.uniform(0, backoff))
+        logger.warning(
+            "Notification {} not delivered to {}: {}",
+            notification["uuid"],
+            endpoint.name,
+            error,
+        )
+        return False
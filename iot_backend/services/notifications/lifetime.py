@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from iot_backend.services.notifications.delivery import Dispatcher, build_endpoints
+from iot_backend.services.notifications.worker import NotificationWorker
+from iot_backend.settings import settings
+
+
+def init_notification_worker(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Starts storing and delivering notifications in the background.
+
+    :param app: current fastapi application.
+    """
+    app.state.notification_task = None
+    app.state.notification_client = httpx.AsyncClient(
+        timeout=settings.notification_webhook_timeout_seconds,
+    )
+    if not settings.notification_worker_enabled:
+        return
+    worker = NotificationWorker(
+        Dispatcher(
+            build_endpoints(
+                settings.notification_endpoints,
+                app.state.notification_client,
+            ),
+        ),
+        batch_size=settings.notification_batch_size,
+    )
+    app.state.notification_worker = worker
+    app.state.notification_task = asyncio.create_task(
+        worker.run(app.state.redis_pool, app.state.db_session_factory),
+    )
+
+
+async def shutdown_notification_worker(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops the notification worker after running deliveries.
+
+    Notifications still in the outbox are handled on the next start.
+
+    :param app: current FastAPI app.
+    """
+    task = app.state.notification_task
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass  # noqa: WPS420
+        await app.state.notification_worker.drain()
+    await app.state.notification_client.aclose()
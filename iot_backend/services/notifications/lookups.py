@@ -0,0 +1,132 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Generic, Hashable, Iterable, Optional, Tuple, TypeVar
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.loaders import get_loaders
+from iot_backend.settings import settings
+
+ValueType = TypeVar("ValueType")
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class AlertTarget:
+    """What a notification needs from its alert."""
+
+    alert_id: int
+    user_id: Optional[UUID]
+
+
+class LookupCache(Generic[ValueType]):
+    """
+    Process-wide cache of lookups by key, with expiry and a size bound.
+
+    Misses are cached too, so a burst of events from an unknown thing
+    doesn't query the database for every request.
+    """
+
+    def __init__(self, ttl: float, size: int):
+        self.ttl = ttl
+        self.size = size
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Get a cached value.
+
+        :param key: key.
+        :return: value, None for a cached miss, or ``_MISSING``.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return _MISSING
+        return entry[1]
+
+    def set(self, key: Hashable, value: Optional[ValueType]) -> None:
+        """
+        Cache a value.
+
+        :param key: key.
+        :param value: value, None for a miss.
+        """
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every value."""
+        self._entries.clear()
+
+
+device_ids: LookupCache[int] = LookupCache(
+    settings.notification_lookup_cache_seconds,
+    settings.notification_lookup_cache_size,
+)
+alert_targets: LookupCache[AlertTarget] = LookupCache(
+    settings.notification_lookup_cache_seconds,
+    settings.notification_lookup_cache_size,
+)
+
+
+async def resolve_devices(
+    session: AsyncSession,
+    thing_uuids: Iterable[UUID],
+) -> Dict[UUID, Optional[int]]:
+    """
+    Get device IDs by Mainflux thing UUID.
+
+    Keys not cached are read with a single query.
+
+    :param session: database session.
+    :param thing_uuids: thing UUIDs.
+    :return: device ID, or None for an unknown thing, of every UUID.
+    """
+    resolved: Dict[UUID, Optional[int]] = {}
+    missing = []
+    for thing_uuid in set(thing_uuids):
+        cached = device_ids.get(thing_uuid)
+        if cached is _MISSING:
+            missing.append(thing_uuid)
+        else:
+            resolved[thing_uuid] = cached
+    loader = get_loaders(session).device("mainflux_thing_uuid")
+    for thing_uuid, device in zip(missing, await loader.load_many(missing)):
+        resolved[thing_uuid] = device.id if device is not None else None
+        device_ids.set(thing_uuid, resolved[thing_uuid])
+    return resolved
+
+
+async def resolve_alerts(
+    session: AsyncSession,
+    check_ids: Iterable[str],
+) -> Dict[str, Optional[AlertTarget]]:
+    """
+    Get alerts by external check ID.
+
+    Keys not cached are read with a single query.
+
+    :param session: database session.
+    :param check_ids: check IDs.
+    :return: alert, or None for an unknown check, of every check ID.
+    """
+    resolved: Dict[str, Optional[AlertTarget]] = {}
+    missing = []
+    for check_id in set(check_ids):
+        cached = alert_targets.get(check_id)
+        if cached is _MISSING:
+            missing.append(check_id)
+        else:
+            resolved[check_id] = cached
+    loader = get_loaders(session).alert("check_external_id")
+    for check_id, alert in zip(missing, await loader.load_many(missing)):
+        target = None
+        if alert is not None:
+            target = AlertTarget(alert_id=alert.id, user_id=alert.user_id)
+        resolved[check_id] = target
+        alert_targets.set(check_id, target)
+    return resolved
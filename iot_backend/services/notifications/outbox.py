@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Sequence, Tuple
+from uuid import UUID, uuid4
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import ResponseError
+
+from iot_backend.settings import settings
+
+# Redis stream of notifications waiting to be stored and delivered.
+OUTBOX_STREAM = "notifications:outbox"
+OUTBOX_GROUP = "notification-workers"
+# Redis stream of notifications that couldn't be stored, with the error.
+DEAD_LETTER_STREAM = "notifications:dead"
+_FIELD = b"notification"
+
+Entry = Tuple[bytes, Dict[str, Any]]
+# Entry that couldn't be stored, with the error.
+DeadEntry = Tuple[bytes, Dict[str, Any], str]
+
+
+async def publish_notifications(
+    redis: Redis,
+    notifications: Sequence[Dict[str, Any]],
+) -> List[UUID]:
+    """
+    Add notifications to the outbox, in one round trip.
+
+    Every notification without a UUID gets one here, so a notification
+    handled twice after a worker crash is still stored once.
+
+    :param redis: redis client.
+    :param notifications: column values of the notifications.
+    :return: UUIDs of the notifications.
+    """
+    uuids = []
+    async with redis.pipeline(transaction=False) as pipe:
+        for notification in notifications:
+            notification = {"uuid": uuid4(), **notification}
+            uuids.append(notification["uuid"])
+            # str() covers UUID subclasses, e.g. asyncpg's.
+            payload = orjson.dumps(notification, default=str)
+            pipe.xadd(OUTBOX_STREAM, {_FIELD: payload})
+        await pipe.execute()
+    return uuids
+
+
+async def create_group(redis: Redis) -> None:
+    """
+    Create the consumer group of the workers, once.
+
+    :param redis: redis client.
+    """
+    try:
+        await redis.xgroup_create(OUTBOX_STREAM, OUTBOX_GROUP, id="0", mkstream=True)
+    except ResponseError as exc:
+        if "BUSYGROUP" not in str(exc):
+            raise
+
+
+def decode_entry(entry_id: bytes, fields: Dict[bytes, bytes]) -> Entry:
+    """
+    Decode an outbox entry to notification column values.
+
+    :param entry_id: stream ID of the entry.
+    :param fields: fields of the entry.
+    :return: stream ID and column values.
+    """
+    notification = orjson.loads(fields[_FIELD])
+    notification["uuid"] = UUID(notification["uuid"])
+    if notification.get("user_id"):
+        notification["user_id"] = UUID(notification["user_id"])
+    return entry_id, notification
+
+
+async def read_entries(
+    redis: Redis,
+    consumer: str,
+    count: int,
+    block_ms: int,
+    claim_idle_ms: int,
+) -> List[Entry]:
+    """
+    Read entries for a worker.
+
+    Entries a crashed worker read but never acknowledged are claimed
+    first, then new entries are read.
+
+    :param redis: redis client.
+    :param consumer: name of the worker in the group.
+    :param count: most entries to read.
+    :param block_ms: how long to wait for new entries, 0 doesn't wait.
+    :param claim_idle_ms: how long an entry stays with a silent worker.
+    :return: entries, oldest first.
+    """
+    _, claimed, *_ = await redis.xautoclaim(
+        OUTBOX_STREAM,
+        OUTBOX_GROUP,
+        consumer,
+        min_idle_time=claim_idle_ms,
+        count=count,
+    )
+    if not claimed:
+        streams = await redis.xreadgroup(
+            OUTBOX_GROUP,
+            consumer,
+            {OUTBOX_STREAM: ">"},
+            count=count,
+            block=block_ms or None,
+        )
+        claimed = streams[0][1] if streams else []
+    return [decode_entry(entry_id, fields) for entry_id, fields in claimed if fields]
+
+
+async def refresh_entries(
+    redis: Redis,
+    consumer: str,
+    entry_ids: Sequence[bytes],
+) -> None:
+    """
+    Reset the idle time of entries still being handled by a worker.
+
+    Entries being delivered for longer than the claim idle time would
+    otherwise be claimed, and delivered again, by another worker.
+
+    :param redis: redis client.
+    :param consumer: name of the worker in the group.
+    :param entry_ids: stream IDs of the entries.
+    """
+    if entry_ids:
+        await redis.xclaim(
+            OUTBOX_STREAM,
+            OUTBOX_GROUP,
+            consumer,
+            min_idle_time=0,
+            message_ids=entry_ids,
+            justid=True,
+        )
+
+
+async def acknowledge(redis: Redis, entry_ids: Sequence[bytes]) -> None:
+    """
+    Remove handled entries from the outbox.
+
+    :param redis: redis client.
+    :param entry_ids: stream IDs of the entries.
+    """
+    if entry_ids:
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, *entry_ids)
+            pipe.xdel(OUTBOX_STREAM, *entry_ids)
+            await pipe.execute()
+
+
+async def dead_letter(
+    redis: Redis,
+    entries: Sequence[DeadEntry],
+) -> None:
+    """
+    Move entries that can't be stored out of the outbox.
+
+    They are kept in the dead-letter stream with their error, so they
+    don't hold back the outbox and can still be looked into.
+
+    :param redis: redis client.
+    :param entries: stream IDs, column values and errors of the entries.
+    """
+    if not entries:
+        return
+    async with redis.pipeline(transaction=False) as pipe:
+        for entry_id, notification, error in entries:
+            pipe.xadd(
+                DEAD_LETTER_STREAM,
+                {
+                    _FIELD: orjson.dumps(notification, default=str),
+                    b"error": error,
+                    b"entry_id": entry_id,
+                },
+                maxlen=settings.notification_dead_letter_maxlen,
+                approximate=True,
+            )
+        entry_ids = [entry_id for entry_id, _, _ in entries]
+        pipe.xack(OUTBOX_STREAM, OUTBOX_GROUP, *entry_ids)
+        pipe.xdel(OUTBOX_STREAM, *entry_ids)
+        await pipe.execute()
@@ -0,0 +1,118 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+from uuid import UUID
+
+from redis.asyncio import Redis
+
+from iot_backend.db.dao.notification_dao import NotificationDAO
+from iot_backend.settings import settings
+
+# Hash of the unread counts of a user: "total" and one field per device.
+UNREAD_KEY_PREFIX = "notifications:unread:"
+TOTAL_FIELD = "total"
+
+# Adds deltas to the counts of a user, if they are known. Counts not
+# known yet are built from the database on the next read, so adding to
+# them would count notifications twice.
+ADJUST_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call("HINCRBY", KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+# Stores counts built from the database, unless counts were stored while
+# they were being built, and returns what is stored. Keeping those counts
+# keeps the deltas added to them since.
+REBUILD_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    for i = 2, #ARGV, 2 do
+        redis.call("HSET", KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+    redis.call("EXPIRE", KEYS[1], ARGV[1])
+end
+return redis.call("HGETALL", KEYS[1])
+"""
+
+Owner = Tuple[Optional[UUID], Optional[int]]
+
+
+def unread_key(user_id: UUID) -> str:
+    """
+    Get the key of the unread counts of a user.
+
+    :param user_id: user ID.
+    :return: redis key.
+    """
+    return f"{UNREAD_KEY_PREFIX}{user_id}"
+
+
+async def adjust_unread(redis: Redis, owners: Iterable[Owner], sign: int) -> None:
+    """
+    Count notifications as unread, or as read, in one round trip.
+
+    :param redis: redis client.
+    :param owners: user and device of every notification.
+    :param sign: 1 for new notifications, -1 for read ones.
+    """
+    deltas: Dict[UUID, "Counter[str]"] = defaultdict(Counter)
+    for user_id, device_id in owners:
+        if user_id is None:
+            continue
+        deltas[user_id][TOTAL_FIELD] += sign
+        if device_id is not None:
+            deltas[user_id][str(device_id)] += sign
+    if not deltas:
+        return
+    script = redis.register_script(ADJUST_SCRIPT)
+    async with redis.pipeline(transaction=False) as pipe:
+        for user_id, counts in deltas.items():
+            args = [value for pair in counts.items() for value in pair]
+            await script(keys=[unread_key(user_id)], args=args, client=pipe)
+        await pipe.execute()
+
+
+async def get_unread(
+    redis: Redis,
+    notification_dao: NotificationDAO,
+    user_id: UUID,
+) -> Dict[str, int]:
+    """
+    Get the unread counts of a user.
+
+    Counts are read from Redis. They are built from the database when
+    missing, and expire so drift doesn't last. A notification stored or
+    read while its counts are being built may be left out of them, until
+    they expire.
+
+    :param redis: redis client.
+    :param notification_dao: DAO for notifications, to build the counts.
+    :param user_id: user ID.
+    :return: unread count of every device, and the total.
+    """
+    key = unread_key(user_id)
+    stored = await redis.hgetall(key)
+    if stored:
+        return {field.decode(): int(count) for field, count in stored.items()}
+    by_device = await notification_dao.count_unread(user_id)
+    counts = {
+        str(device_id): count
+        for device_id, count in by_device.items()
+        if device_id is not None
+    }
+    counts[TOTAL_FIELD] = sum(by_device.values())
+    script = redis.register_script(REBUILD_SCRIPT)
+    stored = await script(
+        keys=[key],
+        args=[
+            int(settings.notification_unread_ttl_seconds),
+            *[value for pair in counts.items() for value in pair],
+        ],
+    )
+    return {
+        stored[index].decode(): int(stored[index + 1])
+        for index in range(0, len(stored), 2)
+    }
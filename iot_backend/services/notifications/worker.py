@@ -0,0 +1,183 @@
+import asyncio
+import os
+import socket
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from loguru import logger
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from iot_backend.db.dao.notification_dao import NotificationDAO
+from iot_backend.services.notifications.delivery import Dispatcher
+from iot_backend.services.notifications.outbox import (
+    DeadEntry,
+    Entry,
+    acknowledge,
+    create_group,
+    dead_letter,
+    read_entries,
+    refresh_entries,
+)
+from iot_backend.services.notifications.unread import adjust_unread
+from iot_backend.settings import settings
+
+
+class NotificationWorker:
+    """
+    Stores and delivers notifications from the Redis outbox.
+
+    Entries are read in batches and inserted with one statement, then
+    delivered in the background while the next batch is read. A batch
+    is acknowledged once its deliveries are done, so after a crash it's
+    handled again by another worker: inserts skip notifications already
+    stored, deliveries are at least once. Entries being delivered are
+    claimed again by their worker regularly, so other workers don't take
+    them over while a slow endpoint is still being served.
+
+    When a batch can't be inserted, e.g. an alert or a device was deleted
+    meanwhile, its notifications are inserted one by one. Those still
+    failing are stored without their alert and device, and those failing
+    even then go to the dead-letter stream.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        batch_size: int = 500,
+        consumer: Optional[str] = None,
+    ):
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        # Unique per process, workers of a host don't share entries.
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.deliveries: Set["asyncio.Task[None]"] = set()
+        # Batches being delivered, to stop reading when endpoints lag.
+        self.capacity = asyncio.Semaphore(settings.notification_batches_in_flight)
+
+    async def process(
+        self,
+        redis: Redis,
+        session: AsyncSession,
+        entries: List[Entry],
+    ) -> int:
+        """
+        Store a batch, count it as unread and start delivering it.
+
+        :param redis: redis client, to acknowledge the batch.
+        :param session: database session, committed.
+        :param entries: outbox entries.
+        :return: number of new notifications.
+        """
+        if not entries:
+            return 0
+        notifications = [notification for _, notification in entries]
+        failed: List[DeadEntry] = []
+        try:
+            async with session.begin_nested():
+                stored = await NotificationDAO(session).bulk_create(notifications)
+        except (IntegrityError, DataError):
+            stored, entries, failed = await self._store_each(session, entries)
+            notifications = [notification for _, notification in entries]
+        await session.commit()
+        await dead_letter(redis, failed)
+        await adjust_unread(redis, stored, 1)
+        await self.capacity.acquire()
+        task = asyncio.create_task(
+            self._deliver(redis, [entry_id for entry_id, _ in entries], notifications),
+        )
+        self.deliveries.add(task)
+        task.add_done_callback(self.deliveries.discard)
+        return len(stored)
+
+    async def drain(self) -> None:
+        """Wait for running deliveries."""
+        await asyncio.gather(*self.deliveries, return_exceptions=True)
+
+    async def run(
+        self,
+        redis_pool: ConnectionPool,
+        session_factory: async_sessionmaker[AsyncSession],
+    ) -> None:
+        """
+        Handle the outbox forever.
+
+        :param redis_pool: redis connection pool.
+        :param session_factory: factory of database sessions.
+        """
+        async with Redis(connection_pool=redis_pool) as redis:
+            await create_group(redis)
+            while True:  # noqa: WPS457
+                try:
+                    entries = await read_entries(
+                        redis,
+                        self.consumer,
+                        count=self.batch_size,
+                        block_ms=1000,
+                        claim_idle_ms=int(settings.notification_claim_idle_seconds * 1000),
+                    )
+                    if entries:
+                        async with session_factory() as session:
+                            await self.process(redis, session, entries)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Handling notifications failed")
+                    await asyncio.sleep(1)
+
+    async def _store_each(
+        self,
+        session: AsyncSession,
+        entries: List[Entry],
+    ) -> Tuple[
+        List[Tuple[Optional[UUID], Optional[int]]],
+        List[Entry],
+        List[DeadEntry],
+    ]:
+        dao = NotificationDAO(session)
+        stored = []
+        kept = []
+        failed = []
+        for entry_id, notification in entries:
+            orphan = {**notification, "alert_id": None, "device_id": None}
+            for row in (notification, orphan):
+                try:
+                    async with session.begin_nested():
+                        stored.extend(await dao.bulk_create([row]))
+                except (IntegrityError, DataError) as exc:
+                    error = str(exc.orig)
+                else:
+                    kept.append((entry_id, row))
+                    break
+            else:
+                logger.warning("Notification {} not stored: {}", entry_id, error)
+                failed.append((entry_id, notification, error))
+        return stored, kept, failed
+
+    async def _deliver(
+        self,
+        redis: Redis,
+        entry_ids: List[bytes],
+        notifications: List[Dict[str, Any]],
+    ) -> None:
+        keepalive = asyncio.create_task(self._keep_claimed(redis, entry_ids))
+        try:
+            await self.dispatcher.dispatch(notifications)
+            await acknowledge(redis, entry_ids)
+        except Exception:
+            logger.exception("Delivering notifications failed")
+        finally:
+            keepalive.cancel()
+            self.capacity.release()
+
+    async def _keep_claimed(self, redis: Redis, entry_ids: List[bytes]) -> None:
+        interval = settings.notification_claim_idle_seconds / 3
+        while True:  # noqa: WPS457
+            await asyncio.sleep(interval)
+            try:
+                await refresh_entries(redis, self.consumer, entry_ids)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Refreshing notifications being delivered failed")
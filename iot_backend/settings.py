@@ -2,7 +2,7 @@ import enum
 import os
 from pathlib import Path
 from tempfile import gettempdir
-from typing import Optional
+from typing import Dict, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from yarl import URL
@@ -48,6 +48,9 @@ class Settings(BaseSettings):
     db_pass: str = "iot_backend"
     db_base: str = "iot_backend"
     db_echo: bool = False
+    # Warn when one statement runs more than this many times in a request
+    # (a likely N+1), 0 disables the check.
+    db_repeated_statement_threshold: int = 10
 
     # Variables for Redis
     redis_host: str = "iot_backend-redis"
@@ -65,6 +68,91 @@ class Settings(BaseSettings):
     #Mainflux
     mainflux_host: str = ""
     mainflux_token: str = ""
+    # Circuit breaker around Mainflux calls
+    mainflux_breaker_window_seconds: float = 30.0
+    mainflux_breaker_min_calls: int = 10
+    mainflux_breaker_error_rate: float = 0.5
+    mainflux_breaker_slow_call_seconds: float = 2.0
+    mainflux_breaker_slow_call_rate: float = 0.8
+    mainflux_breaker_open_seconds: float = 15.0
+    mainflux_breaker_half_open_probes: int = 3
+    # Bounds for the adaptive request timeout
+    mainflux_timeout_min_seconds: float = 0.5
+    mainflux_timeout_max_seconds: float = 5.0
+    # Background copy of reader messages into the messages table
+    mainflux_sync_enabled: bool = False
+    mainflux_sync_interval_seconds: float = 60.0
+    mainflux_sync_batch_size: int = 100
+    # Bulk device provisioning
+    mainflux_provisioning_concurrency: int = 8
+    mainflux_provisioning_chunk_size: int = 50
+    # Serialize responses of FastJSONRoute routes straight to bytes.
+    fast_json_responses: bool = True
+    # How long a device dashboard is served from Redis.
+    dashboard_cache_seconds: int = 10
+    # In-process alert evaluation of ingested messages
+    alert_engine_enabled: bool = True
+    alert_rules_reload_seconds: float = 30.0
+    alert_notification_batch_size: int = 500
+    alert_notification_queue_size: int = 10000
+    # Most values kept by one window, and how often windows go to Redis.
+    alert_window_max_samples: int = 1024
+    alert_window_snapshot_seconds: float = 5.0
+    # Samples weighted by anomaly alerts without a span, and stored values
+    # fed to the statistics of a new anomaly alert.
+    alert_anomaly_default_span: int = 60
+    alert_anomaly_backfill_samples: int = 10000
+    # How long a worker trusts its copy of an alert state kept in Redis,
+    # and how long Redis keeps a state no value touched.
+    alert_state_sync_seconds: float = 5.0
+    alert_state_ttl_seconds: float = 7 * 24 * 3600
+    # Lease of the process keeping windows and anomaly statistics, and the
+    # batches of values forwarded to it that Redis keeps.
+    alert_owner_lease_seconds: float = 15.0
+    alert_values_stream_maxlen: int = 10000
+    # Alert backtests: worker processes (0 replays in the web process), rows
+    # read at once, length and most number of the time slices replayed in
+    # parallel, and the longest range replayed.
+    backtest_workers: int = 0
+    backtest_chunk_rows: int = 50000
+    backtest_slice_seconds: float = 7 * 24 * 3600
+    backtest_max_slices: int = 64
+    backtest_max_seconds: float = 366 * 24 * 3600
+    backtest_max_intervals: int = 1000
+    # Action dispatch: how long a device poll waits for an action, and how
+    # long a thing secret is trusted once resolved.
+    action_poll_seconds: float = 25.0
+    action_credential_cache_seconds: float = 300.0
+    # Action timeouts: how long a device has to acknowledge an action, how
+    # many times it's queued, and how many late actions are handled at once.
+    action_scheduler_enabled: bool = True
+    action_ack_timeout_seconds: float = 60.0
+    action_max_attempts: int = 3
+    action_timeout_batch_size: int = 1000
+    action_timeout_poll_seconds: float = 1.0
+
+    # Notification delivery. Endpoints map a name to an http(s):// webhook
+    # URL or a mailto: address, e.g. '{"ops": "https://example.com/hook"}'.
+    notification_worker_enabled: bool = True
+    notification_endpoints: Dict[str, str] = {}
+    notification_batch_size: int = 500
+    notification_batches_in_flight: int = 4
+    notification_claim_idle_seconds: float = 60.0
+    # Notifications that couldn't be stored that Redis keeps.
+    notification_dead_letter_maxlen: int = 10000
+    notification_endpoint_concurrency: int = 4
+    notification_endpoint_rate: float = 10.0
+    notification_endpoint_burst: int = 20
+    notification_delivery_attempts: int = 5
+    notification_retry_base_seconds: float = 0.5
+    notification_retry_max_seconds: float = 30.0
+    notification_webhook_timeout_seconds: float = 5.0
+    # Devices and alerts of check status events, cached per process.
+    notification_lookup_cache_seconds: float = 60.0
+    notification_lookup_cache_size: int = 100000
+    notification_bulk_max_events: int = 10000
+    # Unread counters are rebuilt from the database after this long.
+    notification_unread_ttl_seconds: float = 3600.0
     
     # This variable is used to define
     # multiproc_dir. It's required for [uvi|guni]corn projects.
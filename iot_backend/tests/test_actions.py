@@ -0,0 +1,216 @@
+import time
+import uuid
+from typing import Callable, ContextManager, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.action import Action, ActionStatus
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.users import User, current_active_user
+from iot_backend.services.actions.dispatch import (
+    DEADLINES_KEY,
+    enqueue_actions,
+    expire_actions,
+    next_action,
+    processing_key,
+    queue_key,
+)
+from iot_backend.services.actions.scheduler import ActionTimeoutScheduler
+from iot_backend.settings import settings
+
+
+@pytest.mark.anyio
+async def test_actions_are_dispatched_and_acknowledged(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    assert_max_queries: Callable[[int], ContextManager[List[str]]],
+) -> None:
+    """Enabled actions reach their device, which reports the outcome."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    secret = uuid.uuid4()
+    device = Device(
+        name="valve",
+        type="node",
+        user_id=user.id,
+        mainflux_thing_secret=secret,
+    )
+    dbsession.add(device)
+    await dbsession.flush()
+    fastapi_app.dependency_overrides[current_active_user] = lambda: user
+    thing = {"Authorization": f"Thing {secret}"}
+
+    created = []
+    for values in (["open"], ["close"], ["purge"]):
+        response = await client.post(
+            "/api/actions/",
+            json={"device_id": device.id, "is_enabled": True, "values": values},
+        )
+        created.append(response.json())
+    # Disabled actions leave the queue.
+    await client.patch(f"/api/actions/{created[2]['id']}/toggle")
+
+    first = await client.get("/api/actions/poll", headers=thing)
+    assert first.json()["values"] == ["open"]
+    # Polling an empty queue doesn't touch the database.
+    with assert_max_queries(0):
+        second = await client.get("/api/actions/poll", headers=thing)
+        empty = await client.get("/api/actions/poll?wait=0.1", headers=thing)
+    assert second.json()["values"] == ["close"]
+    assert empty.status_code == 204
+
+    ack = await client.post(
+        f"/api/actions/{first.json()['uuid']}/ack",
+        json={"status": "completed"},
+        headers=thing,
+    )
+    assert ack.status_code == 204
+    again = await client.post(
+        f"/api/actions/{first.json()['uuid']}/ack",
+        json={"status": "failed"},
+        headers=thing,
+    )
+    assert again.status_code == 404
+    action = await dbsession.get(Action, first.json()["id"])
+    await dbsession.refresh(action)
+    assert action.status == ActionStatus.COMPLETED
+
+    stranger = {"Authorization": f"Thing {uuid.uuid4()}"}
+    response = await client.get("/api/actions/poll?wait=0.1", headers=stranger)
+    assert response.status_code == 401
+
+
+@pytest.mark.anyio
+async def test_late_actions_are_retried_then_failed(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Unacknowledged actions are queued again, then fail in bulk."""
+    monkeypatch.setattr(settings, "action_ack_timeout_seconds", 60)
+    monkeypatch.setattr(settings, "action_max_attempts", 2)
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    secret = uuid.uuid4()
+    device = Device(
+        name="pump",
+        type="node",
+        user_id=user.id,
+        mainflux_thing_secret=secret,
+    )
+    dbsession.add(device)
+    await dbsession.flush()
+    fastapi_app.dependency_overrides[current_active_user] = lambda: user
+    thing = {"Authorization": f"Thing {secret}"}
+    ids = []
+    for values in (["start"], ["stop"], ["flush"]):
+        response = await client.post(
+            "/api/actions/",
+            json={"device_id": device.id, "is_enabled": True, "values": values},
+        )
+        ids.append(response.json()["id"])
+    # The device carries "start" out and never acknowledges "stop".
+    start = (await client.get("/api/actions/poll", headers=thing)).json()
+    await client.post(
+        f"/api/actions/{start['uuid']}/ack",
+        json={"status": "completed"},
+        headers=thing,
+    )
+    await client.get("/api/actions/poll", headers=thing)
+    scheduler = ActionTimeoutScheduler(batch_size=1)
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert await scheduler.process(redis, dbsession, now=time.time() + 61) == 0
+        # "stop" is queued again, after "flush" which was never delivered.
+        assert await redis.llen(queue_key(device.id)) == 2
+        assert await redis.zcard(DEADLINES_KEY) == 0
+        flush = (await client.get("/api/actions/poll", headers=thing)).json()
+        stop = (await client.get("/api/actions/poll", headers=thing)).json()
+        assert [flush["id"], stop["id"]] == [ids[2], ids[1]]
+        assert await scheduler.process(redis, dbsession, now=time.time() + 200) == 1
+        # "flush" was delivered once, it has an attempt left.
+        assert await redis.llen(queue_key(device.id)) == 1
+        assert await redis.zcard(DEADLINES_KEY) == 0
+
+    rows = await dbsession.execute(
+        select(Action.id, Action.status).where(Action.id.in_(ids)),
+    )
+    statuses = dict(rows.all())
+    assert statuses == {
+        ids[0]: ActionStatus.COMPLETED,
+        ids[1]: ActionStatus.FAILED,
+        ids[2]: ActionStatus.PENDING,
+    }
+
+
+@pytest.mark.anyio
+async def test_queued_actions_wait_for_their_device(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """An offline device gets its actions whenever it comes back."""
+    monkeypatch.setattr(settings, "action_max_attempts", 1)
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(name="heater", type="node", user_id=user.id)
+    dbsession.add(device)
+    await dbsession.flush()
+    action = Action(device_id=device.id, values=["warm"], is_enabled=True)
+    dbsession.add(action)
+    await dbsession.flush()
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await enqueue_actions(redis, [action])
+        assert await expire_actions(redis, 10, now=time.time() + 86400) == 0
+        delivered = await next_action(redis, device.id, 0.1)
+        assert delivered is not None
+        assert delivered["id"] == action.id
+        assert await redis.zcard(DEADLINES_KEY) == 1
+
+
+@pytest.mark.anyio
+async def test_actions_being_delivered_are_not_queued_again(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """An action expiring while a poll takes it is delivered once."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(name="fan", type="node", user_id=user.id)
+    dbsession.add(device)
+    await dbsession.flush()
+    action = Action(device_id=device.id, values=["spin"], is_enabled=True)
+    dbsession.add(action)
+    await dbsession.flush()
+    queue = queue_key(device.id)
+    processing = processing_key(device.id)
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await enqueue_actions(redis, [action])
+        assert await next_action(redis, device.id, 0.1) is not None
+        assert await expire_actions(redis, 10, now=time.time() + 61) == 1
+        # A poll took the action again, an old deadline can't expire it.
+        await redis.lmove(queue, processing, "LEFT", "RIGHT")
+        assert await expire_actions(redis, 10, now=time.time() + 200) == 0
+        assert await redis.llen(processing) == 1
+
+        # A poll cancelled between both steps leaves the action queued.
+        await redis.lmove(queue, processing, "LEFT", "RIGHT")
+        delivered = await next_action(redis, device.id, 0.1)
+        assert delivered is not None
+        assert delivered["id"] == action.id
+        assert await next_action(redis, device.id, 0.1) is None
+        assert await redis.llen(processing) == 0
@@ -0,0 +1,69 @@
+from typing import Callable, ContextManager, List
+from urllib.parse import urlencode
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from starlette.requests import Request
+
+from iot_backend.admin.models import MessageView
+from iot_backend.admin.paging import KeysetPagination
+from iot_backend.db.models.message import Message
+
+
+def list_request(**params: object) -> Request:
+    """
+    Build a request of the admin list page.
+
+    :param params: query parameters.
+    :return: request.
+    """
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/admin/message/list",
+            "query_string": urlencode(params).encode(),
+            "headers": [],
+        },
+    )
+
+
+@pytest.mark.anyio
+async def test_messages_are_paged_by_key_without_count(
+    dbsession: AsyncSession,
+    record_statements: Callable[[], ContextManager[List[str]]],
+) -> None:
+    """Messages are listed newest first with cursors and an estimated count."""
+    messages = [
+        Message(
+            channel_id="channel",
+            publisher="publisher",
+            base_name="",
+            base_unit="",
+            base_value=0,
+            base_time=0,
+            name="temperature",
+            unit="C",
+            value=index,
+            time=index,
+        )
+        for index in range(5)
+    ]
+    dbsession.add_all(messages)
+    await dbsession.flush()
+    view = MessageView()
+    view.is_async = True
+    view.session_maker = async_sessionmaker(bind=dbsession.bind)
+    newest = sorted((message.id for message in messages), reverse=True)
+
+    with record_statements() as statements:
+        first = await view.list(list_request(pageSize=2))
+    assert not any("count(" in statement.lower() for statement in statements)
+    assert isinstance(first, KeysetPagination)
+    assert [row.id for row in first.rows] == newest[:2]
+    assert first.count >= 3
+
+    second = await view.list(list_request(pageSize=2, page=2, after=first.next_cursor))
+    assert [row.id for row in second.rows] == newest[2:4]
+    back = await view.list(list_request(pageSize=2, page=1, before=second.first_cursor))
+    assert [row.id for row in back.rows] == newest[:2]
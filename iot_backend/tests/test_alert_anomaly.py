@@ -0,0 +1,136 @@
+import uuid
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.alert import Alert
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.message import Message
+from iot_backend.db.models.tag import Tag
+from iot_backend.db.models.users import User
+from iot_backend.services.alerts.anomaly import AnomalySpec, Ewma
+from iot_backend.services.alerts.engine import AlertEngine
+
+
+def test_batch_scores_match_streaming() -> None:
+    """The vectorized backfill gives the scores and state of single values."""
+    spec = AnomalySpec.from_span(30)
+    randomizer = np.random.default_rng(0)
+    values = np.cumsum(randomizer.normal(size=5000))
+    values[randomizer.random(5000) < 0.01] += 20
+
+    streaming = Ewma()
+    expected = [streaming.score(value, spec) for value in values]
+    batch = Ewma()
+    scores = np.concatenate(
+        [batch.score_many(chunk, spec) for chunk in np.split(values, [1, 2000])],
+    )
+
+    assert scores == pytest.approx(expected)
+    assert (batch.mean, batch.var, batch.count) == pytest.approx(
+        (streaming.mean, streaming.var, streaming.count),
+    )
+
+
+def test_spike_fires_and_drift_does_not() -> None:
+    """A slow drift follows the mean, a jump beyond k sigma fires."""
+    alert = Alert(
+        id=1,
+        uuid=uuid.uuid4(),
+        name="odd pressure",
+        comparator="Anomaly",
+        threshold=4,
+        anomaly_span=20,
+        status="enabled",
+        device_id=1,
+        tag_id=2,
+        check_external_id="",
+        check_external_message_template="",
+    )
+    engine = AlertEngine()
+    engine.load_rules([alert])
+    randomizer = np.random.default_rng(1)
+    for second, noise in enumerate(randomizer.normal(size=500), start=1):
+        engine.evaluate(1, 2, second * 0.1 + float(noise), timestamp=second)
+    # Only periodic syncs were queued, no breach.
+    while not engine.transitions.empty():
+        assert not engine.transitions.get_nowait()[2]
+
+    assert engine.evaluate(1, 2, 80, timestamp=501) == 1
+    _, _, breached, _, score = engine.transitions.get_nowait()
+    assert breached
+    assert score > 4
+
+
+@pytest.mark.anyio
+async def test_new_rules_are_backfilled(dbsession: AsyncSession) -> None:
+    """Statistics of a new anomaly alert start from stored values."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(name="pump", type="node", user_id=user.id)
+    dbsession.add(device)
+    await dbsession.flush()
+    tag = Tag(
+        name=uuid.uuid4().hex,
+        label="pressure",
+        target=0,
+        unit="bar",
+        multiplier=1,
+        mask={},
+        graphed=False,
+        user_id=user.id,
+        device_id=device.id,
+    )
+    dbsession.add(tag)
+    await dbsession.flush()
+    values = [5 + (second % 3) * 0.1 for second in range(100)]
+    dbsession.add_all(
+        [
+            Message(
+                channel_id="",
+                publisher="",
+                base_name="",
+                base_unit="",
+                base_value=0,
+                base_time=0,
+                name="pressure",
+                unit="bar",
+                value=value,
+                time=second,
+                device_id=device.id,
+                tag_id=tag.id,
+            )
+            for second, value in enumerate(values)
+        ],
+    )
+    dbsession.add(
+        Alert(
+            name=uuid.uuid4().hex,
+            comparator="Anomaly",
+            threshold=3,
+            anomaly_span=10,
+            status="enabled",
+            check_external_id="",
+            check_external_message_template="",
+            device_id=device.id,
+            tag_id=tag.id,
+            user_id=user.id,
+        ),
+    )
+    await dbsession.flush()
+
+    engine = AlertEngine()
+    await engine.reload(dbsession)
+    (rule,) = engine.rules()
+    detector = rule.detectors[tag.id]
+    assert detector.count == 100
+    assert detector.mean == pytest.approx(5.1, abs=0.1)
+    # Already warm: the first live value is scored.
+    assert engine.evaluate(device.id, tag.id, 50, timestamp=100) == 1
+    assert engine.transitions.get_nowait()[2]
+
+    # Reloading keeps the statistics.
+    await engine.reload(dbsession)
+    assert engine.rules()[0].detectors[tag.id] is detector
@@ -0,0 +1,185 @@
+import uuid
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.message import Message
+from iot_backend.db.models.tag import Tag
+from iot_backend.db.models.users import User, current_active_user
+from iot_backend.services.alerts.backtest import (
+    BREACH,
+    CLEAR,
+    HOLD,
+    find_runs,
+    merge_slices,
+    window_subjects,
+)
+from iot_backend.services.alerts.windows import SlidingWindow, WindowSpec
+from iot_backend.settings import settings
+
+Interval = Tuple[float, Optional[float]]
+
+
+def replay(times: np.ndarray, states: np.ndarray, for_seconds: float) -> List[Interval]:
+    """
+    Replay conditions one by one, as the alert engine moves states.
+
+    :param times: unix times.
+    :param states: conditions.
+    :param for_seconds: how long a breach lasts before firing.
+    :return: firing intervals.
+    """
+    intervals: List[Interval] = []
+    since: Optional[float] = None
+    fired: Optional[float] = None
+    for timestamp, state in zip(times, states):
+        if state == BREACH:
+            since = timestamp if since is None else since
+            if fired is None and timestamp - since >= for_seconds:
+                fired = timestamp
+        elif state == CLEAR:
+            if fired is not None:
+                intervals.append((fired, timestamp))
+            since = fired = None
+    if fired is not None:
+        intervals.append((fired, None))
+    return intervals
+
+
+@pytest.mark.parametrize("function", ["mean", "min", "max", "count", "rate"])
+def test_window_subjects_match_sliding_window(function: str) -> None:
+    """Vectorized aggregates equal those of the engine's windows."""
+    randomizer = np.random.default_rng(0)
+    times = np.cumsum(randomizer.uniform(0.1, 3, size=2000))
+    values = np.cumsum(randomizer.normal(size=2000))
+    spec = WindowSpec(function=function, seconds=30.0, samples=50)
+    window = SlidingWindow(spec)
+    expected = [window.push(timestamp, value) for timestamp, value in zip(times, values)]
+    assert window_subjects(spec, times, values) == pytest.approx(expected)
+
+
+def test_slices_join_like_a_single_replay() -> None:
+    """Runs cut anywhere by slices join into the intervals of one replay."""
+    randomizer = np.random.default_rng(1)
+    for _ in range(200):
+        size = int(randomizer.integers(1, 300))
+        times = np.cumsum(randomizer.integers(1, 3, size=size)).astype(np.float64)
+        states = randomizer.choice([BREACH, CLEAR, HOLD], size=size).astype(np.int8)
+        for_seconds = float(randomizer.choice([0, 3, 20]))
+        cuts = np.sort(randomizer.integers(0, size + 1, size=4))
+        slices = [
+            find_runs(times[part], states[part], for_seconds)
+            for part in np.split(np.arange(size), cuts)
+        ]
+        assert merge_slices(slices, for_seconds).intervals == replay(
+            times,
+            states,
+            for_seconds,
+        )
+
+
+@pytest.mark.anyio
+async def test_backtest_endpoint(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Stored values are replayed, in one slice or many."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(name="oven", type="node", user_id=user.id)
+    dbsession.add(device)
+    await dbsession.flush()
+    tag = Tag(
+        name=uuid.uuid4().hex,
+        label="temperature",
+        target=0,
+        unit="C",
+        multiplier=1,
+        mask={},
+        graphed=False,
+        user_id=user.id,
+        device_id=device.id,
+    )
+    dbsession.add(tag)
+    await dbsession.flush()
+    # Hot from 100 to 159 and from 300 to 309 seconds.
+    values = [
+        90 if 100 <= second < 160 or 300 <= second < 310 else 20
+        for second in range(600)
+    ]
+    dbsession.add_all(
+        [
+            Message(
+                channel_id="",
+                publisher="",
+                base_name="",
+                base_unit="",
+                base_value=0,
+                base_time=0,
+                name="temperature",
+                unit="C",
+                value=value,
+                time=second,
+                device_id=device.id,
+                tag_id=tag.id,
+            )
+            for second, value in enumerate(values)
+        ],
+    )
+    await dbsession.flush()
+    fastapi_app.dependency_overrides[current_active_user] = lambda: user
+    candidate = {
+        "comparator": "Greater than",
+        "threshold": 80,
+        "window_function": "mean",
+        "window_samples": 5,
+        "for_seconds": 30,
+    }
+
+    response = await client.post(f"/api/tags/{tag.id}/backtest", json=candidate)
+    assert response.status_code == 200
+    # The mean of 5 samples is over 80 from the 5th hot value to the last
+    # one, the short streak never lasts 30 seconds.
+    assert response.json() == {
+        "samples": 600,
+        "firings": 1,
+        "firing_seconds": 26,
+        "intervals": [{"start": 134, "end": 160}],
+    }
+
+    monkeypatch.setattr(settings, "backtest_slice_seconds", 47)
+    monkeypatch.setattr(settings, "backtest_chunk_rows", 7)
+    sliced = await client.post(f"/api/tags/{tag.id}/backtest", json=candidate)
+    assert sliced.json() == response.json()
+
+    missing_bound = await client.post(
+        f"/api/tags/{tag.id}/backtest",
+        json={"comparator": "Range", "threshold": 0},
+    )
+    assert missing_bound.status_code == 400
+
+    # Far bounds are narrowed to the stored values, in few slices.
+    monkeypatch.setattr(settings, "backtest_slice_seconds", 1)
+    monkeypatch.setattr(settings, "backtest_max_slices", 4)
+    unbounded = await client.post(
+        f"/api/tags/{tag.id}/backtest",
+        json={**candidate, "start": -(10**15), "end": 10**15},
+    )
+    assert unbounded.json() == response.json()
+
+    monkeypatch.setattr(settings, "backtest_max_seconds", 300)
+    too_long = await client.post(f"/api/tags/{tag.id}/backtest", json=candidate)
+    assert too_long.status_code == 400
+    shorter = await client.post(
+        f"/api/tags/{tag.id}/backtest",
+        json={**candidate, "start": 0, "end": 300},
+    )
+    assert shorter.json()["intervals"] == [{"start": 134, "end": 160}]
@@ -0,0 +1,129 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.alert import Alert
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.notification import Notification
+from iot_backend.db.models.tag import Tag
+from iot_backend.db.models.users import User, current_active_user
+from iot_backend.services.alerts.dependency import get_alert_engine
+from iot_backend.services.alerts.engine import AlertEngine, compile_predicate
+from iot_backend.services.notifications.delivery import Dispatcher
+from iot_backend.services.notifications.outbox import create_group, read_entries
+from iot_backend.services.notifications.worker import NotificationWorker
+
+
+def test_compiled_predicates() -> None:
+    """Comparators compile to predicates of the value."""
+    greater = compile_predicate("Greater than", 10)
+    less = compile_predicate("Less than", 10)
+    outside = compile_predicate("Range", 10, 20)
+    assert greater and less and outside
+    assert [greater(9), greater(11)] == [False, True]
+    assert [less(9), less(11)] == [True, False]
+    assert [outside(9), outside(15), outside(21)] == [True, False, True]
+    assert compile_predicate("Range", 10) is None
+
+
+@pytest.mark.anyio
+async def test_ingested_values_produce_notifications(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """A value crossing a threshold is notified once, until it recovers."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(name="boiler", type="node", user_id=user.id)
+    dbsession.add(device)
+    await dbsession.flush()
+    tag = Tag(
+        name=uuid.uuid4().hex,
+        label="temperature",
+        target=0,
+        unit="C",
+        multiplier=1,
+        mask={},
+        graphed=False,
+        user_id=user.id,
+        device_id=device.id,
+    )
+    dbsession.add(tag)
+    await dbsession.flush()
+    dbsession.add_all(
+        [
+            Alert(
+                name=uuid.uuid4().hex,
+                comparator=comparator,
+                threshold=threshold,
+                status=status,
+                check_external_id="",
+                check_external_message_template="",
+                device_id=device.id,
+                tag_id=tag.id,
+                user_id=user.id,
+            )
+            for comparator, threshold, status in (
+                ("Greater than", 80, "enabled"),
+                ("Less than", 0, "disabled"),
+            )
+        ],
+    )
+    await dbsession.flush()
+
+    engine = AlertEngine()
+    assert await engine.reload(dbsession) == 1
+    fastapi_app.dependency_overrides[current_active_user] = lambda: user
+    fastapi_app.dependency_overrides[get_alert_engine] = lambda: engine
+
+    for value in (70, 85, 90, 75, 95, -5):
+        response = await client.post(
+            f"/api/channels/{tag.id}/messages",
+            params={"device_id": device.id},
+            json={
+                "channel_id": "",
+                "publisher": "",
+                "base_name": "",
+                "base_time": 0,
+                "base_unit": "",
+                "base_value": 0,
+                "name": "temperature",
+                "unit": "C",
+                "value": value,
+                "time": 1,
+                "string_value": None,
+                "bool_value": None,
+                "data_value": None,
+            },
+        )
+        assert response.status_code == 200
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await create_group(redis)
+        assert await engine.apply_transitions(redis) == 4
+        assert await engine.publish_pending(redis) == 4
+        entries = await read_entries(redis, "test", 10, 0, 60000)
+        assert await NotificationWorker(Dispatcher([])).process(
+            redis,
+            dbsession,
+            entries,
+        ) == 4
+    notifications = await dbsession.scalars(
+        select(Notification)
+        .where(Notification.device_id == device.id)
+        .order_by(Notification.id),
+    )
+    assert [(row.level, row.message.split(": ")[1]) for row in notifications] == [
+        ("crit", "85 is greater than 80"),
+        ("ok", "resolved, 75 is not greater than 80"),
+        ("crit", "95 is greater than 80"),
+        ("ok", "resolved, -5 is not greater than 80"),
+    ]
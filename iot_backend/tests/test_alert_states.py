@@ -0,0 +1,88 @@
+import uuid
+from typing import Iterable, Tuple
+
+import pytest
+from redis.asyncio import ConnectionPool, Redis
+
+from iot_backend.db.models.alert import Alert
+from iot_backend.services.alerts.engine import AlertEngine
+
+
+def make_engine(**options: float) -> AlertEngine:
+    """
+    Build an engine with one "Greater than 80" alert on device 1, tag 2.
+
+    :param options: state machine columns of the alert.
+    :return: engine.
+    """
+    engine = AlertEngine()
+    engine.load_rules(
+        [
+            Alert(
+                id=1,
+                uuid=uuid.uuid4(),
+                name="hot",
+                comparator="Greater than",
+                threshold=80,
+                status="enabled",
+                device_id=1,
+                tag_id=2,
+                check_external_id="",
+                check_external_message_template="",
+                **options,
+            ),
+        ],
+    )
+    return engine
+
+
+async def feed(
+    engine: AlertEngine,
+    redis: Redis,
+    values: Iterable[Tuple[float, float]],
+) -> int:
+    """
+    Evaluate values, applying transitions as a running worker would.
+
+    :param engine: engine.
+    :param redis: redis client.
+    :param values: (time, value) pairs.
+    :return: number of notifications.
+    """
+    notified = 0
+    for timestamp, value in values:
+        engine.evaluate(1, 2, value, timestamp)
+        notified += await engine.apply_transitions(redis)
+    return notified
+
+
+@pytest.mark.anyio
+async def test_flapping_value_is_notified_once(
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Hysteresis and a pending duration absorb a value hovering at the threshold."""
+    flapping = [(second + 1.0, 79 + 2 * (second % 2)) for second in range(1000)]
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        plain = await feed(make_engine(), redis, flapping)
+        await redis.flushall()
+        damped = make_engine(for_seconds=10, hysteresis=5)
+        assert await feed(damped, redis, flapping) == 1
+        assert await feed(damped, redis, [(1000.0, 70)]) == 1
+    assert plain == 999
+
+
+@pytest.mark.anyio
+async def test_workers_share_state(fake_redis_pool: ConnectionPool) -> None:
+    """Workers agree on the state, and a firing alert re-notifies on schedule."""
+    first = make_engine(renotify_seconds=30)
+    second = make_engine(renotify_seconds=30)
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert await feed(first, redis, [(1, 90)]) == 1
+        assert await feed(second, redis, [(2, 95), (10, 91)]) == 0
+        assert await feed(first, redis, [(31, 92), (40, 93)]) == 1
+        assert await feed(second, redis, [(50, 50)]) == 1
+        assert await redis.hget("alerts:state:1:2", "state") == b"RESOLVED"
+        assert 0 < await redis.ttl("alerts:state:1:2") <= 7 * 24 * 3600
+    messages = [first.queue.get_nowait()["level"] for _ in range(2)]
+    assert messages == ["crit", "crit"]
+    assert second.queue.get_nowait()["level"] == "ok"
@@ -0,0 +1,142 @@
+import random
+import uuid
+from typing import List, Tuple
+
+import pytest
+from redis.asyncio import ConnectionPool, Redis
+
+from iot_backend.db.models.alert import Alert
+from iot_backend.services.alerts.engine import AlertEngine
+from iot_backend.services.alerts.windows import SlidingWindow, WindowSpec
+
+
+def expected(spec: WindowSpec, samples: List[Tuple[float, float]]) -> float:
+    """
+    Compute the aggregate of a window from scratch.
+
+    :param spec: window.
+    :param samples: every (time, value) pushed so far.
+    :return: aggregate.
+    """
+    now = samples[-1][0]
+    kept = samples[-spec.samples :]
+    if spec.seconds is not None:
+        kept = [sample for sample in kept if sample[0] > now - spec.seconds]
+    values = [value for _, value in kept]
+    if spec.function == "mean":
+        return sum(values) / len(values)
+    if spec.function == "count":
+        return len(values)
+    if spec.function == "rate":
+        elapsed = kept[-1][0] - kept[0][0]
+        return (values[-1] - values[0]) / elapsed if elapsed else 0
+    return min(values) if spec.function == "min" else max(values)
+
+
+@pytest.mark.parametrize("function", ["mean", "min", "max", "count", "rate"])
+@pytest.mark.parametrize("seconds", [None, 30.0])
+def test_window_matches_recomputation(function: str, seconds: float) -> None:
+    """Incremental aggregates equal a full recomputation over the window."""
+    spec = WindowSpec(function=function, seconds=seconds, samples=20)
+    window = SlidingWindow(spec)
+    randomizer = random.Random(function)
+    samples: List[Tuple[float, float]] = []
+    timestamp = 0.0
+    for _ in range(500):
+        timestamp += randomizer.uniform(0.1, 5)
+        samples.append((timestamp, randomizer.uniform(-100, 100)))
+        assert window.push(*samples[-1]) == pytest.approx(expected(spec, samples))
+        assert len(window.values) <= spec.samples
+
+
+@pytest.mark.anyio
+async def test_windows_survive_restart(fake_redis_pool: ConnectionPool) -> None:
+    """A restarted engine resumes windows from the Redis snapshots."""
+    alert = Alert(
+        id=1,
+        uuid=uuid.uuid4(),
+        name="hot on average",
+        comparator="Greater than",
+        threshold=50,
+        window_function="mean",
+        window_samples=4,
+        status="enabled",
+        device_id=1,
+        tag_id=2,
+        check_external_id="",
+        check_external_message_template="",
+    )
+    engine = AlertEngine()
+    engine.load_rules([alert])
+    for value in (40, 45, 60):
+        engine.evaluate(1, 2, value, timestamp=value)
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert await engine.save_windows(redis) == 1
+        restarted = AlertEngine()
+        restarted.load_rules([alert])
+        assert await restarted.restore_windows(redis) == 1
+        assert restarted.evaluate(1, 2, 70, timestamp=70) == 1
+        assert await restarted.apply_transitions(redis) == 1
+
+    notification = restarted.queue.get_nowait()
+    assert notification["message"] == (
+        "hot on average: 53.75 is mean of 4 samples greater than 50"
+    )
+
+
+@pytest.mark.anyio
+async def test_windows_have_a_single_owner(fake_redis_pool: ConnectionPool) -> None:
+    """Values of windowed rules reach the owner, whichever worker got them."""
+    windowed = Alert(
+        id=1,
+        uuid=uuid.uuid4(),
+        name="hot on average",
+        comparator="Greater than",
+        threshold=50,
+        window_function="mean",
+        window_samples=4,
+        status="enabled",
+        device_id=1,
+        tag_id=2,
+        check_external_id="",
+        check_external_message_template="",
+    )
+    single = Alert(
+        id=2,
+        uuid=uuid.uuid4(),
+        name="too hot",
+        comparator="Greater than",
+        threshold=100,
+        status="enabled",
+        device_id=1,
+        tag_id=2,
+        check_external_id="",
+        check_external_message_template="",
+    )
+    owner = AlertEngine(is_owner=False)
+    other = AlertEngine(is_owner=False)
+    for engine in (owner, other):
+        engine.load_rules([windowed, single])
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert await owner.claim(redis, "owner", 15)
+        assert not await other.claim(redis, "other", 15)
+        # Single values are checked where they arrive, windows are not.
+        assert other.evaluate(1, 2, 120, timestamp=1) == 1
+        assert other.evaluate(1, 2, 40, timestamp=2) == 1
+        assert await other.forward_pending(redis) == 2
+        assert not any(rule.windows for rule in other.rules())
+        assert await owner.consume_values(redis) == 2
+        assert owner.transitions.qsize() == 1
+        assert owner.evaluate(1, 2, 60, timestamp=3) == 1
+        assert owner.forwarded.empty()
+
+        assert await owner.save_windows(redis) == 1
+        await owner.release(redis, "owner")
+        assert not owner.is_owner
+        assert await other.claim(redis, "other", 15)
+        # The new owner goes on from the snapshot: mean of 120, 40, 60, 80.
+        other.evaluate(1, 2, 80, timestamp=4)
+        rule = next(rule for rule in other.rules() if rule.window is not None)
+        assert rule.windows[2].aggregate() == 75
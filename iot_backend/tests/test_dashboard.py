@@ -0,0 +1,119 @@
+import uuid
+from typing import Callable, ContextManager, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.action import Action
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.message import Message
+from iot_backend.db.models.notification import Notification
+from iot_backend.db.models.tag import Tag
+from iot_backend.db.models.users import User, current_active_user
+
+
+def message(tag: Tag, value: float, time: int) -> Message:
+    """
+    Build a message of a tag.
+
+    :param tag: tag of the message.
+    :param value: value.
+    :param time: unix time.
+    :return: message.
+    """
+    return Message(
+        channel_id="channel",
+        publisher="publisher",
+        base_name="",
+        base_unit="",
+        base_value=0,
+        base_time=0,
+        name=tag.name,
+        unit="C",
+        value=value,
+        time=time,
+        tag_id=tag.id,
+        device_id=tag.device_id,
+    )
+
+
+@pytest.mark.anyio
+async def test_dashboard_is_one_query_then_cached(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    record_statements: Callable[[], ContextManager[List[str]]],
+) -> None:
+    """The dashboard is read with one statement and then served from Redis."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(name="gateway", type="gateway", user_id=user.id)
+    dbsession.add(device)
+    await dbsession.flush()
+    tags = [
+        Tag(
+            name=uuid.uuid4().hex,
+            label=label,
+            target=0,
+            unit="C",
+            multiplier=1,
+            mask={},
+            graphed=False,
+            user_id=user.id,
+            device_id=device.id,
+        )
+        for label in ("inside", "outside")
+    ]
+    dbsession.add_all(tags)
+    await dbsession.flush()
+    dbsession.add_all(
+        [
+            message(tags[0], 20.5, 100),
+            message(tags[0], 21.5, 200),
+            Action(device_id=device.id, is_enabled=True, values=["on"]),
+            Action(device_id=device.id, is_enabled=False, values=["off"]),
+            *(
+                Notification(
+                    message="hot",
+                    level=level,
+                    check_id="check",
+                    notification_endpoint_id="endpoint",
+                    notification_rule_id="rule",
+                    device_id=device.id,
+                    user_id=user.id,
+                )
+                for level in ("crit", "crit", "warn")
+            ),
+        ],
+    )
+    await dbsession.flush()
+    fastapi_app.dependency_overrides[current_active_user] = lambda: user
+    url = f"/api/devices/{device.id}/dashboard"
+
+    with record_statements() as statements:
+        response = await client.get(url)
+    assert response.status_code == 200
+    assert len(statements) == 1
+    dashboard = response.json()
+    assert dashboard["device"]["id"] == device.id
+    assert [tag["label"] for tag in dashboard["tags"]] == ["inside", "outside"]
+    assert dashboard["tags"][0]["latest"] == {"value": 21.5, "unit": "C", "time": 200}
+    assert dashboard["tags"][1]["latest"] is None
+    assert [action["values"] for action in dashboard["actions"]] == [["on"]]
+    assert dashboard["notifications"]["total"] == 3
+    assert dashboard["notifications"]["by_level"] == {"crit": 2, "warn": 1}
+
+    with record_statements() as statements:
+        cached = await client.get(url)
+    assert statements == []
+    assert cached.json() == dashboard
+
+    fastapi_app.dependency_overrides[current_active_user] = lambda: User(
+        id=uuid.uuid4(),
+        email="other@example.com",
+    )
+    assert (await client.get(url)).status_code == 403
+    assert (await client.get("/api/devices/0/dashboard")).status_code == 404
@@ -0,0 +1,83 @@
+import uuid
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.device_geo_dao import DeviceGeoDAO
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.users import User
+
+CITIES: Dict[str, Dict[str, Any]] = {
+    "paris": {"longitude": 2.3522, "latitude": 48.8566},
+    "versailles": {"longitude": "2.1301", "latitude": "48.8049"},
+    "london": {"longitude": -0.1276, "latitude": 51.5072},
+    "berlin": {"longitude": 13.405, "latitude": 52.52},
+    "fiji": {"longitude": 179.9, "latitude": -17.0},
+    "samoa": {"longitude": -179.9, "latitude": -17.0},
+    "broken": {"longitude": "n/a", "latitude": None},
+    "overflow": {"longitude": 10**400, "latitude": "1e400"},
+    "off-map": {"longitude": 200, "latitude": -95},
+}
+
+
+async def create_devices(dbsession: AsyncSession) -> Dict[str, Device]:
+    """
+    Create a device per city for a new user.
+
+    :param dbsession: database session.
+    :return: devices by city.
+    """
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    devices = {
+        name: Device(name=name, type="node", user_id=user.id, meta_data=meta)
+        for name, meta in CITIES.items()
+    }
+    dbsession.add_all(devices.values())
+    await dbsession.flush()
+    return devices
+
+
+def names(devices: List[Any]) -> List[str]:
+    """
+    Get names of devices or of (device, distance) pairs.
+
+    :param devices: query results.
+    :return: device names.
+    """
+    return [getattr(item, "name", None) or item[0].name for item in devices]
+
+
+@pytest.mark.anyio
+async def test_geo_queries(dbsession: AsyncSession) -> None:
+    """Bounding box, radius, nearest and clusters use generated coordinates."""
+    devices = await create_devices(dbsession)
+    user_id = devices["paris"].user_id
+    assert devices["versailles"].longitude == pytest.approx(2.1301)
+    assert devices["broken"].longitude is None
+    assert devices["overflow"].longitude is None
+    assert devices["overflow"].latitude is None
+    assert devices["off-map"].longitude is None
+    assert devices["off-map"].latitude is None
+    dao = DeviceGeoDAO(dbsession)
+
+    found = await dao.get_in_bbox(user_id, -1, 48, 3, 52)
+    assert names(found) == ["paris", "versailles", "london"]
+    found = await dao.get_in_bbox(user_id, 179, -18, -179, -16)
+    assert names(found) == ["fiji", "samoa"]
+
+    found = await dao.get_in_radius(user_id, 2.3522, 48.8566, 20_000)
+    assert names(found) == ["paris", "versailles"]
+    assert found[1][1] == pytest.approx(17_000, rel=0.05)
+    found = await dao.get_in_radius(user_id, 180, -17, 30_000)
+    assert sorted(names(found)) == ["fiji", "samoa"]
+
+    found = await dao.get_nearest(user_id, -0.1, 51.5, k=2)
+    assert names(found) == ["london", "versailles"]
+
+    clusters = await dao.get_clusters(user_id, -10, 40, 20, 60, zoom=1)
+    assert sorted(cluster["count"] for cluster in clusters) == [1, 3]
+    single = next(cluster for cluster in clusters if cluster["count"] == 1)
+    assert single["device_id"] == devices["london"].id
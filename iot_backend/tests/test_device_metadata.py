@@ -0,0 +1,47 @@
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.device_dao import DeviceDAO
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.users import User
+
+
+@pytest.mark.anyio
+async def test_search_and_merge_patch(dbsession: AsyncSession) -> None:
+    """Metadata is searched by containment and patched key by key."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    north = Device(
+        name="north",
+        type="node",
+        user_id=user.id,
+        meta_data={"site": "north", "firmware": "1.2", "location": {"lat": 1}},
+    )
+    south = Device(
+        name="south",
+        type="node",
+        user_id=user.id,
+        meta_data={"site": "south", "model": "x1"},
+    )
+    dbsession.add_all([north, south])
+    await dbsession.flush()
+    dao = DeviceDAO(dbsession)
+
+    found = await dao.search_devices(user.id, contains={"site": "north"})
+    assert [device.id for device in found.items] == [north.id]
+    found = await dao.search_devices(user.id, has_keys=["model"])
+    assert [device.id for device in found.items] == [south.id]
+    missing = await dao.search_devices(uuid.uuid4(), contains={"site": "north"})
+    assert missing.items == []
+
+    patched = await dao.merge_device_metadata(
+        north.id,
+        user.id,
+        {"firmware": "1.3", "location": None, "model": "x2"},
+    )
+    assert patched.meta_data == {"site": "north", "firmware": "1.3", "model": "x2"}
+    found = await dao.search_devices(user.id, contains={"model": "x2"})
+    assert [device.id for device in found.items] == [north.id]
@@ -0,0 +1,86 @@
+import asyncio
+import uuid
+from typing import Callable, ContextManager, List
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.loaders import get_loaders
+from iot_backend.db.dao.ownership_dao import OwnershipDAO
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.tag import Tag
+from iot_backend.db.models.users import User
+
+
+async def create_devices(dbsession: AsyncSession, count: int) -> List[Device]:
+    """
+    Create devices with Mainflux things and expunge them from the session.
+
+    :param dbsession: database session.
+    :param count: number of devices.
+    :return: created devices.
+    """
+    devices = [
+        Device(name=f"node-{index}", type="node", mainflux_thing_uuid=uuid.uuid4())
+        for index in range(count)
+    ]
+    dbsession.add_all(devices)
+    await dbsession.flush()
+    dbsession.expunge_all()
+    return devices
+
+
+@pytest.mark.anyio
+async def test_concurrent_loads_are_batched(
+    dbsession: AsyncSession,
+    record_statements: Callable[[], ContextManager[List[str]]],
+) -> None:
+    """Concurrent loads share one query, repeated loads hit the cache."""
+    devices = await create_devices(dbsession, 3)
+    loaders = get_loaders(dbsession)
+
+    with record_statements() as statements:
+        loaded = await asyncio.gather(
+            *(loaders.device().load(device.id) for device in devices),
+            loaders.device().load(-1),
+        )
+    assert len(statements) == 1
+    assert [device.id for device in loaded[:3]] == [device.id for device in devices]
+    assert loaded[3] is None
+
+    with record_statements() as statements:
+        by_uuid = await loaders.device("uuid").load(str(devices[0].uuid))
+        by_thing = await loaders.device("mainflux_thing_uuid").load(
+            devices[1].mainflux_thing_uuid,
+        )
+        missing = await loaders.device().load(-1)
+    assert statements == []
+    assert by_uuid is loaded[0]
+    assert by_thing is loaded[1]
+    assert missing is None
+
+
+@pytest.mark.anyio
+async def test_ownership_check_reuses_loaded_rows(
+    dbsession: AsyncSession,
+    record_statements: Callable[[], ContextManager[List[str]]],
+) -> None:
+    """A second ownership check in the same request makes no query."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(name="gateway", type="gateway", user_id=user.id)
+    dbsession.add(device)
+    await dbsession.flush()
+    tag = Tag(name=uuid.uuid4().hex, label="t", user_id=user.id, device_id=device.id)
+    dbsession.add(tag)
+    await dbsession.flush()
+    dbsession.expunge_all()
+    dao = OwnershipDAO(dbsession)
+
+    await dao.get_device_and_tag(device.id, tag.id, user.id)
+    with record_statements() as statements:
+        await dao.get_device_and_tag(device.id, tag.id, user.id)
+        loaded_tag = await get_loaders(dbsession).tag("name").load(tag.name)
+    assert statements == []
+    assert loaded_tag.id == tag.id
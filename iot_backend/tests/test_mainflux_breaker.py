@@ -0,0 +1,124 @@
+import pytest
+
+from iot_backend.services.mainflux.circuit_breaker import (
+    BreakerState,
+    CircuitBreaker,
+    MainfluxUnavailableError,
+)
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class UpstreamError(Exception):
+    """Mimics ApiException raised by the Mainflux client."""
+
+    def __init__(self, status: int) -> None:
+        super().__init__(status)
+        self.status = status
+
+
+def make_breaker(clock: FakeClock) -> CircuitBreaker:
+    """
+    Create a small breaker for tests.
+
+    :param clock: fake clock.
+    :return: breaker.
+    """
+    return CircuitBreaker(
+        name="test",
+        window_seconds=10,
+        min_calls=4,
+        error_rate=0.5,
+        slow_call_seconds=1,
+        slow_call_rate=0.9,
+        open_seconds=5,
+        half_open_probes=2,
+        timeout_min=0.1,
+        timeout_max=3,
+        clock=clock,
+    )
+
+
+def failing(**kwargs: object) -> None:
+    """
+    Upstream call that always fails with 502.
+
+    :param kwargs: ignored.
+    :raises UpstreamError: always.
+    """
+    raise UpstreamError(502)
+
+
+def test_opens_on_error_rate_and_fails_fast() -> None:
+    """Breaker opens after too many failures and returns 503 with Retry-After."""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        with pytest.raises(UpstreamError):
+            breaker.call(failing)
+    assert breaker.state == BreakerState.OPEN
+
+    clock.now = 2
+    with pytest.raises(MainfluxUnavailableError) as exc_info:
+        breaker.call(failing)
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "3"}
+
+
+def test_client_errors_do_not_trip() -> None:
+    """4xx answers come from a healthy upstream."""
+    breaker = make_breaker(FakeClock())
+
+    def not_found(**kwargs: object) -> None:
+        raise UpstreamError(404)
+
+    for _ in range(10):
+        with pytest.raises(UpstreamError):
+            breaker.call(not_found)
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_half_open_probing() -> None:
+    """Probes close the breaker on success and reopen it on failure."""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record(failed=True, duration=0.1)
+    assert breaker.state == BreakerState.OPEN
+
+    clock.now = 6
+    assert breaker.state == BreakerState.HALF_OPEN
+    with pytest.raises(UpstreamError):
+        breaker.call(failing)
+    assert breaker.state == BreakerState.OPEN
+
+    clock.now = 12
+    assert breaker.call(lambda **kwargs: "ok") == "ok"
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert breaker.call(lambda **kwargs: "ok") == "ok"
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_adaptive_timeout() -> None:
+    """Timeout follows observed latency within the configured bounds."""
+    breaker = make_breaker(FakeClock())
+    assert breaker.timeout == 3
+    for _ in range(20):
+        breaker.record(failed=False, duration=0.2)
+    assert breaker.timeout == pytest.approx(0.4)
+
+    seen = {}
+
+    def upstream(**kwargs: object) -> None:
+        seen.update(kwargs)
+
+    breaker.call(upstream)
+    assert seen["_request_timeout"] == pytest.approx(0.4)
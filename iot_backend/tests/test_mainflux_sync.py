@@ -0,0 +1,157 @@
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.message import Message
+from iot_backend.db.models.tag import Tag
+from iot_backend.services.mainflux.sync import MainfluxSyncWorker
+
+
+class StubReader:
+    """In-memory stand-in for the Mainflux reader API."""
+
+    def __init__(self) -> None:
+        self.messages: List[Dict[str, Any]] = []
+
+    def publish(self, count: int, step: float = 1) -> None:
+        """
+        Append new messages to the stream.
+
+        :param count: number of messages.
+        :param step: seconds between messages.
+        """
+        start = len(self.messages)
+        for index in range(start, start + count):
+            self.messages.append(
+                {"name": "temp", "unit": "C", "value": index, "time": index * step},
+            )
+
+    def channels_chan_id_messages_get(
+        self,
+        chan_id: str,
+        publisher: str,
+        offset: int,
+        limit: int,
+        **kwargs: Any,
+    ) -> SimpleNamespace:
+        """
+        Return a page of messages, newest first, like the real reader.
+
+        :param chan_id: channel id.
+        :param publisher: publisher id.
+        :param offset: page offset.
+        :param limit: page size.
+        :param kwargs: ignored client options.
+        :return: messages page.
+        """
+        newest_first = list(reversed(self.messages))
+        return SimpleNamespace(
+            total=len(self.messages),
+            messages=newest_first[offset : offset + limit],
+        )
+
+
+async def count_messages(dbsession: AsyncSession, tag_id: int) -> int:
+    """
+    Count stored messages of a tag.
+
+    :param dbsession: database session.
+    :param tag_id: tag id.
+    :return: messages count.
+    """
+    query = select(func.count()).select_from(Message).where(Message.tag_id == tag_id)
+    return (await dbsession.execute(query)).scalar_one()
+
+
+@pytest.mark.anyio
+async def test_incremental_sync(dbsession: AsyncSession) -> None:
+    """Sync copies only new messages and is safe to run repeatedly."""
+    device = Device(name="node", type="node", mainflux_thing_uuid=str(uuid.uuid4()))
+    dbsession.add(device)
+    await dbsession.flush()
+    tag = Tag(
+        name=uuid.uuid4().hex,
+        label="temperature",
+        mainflux_channel_uuid=uuid.uuid4(),
+        device_id=device.id,
+    )
+    dbsession.add(tag)
+    await dbsession.flush()
+
+    reader = StubReader()
+    worker = MainfluxSyncWorker(reader=reader, batch_size=40)
+
+    reader.publish(90)
+    assert await worker.sync_once(dbsession) == 90
+    reader.publish(15)
+    assert await worker.sync_once(dbsession) == 15
+    assert await worker.sync_once(dbsession) == 0
+
+    assert await count_messages(dbsession, tag.id) == 105
+    times = await dbsession.scalars(
+        select(Message.time).where(Message.tag_id == tag.id).order_by(Message.id),
+    )
+    assert list(times) == list(range(105))
+
+
+@pytest.mark.anyio
+async def test_sync_survives_dropped_messages(dbsession: AsyncSession) -> None:
+    """When the reader drops old messages, new ones are found by time."""
+    device = Device(name="node", type="node", mainflux_thing_uuid=str(uuid.uuid4()))
+    dbsession.add(device)
+    await dbsession.flush()
+    tag = Tag(
+        name=uuid.uuid4().hex,
+        label="temperature",
+        mainflux_channel_uuid=uuid.uuid4(),
+        device_id=device.id,
+    )
+    dbsession.add(tag)
+    await dbsession.flush()
+
+    reader = StubReader()
+    worker = MainfluxSyncWorker(reader=reader, batch_size=40)
+    reader.publish(90)
+    assert await worker.sync_once(dbsession) == 90
+
+    # Retention removes 60 old messages, then 5 new ones come in.
+    reader.publish(5)
+    del reader.messages[:60]
+    assert await worker.sync_once(dbsession) == 5
+    assert await worker.sync_once(dbsession) == 0
+
+    times = await dbsession.scalars(
+        select(Message.time).where(Message.tag_id == tag.id).order_by(Message.id),
+    )
+    assert list(times) == list(range(95))
+
+
+@pytest.mark.anyio
+async def test_resync_within_a_second(dbsession: AsyncSession) -> None:
+    """Messages in the second of the newest copied one aren't copied again."""
+    device = Device(name="node", type="node", mainflux_thing_uuid=str(uuid.uuid4()))
+    dbsession.add(device)
+    await dbsession.flush()
+    tag = Tag(
+        name=uuid.uuid4().hex,
+        label="temperature",
+        mainflux_channel_uuid=uuid.uuid4(),
+        device_id=device.id,
+    )
+    dbsession.add(tag)
+    await dbsession.flush()
+
+    reader = StubReader()
+    worker = MainfluxSyncWorker(reader=reader, batch_size=40)
+    # Four messages a second, the last copied one at 2.25s.
+    reader.publish(10, step=0.25)
+    assert await worker.sync_once(dbsession) == 10
+    reader.publish(2, step=0.25)
+    del reader.messages[:5]
+    assert await worker.sync_once(dbsession) == 2
+    assert await count_messages(dbsession, tag.id) == 12
@@ -0,0 +1,346 @@
+import asyncio
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, ContextManager, Dict, List, Tuple
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.notification_dao import NotificationDAO
+from iot_backend.db.models.alert import Alert
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.notification import Notification
+from iot_backend.db.models.users import User, current_active_user
+from iot_backend.services.notifications.delivery import (
+    Dispatcher,
+    Endpoint,
+    build_endpoints,
+)
+from iot_backend.services.notifications.outbox import (
+    DEAD_LETTER_STREAM,
+    OUTBOX_STREAM,
+    create_group,
+    publish_notifications,
+    read_entries,
+)
+from iot_backend.services.notifications.unread import (
+    adjust_unread,
+    get_unread,
+    unread_key,
+)
+from iot_backend.services.notifications.worker import NotificationWorker
+from iot_backend.settings import settings
+
+
+async def _create_user_device_alert(
+    dbsession: AsyncSession,
+) -> Tuple[User, Device, Alert]:
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(
+        name="meter",
+        type="node",
+        user_id=user.id,
+        mainflux_thing_uuid=uuid.uuid4(),
+    )
+    alert = Alert(
+        name=uuid.uuid4().hex,
+        comparator="Greater than",
+        threshold=1,
+        status="enabled",
+        check_external_id=uuid.uuid4().hex,
+        check_external_message_template="",
+        user_id=user.id,
+    )
+    dbsession.add_all([device, alert])
+    await dbsession.flush()
+    return user, device, alert
+
+
+def _event(device: Device, alert: Alert) -> Dict[str, Any]:
+    return {
+        "publisher": str(device.mainflux_thing_uuid),
+        "_check_id": alert.check_external_id,
+        "_message": "too hot",
+        "_level": "crit",
+        "_notification_endpoint_id": "endpoint",
+        "_notification_rule_id": "rule",
+    }
+
+
+@pytest.mark.anyio
+async def test_webhook_event_is_stored_and_delivered(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """Events are queued, then stored once and delivered with retries."""
+    user, device, alert = await _create_user_device_alert(dbsession)
+    event = _event(device, alert)
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await create_group(redis)
+        response = await client.post("/api/notifications/", json=event)
+        assert response.status_code == 202
+        missing = await client.post(
+            "/api/notifications/",
+            json={**event, "_check_id": "unknown"},
+        )
+        assert missing.status_code == 404
+        malformed = await client.post("/api/notifications/", json={"_level": "ok"})
+        assert malformed.status_code == 400
+
+        received: List[bytes] = []
+
+        def webhook(request: httpx.Request) -> httpx.Response:  # noqa: WPS430
+            received.append(request.content)
+            return httpx.Response(503 if len(received) == 1 else 204)
+
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(webhook),
+        ) as http:
+            endpoints = build_endpoints({"ops": "https://example.com/hook"}, http)
+            worker = NotificationWorker(Dispatcher(endpoints, backoff_seconds=0))
+            entries = await read_entries(redis, "test", 10, 0, 60000)
+            assert await worker.process(redis, dbsession, entries) == 1
+            # Handled again, e.g. by another worker after a crash.
+            assert await worker.process(redis, dbsession, entries) == 0
+            await worker.drain()
+
+        assert await redis.xlen(OUTBOX_STREAM) == 0
+
+    assert len(received) == 3
+    assert response.json()["uuid"] in received[-1].decode()
+    stored = await dbsession.scalar(
+        select(func.count()).where(Notification.device_id == device.id),
+    )
+    assert stored == 1
+
+
+@pytest.mark.anyio
+async def test_bulk_webhook_inserts_in_one_statement(
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+    assert_max_queries: Callable[[int], ContextManager[List[str]]],
+) -> None:
+    """Lookups are cached, notifications go in with a single insert."""
+    user, device, alert = await _create_user_device_alert(dbsession)
+    event = _event(device, alert)
+    events = [event] * 50 + [
+        {**event, "publisher": str(uuid.uuid4())},
+        {**event, "_check_id": "unknown"},
+    ]
+
+    with assert_max_queries(3):
+        response = await client.post("/api/notifications/bulk", json=events)
+    assert response.status_code == 202
+    assert response.json() == {
+        "created": 50,
+        "rejected": [
+            {"index": 50, "status": "device_not_found"},
+            {"index": 51, "status": "alert_not_found"},
+        ],
+    }
+    # Devices and alerts, known or not, are cached now.
+    with assert_max_queries(1):
+        response = await client.post("/api/notifications/bulk", json=events)
+    assert response.json()["created"] == 50
+
+    stored = await dbsession.scalar(
+        select(func.count()).where(Notification.device_id == device.id),
+    )
+    assert stored == 100
+    # Stored in UTC whatever the time zone of the database.
+    oldest = await dbsession.scalar(
+        select(func.min(Notification.created_at)).where(
+            Notification.device_id == device.id,
+        ),
+    )
+    assert abs(oldest - datetime.utcnow()) < timedelta(minutes=1)
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        assert await redis.xlen(OUTBOX_STREAM) == 100
+
+
+@pytest.mark.anyio
+async def test_unstorable_notifications_leave_the_outbox(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """A deleted alert or user doesn't hold back the rest of the batch."""
+    user, device, alert = await _create_user_device_alert(dbsession)
+    notification = {
+        "message": "too hot",
+        "level": "crit",
+        "check_id": alert.check_external_id,
+        "notification_endpoint_id": "endpoint",
+        "notification_rule_id": "rule",
+        "alert_id": alert.id,
+        "device_id": device.id,
+        "user_id": user.id,
+    }
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await create_group(redis)
+        await publish_notifications(
+            redis,
+            [
+                notification,
+                {**notification, "alert_id": alert.id + 1000},
+                {**notification, "user_id": uuid.uuid4()},
+            ],
+        )
+        worker = NotificationWorker(Dispatcher([]))
+        entries = await read_entries(redis, "test", 10, 0, 60000)
+        assert await worker.process(redis, dbsession, entries) == 2
+        await worker.drain()
+
+        assert await redis.xlen(OUTBOX_STREAM) == 0
+        (_, dead), *_ = await redis.xrange(DEAD_LETTER_STREAM)
+        assert b"foreign key" in dead[b"error"]
+
+    stored = await dbsession.execute(
+        select(Notification.alert_id, Notification.device_id).where(
+            Notification.user_id == user.id,
+        ),
+    )
+    assert set(stored.all()) == {(alert.id, device.id), (None, None)}
+
+
+class StalledEndpoint(Endpoint):
+    """Endpoint answering once it's released."""
+
+    def __init__(self) -> None:
+        super().__init__("stalled")
+        self.released = asyncio.Event()
+
+    async def send(self, notification: Dict[str, Any]) -> None:
+        """
+        Wait to be released.
+
+        :param notification: notification as stored.
+        """
+        await self.released.wait()
+
+
+@pytest.mark.anyio
+async def test_slow_deliveries_stay_with_their_worker(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Entries being delivered aren't claimed by other workers."""
+    monkeypatch.setattr(settings, "notification_claim_idle_seconds", 0.3)
+    user, device, alert = await _create_user_device_alert(dbsession)
+    endpoint = StalledEndpoint()
+    worker = NotificationWorker(Dispatcher([endpoint]))
+    assert worker.consumer.endswith(f":{os.getpid()}")
+
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+        await create_group(redis)
+        await publish_notifications(
+            redis,
+            [
+                {
+                    "message": "too hot",
+                    "level": "crit",
+                    "check_id": alert.check_external_id,
+                    "notification_endpoint_id": "endpoint",
+                    "notification_rule_id": "rule",
+                    "alert_id": alert.id,
+                    "device_id": device.id,
+                    "user_id": user.id,
+                },
+            ],
+        )
+        entries = await read_entries(redis, worker.consumer, 10, 0, 300)
+        assert await worker.process(redis, dbsession, entries) == 1
+        await asyncio.sleep(0.5)
+        assert await read_entries(redis, "other", 10, 0, 300) == []
+        endpoint.released.set()
+        await worker.drain()
+        assert await redis.xlen(OUTBOX_STREAM) == 0
+
+
+@pytest.mark.anyio
+async def test_unread_counts_and_feed(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    assert_max_queries: Callable[[int], ContextManager[List[str]]],
+) -> None:
+    """Counters follow inserts and reads, the feed pages newest first."""
+    user, device, alert = await _create_user_device_alert(dbsession)
+    fastapi_app.dependency_overrides[current_active_user] = lambda: user
+    event = _event(device, alert)
+    await client.post("/api/notifications/bulk", json=[event] * 3)
+
+    # Built from the database once, then kept in Redis.
+    response = await client.get("/api/notifications/unread")
+    assert response.json() == {"total": 3, "devices": {str(device.id): 3}}
+    await client.post("/api/notifications/bulk", json=[event] * 2)
+    with assert_max_queries(0):
+        response = await client.get("/api/notifications/unread")
+    assert response.json()["total"] == 5
+
+    feed = await client.get("/api/notifications/feed", params={"limit": 2})
+    ids = [notification["id"] for notification in feed.json()]
+    assert ids == sorted(ids, reverse=True)
+    response = await client.post("/api/notifications/read", json={"ids": ids})
+    assert response.json() == {"read": 2}
+    response = await client.get("/api/notifications/unread")
+    assert response.json() == {"total": 3, "devices": {str(device.id): 3}}
+
+    unread = await client.get(
+        "/api/notifications/feed",
+        params={"unread": True, "limit": 2},
+    )
+    next_page = await client.get(
+        "/api/notifications/feed",
+        params={"unread": True, "cursor": unread.headers["X-Next-Cursor"]},
+    )
+    unread_ids = [item["id"] for item in unread.json() + next_page.json()]
+    assert len(unread_ids) == 3
+    assert max(unread_ids) < min(ids)
+
+    response = await client.post(
+        "/api/notifications/read",
+        json={"device_id": device.id},
+    )
+    assert response.json() == {"read": 3}
+    response = await client.get("/api/notifications/unread")
+    assert response.json() == {"total": 0, "devices": {}}
+
+
+@pytest.mark.anyio
+async def test_unread_rebuild_keeps_concurrent_counts(
+    dbsession: AsyncSession,
+    fake_redis_pool: ConnectionPool,
+) -> None:
+    """A slow rebuild doesn't overwrite counts stored and moved meanwhile."""
+    user, device, _ = await _create_user_device_alert(dbsession)
+    async with Redis(connection_pool=fake_redis_pool) as redis:
+
+        class SlowDAO(NotificationDAO):
+            async def count_unread(self, user_id: uuid.UUID) -> Dict[Any, int]:
+                counts = await super().count_unread(user_id)
+                # Left out: no counts to add to yet.
+                await adjust_unread(redis, [(user.id, device.id)], 1)
+                if self is slow:
+                    await get_unread(redis, NotificationDAO(dbsession), user.id)
+                    await adjust_unread(redis, [(user.id, device.id)], 1)
+                return counts
+
+        slow = SlowDAO(dbsession)
+        counts = await get_unread(redis, slow, user.id)
+        assert counts == {"total": 1, str(device.id): 1}
+        ttl = await redis.ttl(unread_key(user.id))
+        assert 0 < ttl <= settings.notification_unread_ttl_seconds
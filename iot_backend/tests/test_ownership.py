@@ -0,0 +1,104 @@
+import uuid
+from typing import Callable, ContextManager, List
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.loaders import get_loaders
+from iot_backend.db.dao.ownership_dao import OwnershipDAO
+from iot_backend.db.models.action import Action
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.tag import Tag
+from iot_backend.db.models.users import User
+
+
+async def create_owned_resources(dbsession: AsyncSession) -> tuple:
+    """
+    Create a user with a device, a tag and an action.
+
+    :param dbsession: database session.
+    :return: user, device, tag and action.
+    """
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    device = Device(name="gateway", type="gateway", user_id=user.id)
+    dbsession.add(device)
+    await dbsession.flush()
+    tag = Tag(name=uuid.uuid4().hex, label="t", user_id=user.id, device_id=device.id)
+    action = Action(device_id=device.id, values=["on"])
+    dbsession.add_all([tag, action])
+    await dbsession.flush()
+    dbsession.expunge_all()
+    return user, device, tag, action
+
+
+@pytest.mark.anyio
+async def test_device_and_tag_single_round_trip(
+    dbsession: AsyncSession,
+    record_statements: Callable[[], ContextManager[List[str]]],
+) -> None:
+    """Device/tag ownership is checked with exactly one statement."""
+    user, device, tag, _ = await create_owned_resources(dbsession)
+    dao = OwnershipDAO(dbsession)
+
+    with record_statements() as statements:
+        loaded_device, loaded_tag = await dao.get_device_and_tag(
+            device.id,
+            tag.id,
+            user.id,
+        )
+    assert len(statements) == 1
+    assert (loaded_device.id, loaded_tag.id) == (device.id, tag.id)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await dao.get_device_and_tag(device.id, tag.id, uuid.uuid4())
+    assert exc_info.value.status_code == 403
+
+    with pytest.raises(HTTPException) as exc_info:
+        await dao.get_device_and_tag(device.id, -1, user.id)
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_tag_of_another_device_is_rejected(dbsession: AsyncSession) -> None:
+    """A tag only goes with its own device, even when both are owned."""
+    user, device, tag, _ = await create_owned_resources(dbsession)
+    other = Device(name="node", type="node", user_id=user.id)
+    dbsession.add(other)
+    await dbsession.flush()
+    dao = OwnershipDAO(dbsession)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await dao.get_device_and_tag(other.id, tag.id, user.id)
+    assert exc_info.value.status_code == 404
+
+    # Both rows are cached now, the pair is still checked.
+    await dao.get_device_and_tag(device.id, tag.id, user.id)
+    await get_loaders(dbsession).device().load(other.id)
+    with pytest.raises(HTTPException) as exc_info:
+        await dao.get_device_and_tag(other.id, tag.id, user.id)
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_device_and_action_single_round_trip(
+    dbsession: AsyncSession,
+    record_statements: Callable[[], ContextManager[List[str]]],
+) -> None:
+    """Action ownership goes through its device in one joined statement."""
+    user, device, _, action = await create_owned_resources(dbsession)
+    dao = OwnershipDAO(dbsession)
+
+    with record_statements() as statements:
+        loaded_device, loaded_action = await dao.get_device_and_action(
+            action.id,
+            user.id,
+        )
+    assert len(statements) == 1
+    assert loaded_action.device_id == loaded_device.id == device.id
+
+    with pytest.raises(HTTPException) as exc_info:
+        await dao.get_device_and_action(action.id, uuid.uuid4())
+    assert exc_info.value.status_code == 403
@@ -0,0 +1,209 @@
+import uuid
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.tag import Tag
+from iot_backend.db.models.users import User
+from iot_backend.services.mainflux.provisioning import (
+    DeviceProvisioner,
+    device_uuid,
+    tag_name,
+)
+from iot_backend.web.api.devices.schema import ProvisionManifestDTO, ProvisionStatus
+
+
+class StubMainflux:
+    """Records bulk calls and creates things and channels in memory."""
+
+    def __init__(self) -> None:
+        self.calls: List[str] = []
+        self.connections: List[Dict[str, Any]] = []
+        self.connect_failures = 0
+
+    def things_bulk_post(self, things: List[Dict[str, Any]], **kwargs: Any) -> dict:
+        """
+        Create things.
+
+        :param things: things to create.
+        :param kwargs: ignored client options.
+        :return: created things.
+        """
+        self.calls.append("things")
+        return {
+            "things": [
+                {"id": str(uuid.uuid4()), "key": str(uuid.uuid4()), **thing}
+                for thing in things
+            ],
+        }
+
+    def channels_bulk_post(
+        self,
+        channels: List[Dict[str, Any]],
+        **kwargs: Any,
+    ) -> dict:
+        """
+        Create channels.
+
+        :param channels: channels to create.
+        :param kwargs: ignored client options.
+        :return: created channels.
+        """
+        self.calls.append("channels")
+        return {
+            "channels": [
+                {"id": str(uuid.uuid4()), **channel} for channel in channels
+            ],
+        }
+
+    def connect_post(self, connection: Dict[str, Any], **kwargs: Any) -> None:
+        """
+        Connect things to channels.
+
+        :param connection: thing and channel IDs.
+        :param kwargs: ignored client options.
+        :raises RuntimeError: while failures are left.
+        """
+        if self.connect_failures:
+            self.connect_failures -= 1
+            raise RuntimeError("connect failed")
+        self.connections.append(connection)
+
+
+@pytest.mark.anyio
+async def test_provision_manifest_is_resumable(dbsession: AsyncSession) -> None:
+    """Devices are created once, a second run only reports them."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    site = uuid.uuid4().hex
+    manifest = ProvisionManifestDTO(
+        devices=[
+            {"key": f"{site}-gw", "type": "gateway"},
+            {
+                "key": f"{site}-n1",
+                "type": "node",
+                "parent_key": f"{site}-gw",
+                "tags": ["temp"],
+            },
+            {
+                "key": f"{site}-n2",
+                "type": "node",
+                "parent_key": f"{site}-gw",
+                "tags": ["temp"],
+            },
+            {"key": f"{site}-n3", "type": "node", "parent_key": "missing"},
+        ],
+        tag_templates={"temp": {"label": "Temperature", "unit": "C"}},
+    )
+    mainflux = StubMainflux()
+    provisioner = DeviceProvisioner(mainflux, mainflux, concurrency=2, chunk_size=2)
+
+    results = await provisioner.provision(dbsession, user.id, None, manifest)
+    assert [result.status for result in results] == [
+        ProvisionStatus.CREATED,
+        ProvisionStatus.CREATED,
+        ProvisionStatus.CREATED,
+        ProvisionStatus.FAILED,
+    ]
+    assert all(result.mainflux_thing_uuid for result in results[:3])
+    assert [result.tags for result in results[:3]] == [0, 1, 1]
+    # Two chunks, each with one bulk call for channels and one for things.
+    assert sorted(mainflux.calls) == ["channels", "channels", "things", "things"]
+    assert len(mainflux.connections) == 2
+
+    node_ids = [result.device_id for result in results[1:3]]
+    nodes = await dbsession.scalars(select(Device).where(Device.id.in_(node_ids)))
+    assert {node.parent_id for node in nodes} == {results[0].device_id}
+    name = tag_name(device_uuid(user.id, f"{site}-n1"), "temp")
+    tag = await dbsession.scalar(select(Tag).where(Tag.name == name))
+    assert tag.mainflux_channel_uuid is not None
+
+    mainflux.calls.clear()
+    again = await provisioner.provision(dbsession, user.id, None, manifest)
+    assert [result.status for result in again[:3]] == [ProvisionStatus.EXISTS] * 3
+    assert [result.device_id for result in again] == [
+        result.device_id for result in results
+    ]
+    assert mainflux.calls == []
+
+
+@pytest.mark.anyio
+async def test_failed_connects_are_resumed(dbsession: AsyncSession) -> None:
+    """Things are kept when connecting fails, a rerun only connects them."""
+    users = [
+        User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+        for _ in range(2)
+    ]
+    dbsession.add_all(users)
+    await dbsession.flush()
+    # Both users use the same manifest keys.
+    manifest = ProvisionManifestDTO(
+        devices=[
+            {"key": "n1", "type": "node", "tags": ["temp"]},
+            {"key": "n2", "type": "node", "tags": ["temp"]},
+        ],
+        tag_templates={"temp": {"label": "Temperature", "unit": "C"}},
+    )
+    mainflux = StubMainflux()
+    provisioner = DeviceProvisioner(mainflux, mainflux, chunk_size=2)
+    mainflux.connect_failures = 1
+
+    results = await provisioner.provision(dbsession, users[0].id, None, manifest)
+    assert [result.status for result in results] == [
+        ProvisionStatus.FAILED,
+        ProvisionStatus.CREATED,
+    ]
+    assert "not connected" in results[0].detail
+    assert all(result.mainflux_thing_uuid for result in results)
+
+    mainflux.calls.clear()
+    again = await provisioner.provision(dbsession, users[0].id, None, manifest)
+    assert [result.status for result in again] == [ProvisionStatus.EXISTS] * 2
+    assert again[0].mainflux_thing_uuid == results[0].mainflux_thing_uuid
+    assert mainflux.calls == []
+    assert len(mainflux.connections) == 2
+
+    other = await provisioner.provision(dbsession, users[1].id, None, manifest)
+    assert [result.status for result in other] == [ProvisionStatus.CREATED] * 2
+    assert [result.tags for result in other] == [1, 1]
+    assert [result.detail for result in other] == [None, None]
+
+
+@pytest.mark.anyio
+async def test_new_templates_reach_configured_devices(dbsession: AsyncSession) -> None:
+    """A rerun with another template creates and connects its channels."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    templates = {
+        "temp": {"label": "Temperature", "unit": "C"},
+        "hum": {"label": "Humidity", "unit": "%"},
+    }
+    manifest = ProvisionManifestDTO(
+        devices=[{"key": "n1", "type": "node", "tags": ["temp"]}],
+        tag_templates=templates,
+    )
+    mainflux = StubMainflux()
+    provisioner = DeviceProvisioner(mainflux, mainflux)
+    first = await provisioner.provision(dbsession, user.id, None, manifest)
+    assert first[0].status == ProvisionStatus.CREATED
+
+    mainflux.calls.clear()
+    mainflux.connections.clear()
+    manifest.devices[0].tags.append("hum")
+    again = await provisioner.provision(dbsession, user.id, None, manifest)
+    assert again[0].status == ProvisionStatus.EXISTS
+    assert again[0].tags == 2
+    assert mainflux.calls == ["channels"]
+    name = tag_name(device_uuid(user.id, "n1"), "hum")
+    tag = await dbsession.scalar(select(Tag).where(Tag.name == name))
+    assert mainflux.connections == [
+        {
+            "channel_ids": [str(tag.mainflux_channel_uuid)],
+            "thing_ids": [str(first[0].mainflux_thing_uuid)],
+        },
+    ]
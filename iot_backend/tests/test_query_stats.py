@@ -0,0 +1,82 @@
+import uuid
+from typing import Callable, ContextManager, List
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from loguru import logger
+from prometheus_client import REGISTRY
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.instrumentation import track_queries
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.users import User, current_active_user
+from iot_backend.settings import settings
+from iot_backend.web.query_stats import QueryStatsMiddleware
+
+
+@pytest.mark.anyio
+async def test_middleware_reports_queries(dbsession: AsyncSession) -> None:
+    """Statements of a request go to Server-Timing and the histograms."""
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, server_timing=True)
+
+    @app.get("/stats/{item}")
+    async def item_view(item: int) -> int:  # noqa: WPS430
+        await dbsession.execute(text("SELECT 1"))
+        return await dbsession.scalar(select(Device.id).limit(1)) or item
+
+    labels = {"method": "GET", "handler": "/stats/{item}"}
+    before = REGISTRY.get_sample_value("http_request_db_queries_sum", labels) or 0
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/stats/1")
+
+    assert response.headers["Server-Timing"].endswith('desc="2 queries"')
+    assert REGISTRY.get_sample_value("http_request_db_queries_sum", labels) == (
+        before + 2
+    )
+
+
+@pytest.mark.anyio
+async def test_assert_max_queries(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+    assert_max_queries: Callable[[int], ContextManager[List[str]]],
+) -> None:
+    """The helper passes within the limit and fails above it."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    dbsession.add_all(Device(name="node", type="node", user_id=user.id) for _ in "ab")
+    await dbsession.flush()
+    fastapi_app.dependency_overrides[current_active_user] = lambda: user
+
+    with assert_max_queries(1):
+        response = await client.get("/api/devices/")
+    assert len(response.json()) == 2
+
+    with pytest.raises(AssertionError, match="2 statements run"):
+        with assert_max_queries(1):
+            await client.get("/api/devices/", params={"count": "exact"})
+
+
+@pytest.mark.anyio
+async def test_repeated_statement_warning(
+    dbsession: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """A statement repeated past the threshold is reported once."""
+    monkeypatch.setattr(settings, "db_repeated_statement_threshold", 2)
+    messages: List[str] = []
+    sink = logger.add(messages.append, level="WARNING")
+    try:
+        with track_queries():
+            for device_id in range(5):
+                await dbsession.get(Device, device_id)
+    finally:
+        logger.remove(sink)
+
+    assert len(messages) == 1
+    assert "possible N+1" in messages[0]
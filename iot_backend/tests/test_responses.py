@@ -0,0 +1,51 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.users import User, current_active_user
+from iot_backend.web.api.pagination import NEXT_CURSOR_HEADER
+from iot_backend.web.responses import dump_json
+
+
+@pytest.mark.anyio
+async def test_fast_route_keeps_model_and_headers(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Fast responses match the response model and keep page headers."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    dbsession.add_all(
+        Device(name=f"node-{index}", type="node", user_id=user.id)
+        for index in range(3)
+    )
+    await dbsession.flush()
+    fastapi_app.dependency_overrides[current_active_user] = lambda: user
+
+    response = await client.get("/api/devices/", params={"limit": 2})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert NEXT_CURSOR_HEADER in response.headers
+    devices = response.json()
+    assert [device["name"] for device in devices] == ["node-0", "node-1"]
+    assert devices[0]["uuid"] == str(uuid.UUID(devices[0]["uuid"]))
+    assert "longitude" not in devices[0]
+
+    response = await client.get(
+        "/api/devices/",
+        params={"cursor": response.headers[NEXT_CURSOR_HEADER], "fields": "name"},
+    )
+    assert response.json() == [{"name": "node-2"}]
+
+
+def test_dump_json_handles_orm_rows() -> None:
+    """ORM rows are dumped by their loaded columns."""
+    device_uuid = uuid.uuid4()
+    body = dump_json([Device(id=1, uuid=device_uuid, name="gateway")])
+    assert body == f'[{{"id":1,"uuid":"{device_uuid}","name":"gateway"}}]'.encode()
@@ -0,0 +1,76 @@
+import uuid
+from typing import Any, Callable, ContextManager, Dict, List
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.tag_dao import TagDAO
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.tag import Tag
+from iot_backend.db.models.users import User
+from iot_backend.web.api.tags.schema import TagCreateStatus, TagInputDTO
+
+
+def tag_input(name: str, device_id: int) -> TagInputDTO:
+    """
+    Build a tag payload.
+
+    :param name: tag name.
+    :param device_id: device of the tag.
+    :return: tag payload.
+    """
+    fields: Dict[str, Any] = {
+        "label": "temperature",
+        "target": 0,
+        "unit": "C",
+        "multiplier": 1.0,
+        "mask": {},
+        "graphed": False,
+    }
+    return TagInputDTO(name=name, device_id=device_id, **fields)
+
+
+@pytest.mark.anyio
+async def test_bulk_create_reports_items(
+    dbsession: AsyncSession,
+    record_statements: Callable[[], ContextManager[List[str]]],
+) -> None:
+    """Bulk creation takes two statements and reports every item."""
+    users = [
+        User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+        for _ in range(2)
+    ]
+    dbsession.add_all(users)
+    await dbsession.flush()
+    own = Device(name="own", type="node", user_id=users[0].id)
+    foreign = Device(name="foreign", type="node", user_id=users[1].id)
+    dbsession.add_all([own, foreign])
+    await dbsession.flush()
+    taken = uuid.uuid4().hex
+    dbsession.add(Tag(name=taken, label="t", device_id=own.id, user_id=users[0].id))
+    await dbsession.flush()
+
+    fresh = [uuid.uuid4().hex for _ in range(2)]
+    payload = [
+        tag_input(fresh[0], own.id),
+        tag_input(taken, own.id),
+        tag_input(fresh[1], foreign.id),
+        tag_input(fresh[0], own.id),
+        tag_input(fresh[1], -1),
+    ]
+    with record_statements() as statements:
+        results = await TagDAO(dbsession).create_tags(users[0].id, payload)
+    assert len(statements) == 2
+
+    assert [result.status for result in results] == [
+        TagCreateStatus.CREATED,
+        TagCreateStatus.DUPLICATE,
+        TagCreateStatus.FORBIDDEN,
+        TagCreateStatus.DUPLICATE,
+        TagCreateStatus.DEVICE_NOT_FOUND,
+    ]
+    created = await dbsession.scalar(select(Tag).where(Tag.name == fresh[0]))
+    assert results[0].id == created.id
+    assert created.user_id == users[0].id
+    assert created.uuid is not None
@@ -0,0 +1,120 @@
+import uuid
+from typing import Callable, ContextManager, List
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from iot_backend.db.dao.device_dao import DeviceDAO
+from iot_backend.db.dao.ownership_dao import OwnershipDAO
+from iot_backend.db.models.device import Device
+from iot_backend.db.models.users import User, current_active_user
+
+
+async def create_tree(dbsession: AsyncSession, user: User) -> List[Device]:
+    """
+    Create a gateway with two nodes, the first one with a sub-node.
+
+    :param dbsession: database session.
+    :param user: owner of the gateway.
+    :return: gateway, nodes and sub-node.
+    """
+    gateway = Device(name="gw", type="gateway", user_id=user.id)
+    dbsession.add(gateway)
+    await dbsession.flush()
+    nodes = [
+        Device(name=f"node-{index}", type="node", parent_id=gateway.id)
+        for index in range(2)
+    ]
+    dbsession.add_all(nodes)
+    await dbsession.flush()
+    leaf = Device(name="leaf", type="node", parent_id=nodes[0].id)
+    dbsession.add(leaf)
+    await dbsession.flush()
+    return [gateway, *nodes, leaf]
+
+
+@pytest.mark.anyio
+async def test_subtree_and_ancestors(
+    dbsession: AsyncSession,
+    record_statements: Callable[[], ContextManager[List[str]]],
+) -> None:
+    """Subtree and ancestors come back from one query each."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    gateway, first, second, leaf = await create_tree(dbsession, user)
+    dao = DeviceDAO(dbsession)
+
+    with record_statements() as statements:
+        subtree = await dao.get_subtree(gateway.id)
+    assert len(statements) == 1
+    assert [(device.id, depth) for device, depth in subtree] == [
+        (gateway.id, 0),
+        (first.id, 1),
+        (second.id, 1),
+        (leaf.id, 2),
+    ]
+    assert len(await dao.get_subtree(gateway.id, max_depth=1)) == 3
+
+    ancestors = await dao.get_ancestors(leaf.id)
+    assert [device.id for device in ancestors] == [gateway.id, first.id]
+    assert await dao.get_ancestors(gateway.id) == []
+
+
+@pytest.mark.anyio
+async def test_access_is_inherited_from_ancestors(dbsession: AsyncSession) -> None:
+    """Owning a gateway gives access to the nodes below it."""
+    user = User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+    dbsession.add(user)
+    await dbsession.flush()
+    gateway, _, _, leaf = await create_tree(dbsession, user)
+    dao = OwnershipDAO(dbsession)
+
+    await dao.ensure_device_access(leaf.id, user.id)
+    with pytest.raises(HTTPException) as exc_info:
+        await dao.ensure_device_access(leaf.id, uuid.uuid4())
+    assert exc_info.value.status_code == 403
+    with pytest.raises(HTTPException) as exc_info:
+        await dao.ensure_device_access(-1, user.id)
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_foreign_devices_stay_hidden(
+    fastapi_app: FastAPI,
+    client: AsyncClient,
+    dbsession: AsyncSession,
+) -> None:
+    """Nobody attaches devices below, or sees the chain of, another user."""
+    owner, intruder = [
+        User(email=f"{uuid.uuid4().hex}@example.com", hashed_password="-")
+        for _ in range(2)
+    ]
+    dbsession.add_all([owner, intruder])
+    await dbsession.flush()
+    gateway, first, _, _ = await create_tree(dbsession, owner)
+    fastapi_app.dependency_overrides[current_active_user] = lambda: intruder
+
+    response = await client.post(
+        "/api/devices/",
+        json={"type": "node", "name": "spy", "parent_id": gateway.id},
+    )
+    assert response.status_code == 403
+
+    # A device attached before the check existed.
+    planted = Device(name="spy", type="node", user_id=intruder.id, parent_id=first.id)
+    dbsession.add(planted)
+    await dbsession.flush()
+    response = await client.get(f"/api/devices/{planted.id}/ancestors")
+    assert response.json() == []
+
+    subtree = await DeviceDAO(dbsession).get_subtree(gateway.id, user_id=owner.id)
+    assert planted.id not in {device.id for device, _ in subtree}
+    fastapi_app.dependency_overrides[current_active_user] = lambda: owner
+    response = await client.post(
+        "/api/devices/",
+        json={"type": "node", "name": "sensor", "parent_id": first.id},
+    )
+    assert response.status_code == 201
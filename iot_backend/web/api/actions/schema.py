@@ -2,6 +2,7 @@ from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 from datetime import datetime
 from enum import Enum
+from uuid import UUID
 
 
 class ActionStatus(str, Enum):
@@ -32,3 +33,18 @@ class ActionRead(ActionBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ActionOutcome(str, Enum):
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ActionAck(BaseModel):
+    status: ActionOutcome
+
+
+class ActionDispatch(BaseModel):
+    id: int
+    uuid: UUID
+    values: List[str]
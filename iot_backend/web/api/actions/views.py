@@ -1,10 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from redis.asyncio import ConnectionPool, Redis
 from iot_backend.db.dao.device_dao import DeviceDAO
+from iot_backend.db.dao.ownership_dao import OwnershipDAO
+from iot_backend.db.models.action import ActionStatus
 from iot_backend.db.models.users import User, current_active_user
-from iot_backend.web.api.actions.schema import ActionCreate, ActionRead
+from iot_backend.services.actions import (
+    enqueue_actions,
+    settle_action,
+    withdraw_action,
+)
+from iot_backend.services.actions.dependency import current_thing_device
+from iot_backend.services.actions.dispatch import next_action
+from iot_backend.services.redis.dependency import get_redis_pool
+from iot_backend.settings import settings
+from iot_backend.web.api.actions.schema import (
+    ActionAck,
+    ActionCreate,
+    ActionDispatch,
+    ActionRead,
+)
 from iot_backend.db.dao.action_dao import ActionDAO
+from iot_backend.web.responses import FastJSONRoute
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.post("/", response_model=ActionRead, status_code=status.HTTP_201_CREATED)
@@ -13,9 +33,84 @@ async def create_action(
     action_dao: ActionDAO = Depends(),
     device_dao: DeviceDAO = Depends(),
     user: User = Depends(current_active_user),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
     await device_dao.get_device(action_data.device_id, user.id)
-    return await action_dao.create(action_data)
+    action = await action_dao.create(action_data)
+    if action.is_enabled:
+        async with Redis(connection_pool=redis_pool) as redis:
+            await enqueue_actions(redis, [action])
+    return action
+
+
+@router.get(
+    "/poll",
+    response_model=ActionDispatch,
+    responses={status.HTTP_204_NO_CONTENT: {"description": "No action in time."}},
+)
+async def poll_action(
+    wait: float = Query(
+        default=settings.action_poll_seconds,
+        gt=0,
+        le=settings.action_poll_seconds,
+    ),
+    device_id: int = Depends(current_thing_device),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+):
+    """
+    Long-poll the next enabled action of the calling device.
+
+    Devices authenticate with their thing secret and wait on their queue
+    in Redis, so idle devices don't touch the database.
+
+    Args:
+        wait (float): most seconds to wait for an action.
+        device_id (int): the device, from its thing secret.
+        redis_pool (ConnectionPool): Redis connection pool holding the queues.
+
+    Returns:
+        ActionDispatch: the action, or 204 when none came in time.
+    """
+    async with Redis(connection_pool=redis_pool) as redis:
+        action = await next_action(redis, device_id, wait)
+    if action is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return action
+
+
+@router.post("/{action_uuid}/ack", status_code=status.HTTP_204_NO_CONTENT)
+async def acknowledge_action(
+    action_uuid: UUID,
+    ack: ActionAck,
+    device_id: int = Depends(current_thing_device),
+    action_dao: ActionDAO = Depends(),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+):
+    """
+    Report whether the calling device carried out an action.
+
+    Args:
+        action_uuid (UUID): UUID of the action.
+        ack (ActionAck): outcome of the action.
+        device_id (int): the device, from its thing secret.
+        action_dao (ActionDAO): The data access object for actions.
+        redis_pool (ConnectionPool): Redis connection pool holding the deadlines.
+
+    Raises:
+        HTTPException: 404 if the action isn't pending for the device.
+    """
+    action_id = await action_dao.acknowledge(
+        device_id,
+        action_uuid,
+        ActionStatus(ack.status.value),
+    )
+    if action_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No pending action with this UUID.",
+        )
+    async with Redis(connection_pool=redis_pool) as redis:
+        await settle_action(redis, device_id, action_id)
 
 
 @router.get(
@@ -23,10 +118,12 @@ async def create_action(
     response_model=ActionRead,
     dependencies=[Depends(current_active_user)],
 )
-async def get_action(action_id: int, action_dao: ActionDAO = Depends()):
-    action = await action_dao.get(action_id)
-    if not action:
-        raise HTTPException(status_code=404, detail="Action not found")
+async def get_action(
+    action_id: int,
+    ownership_dao: OwnershipDAO = Depends(),
+    user: User = Depends(current_active_user),
+):
+    _, action = await ownership_dao.get_device_and_action(action_id, user.id)
     return action
 
 
@@ -35,10 +132,22 @@ async def get_action(action_id: int, action_dao: ActionDAO = Depends()):
     response_model=ActionRead,
     dependencies=[Depends(current_active_user)],
 )
-async def update_action(action_id: int, action_dao: ActionDAO = Depends()):
-    """Toggle the is_enabled property of an action."""
-
-    return await action_dao.update(action_id)
+async def update_action(
+    action_id: int,
+    action_dao: ActionDAO = Depends(),
+    ownership_dao: OwnershipDAO = Depends(),
+    user: User = Depends(current_active_user),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+):
+    """Toggle the is_enabled property of an action, queueing enabled ones."""
+    _, action = await ownership_dao.get_device_and_action(action_id, user.id)
+    action = await action_dao.toggle(action)
+    async with Redis(connection_pool=redis_pool) as redis:
+        if action.is_enabled:
+            await enqueue_actions(redis, [action])
+        else:
+            await withdraw_action(redis, action)
+    return action
 
 
 @router.delete(
@@ -46,9 +155,14 @@ async def update_action(action_id: int, action_dao: ActionDAO = Depends()):
     status_code=status.HTTP_204_NO_CONTENT,
     dependencies=[Depends(current_active_user)],
 )
-async def delete_action(action_id: int, action_dao: ActionDAO = Depends()):
-    deleted_action = await action_dao.delete(action_id)
-    if not deleted_action:
-        raise HTTPException(status_code=404, detail="Action not found")
-
-
+async def delete_action(
+    action_id: int,
+    action_dao: ActionDAO = Depends(),
+    ownership_dao: OwnershipDAO = Depends(),
+    user: User = Depends(current_active_user),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+):
+    _, action = await ownership_dao.get_device_and_action(action_id, user.id)
+    async with Redis(connection_pool=redis_pool) as redis:
+        await withdraw_action(redis, action)
+    await action_dao.remove(action)
@@ -1,20 +1,39 @@
 from datetime import datetime
 from enum import Enum
+from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class Comparator(str, Enum):
     GREATER_THAN = "Greater than"
     LESS_THAN = "Less than"
     RANGE = "Range"
+    ANOMALY = "Anomaly"
+
+
+class WindowFunction(str, Enum):
+    MEAN = "mean"
+    MIN = "min"
+    MAX = "max"
+    COUNT = "count"
+    RATE = "rate"
 
 
 class AlertBase(BaseModel):
     name: str
     threshold: float
+    upper_threshold: Optional[float] = None
     comparator: Comparator
+    tag_id: Optional[int] = None
+    window_function: Optional[WindowFunction] = None
+    window_seconds: Optional[float] = Field(default=None, gt=0)
+    window_samples: Optional[int] = Field(default=None, gt=0)
+    for_seconds: Optional[float] = Field(default=None, ge=0)
+    hysteresis: Optional[float] = Field(default=None, ge=0)
+    renotify_seconds: Optional[float] = Field(default=None, gt=0)
+    anomaly_span: Optional[int] = Field(default=None, ge=2)
 
 
 class AlertInputDTO(AlertBase):
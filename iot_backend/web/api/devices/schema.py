@@ -1,9 +1,13 @@
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+from iot_backend.db.dao.base_dao import CountMode
+from iot_backend.web.api.actions.schema import ActionRead
+from iot_backend.web.api.tags.schema import TagDTO
 
 
 class DeviceType(str, Enum):
@@ -42,3 +46,106 @@ class DeviceDTO(BaseModel):
     org_id: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class DeviceLocationDTO(BaseModel):
+    id: int
+    name: Optional[str] = None
+    type: Optional[DeviceType] = None
+    longitude: float
+    latitude: float
+    distance_m: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class DeviceClusterDTO(BaseModel):
+    longitude: float
+    latitude: float
+    count: int
+    device_id: Optional[int] = None
+
+
+class DeviceSearchDTO(BaseModel):
+    contains: Dict[str, Any] = {}
+    has_keys: List[str] = []
+    limit: int = Field(default=10, ge=1, le=1000)
+    offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None
+    count: CountMode = CountMode.NONE
+
+
+class DeviceTreeNodeDTO(DeviceDTO):
+    depth: int
+
+
+class TagTemplateDTO(BaseModel):
+    label: str
+    target: int = 0
+    unit: str = ""
+    multiplier: float = 1.0
+    mask: dict = {}
+    graphed: bool = False
+
+
+class ProvisionDeviceDTO(BaseModel):
+    """
+    Device entry of a provisioning manifest.
+
+    ``key`` identifies the device within the user's manifests, so sending
+    the same manifest again resumes provisioning instead of duplicating it.
+    """
+
+    key: str = Field(min_length=1, max_length=100)
+    type: DeviceType
+    name: Optional[str] = None
+    meta_data: Optional[Dict[str, Any]] = {}
+    parent_key: Optional[str] = None
+    parent_id: Optional[int] = None
+    tags: List[str] = []
+
+
+class ProvisionManifestDTO(BaseModel):
+    devices: List[ProvisionDeviceDTO]
+    tag_templates: Dict[str, TagTemplateDTO] = {}
+    create_things: bool = True
+
+
+class ProvisionStatus(str, Enum):
+    CREATED = "created"
+    EXISTS = "exists"
+    FAILED = "failed"
+
+
+class ProvisionResultDTO(BaseModel):
+    key: str
+    status: ProvisionStatus
+    device_id: Optional[int] = None
+    mainflux_thing_uuid: Optional[UUID] = None
+    tags: int = 0
+    detail: Optional[str] = None
+
+
+class TagValueDTO(BaseModel):
+    value: float
+    unit: Optional[str] = None
+    time: int
+
+
+class DashboardTagDTO(TagDTO):
+    latest: Optional[TagValueDTO] = None
+
+
+class NotificationCountsDTO(BaseModel):
+    since: datetime
+    total: int
+    by_level: Dict[str, int] = {}
+
+
+class DeviceDashboardDTO(BaseModel):
+    """Everything the device page shows, returned by a single request."""
+
+    device: DeviceDTO
+    tags: List[DashboardTagDTO] = []
+    actions: List[ActionRead] = []
+    notifications: NotificationCountsDTO
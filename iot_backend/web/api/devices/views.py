@@ -1,34 +1,75 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Union
+
+from fastapi import APIRouter, HTTPException, Query, Response, status, Depends
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy.ext.asyncio import AsyncSession
 from iot_backend.db.dao.device_dao import DeviceDAO
 from iot_backend.db.dao.action_dao import ActionDAO
+from iot_backend.db.dao.dashboard_dao import DashboardDAO
+from iot_backend.db.dao.device_geo_dao import DeviceGeoDAO
+from iot_backend.db.dao.ownership_dao import OwnershipDAO
+from iot_backend.db.dependencies import get_db_session
 from iot_backend.db.models.users import User, current_active_user
+from iot_backend.services.mainflux.provisioning import DeviceProvisioner
+from iot_backend.services.redis.dependency import get_redis_pool
+from iot_backend.settings import settings
 from iot_backend.web.api.actions.schema import ActionRead
-from iot_backend.web.api.devices.schema import DeviceDTO, DeviceInputDTO
+from iot_backend.web.api.devices.schema import (
+    DeviceClusterDTO,
+    DeviceDashboardDTO,
+    DeviceDTO,
+    DeviceInputDTO,
+    DeviceLocationDTO,
+    DeviceSearchDTO,
+    DeviceTreeNodeDTO,
+    ProvisionManifestDTO,
+    ProvisionResultDTO,
+)
+from iot_backend.web.api.pagination import (
+    FieldSelector,
+    PageParams,
+    projected_response,
+    set_page_headers,
+)
+from iot_backend.web.responses import FastJSONRoute, RawJSONResponse
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.get(
     "/", dependencies=[Depends(current_active_user)], response_model=list[DeviceDTO]
 )
 async def get_devices(
+    response: Response,
     user: User = Depends(current_active_user),
-    limit: int = 10,
-    offset: int = 0,
+    page: PageParams = Depends(),
+    fields: Optional[list[str]] = Depends(FieldSelector(DeviceDTO)),
     device_dao: DeviceDAO = Depends(),
-) -> list[DeviceDTO]:
+) -> Union[list[DeviceDTO], Response]:
     """
-    Retrieve all device objects from the database.
+    Retrieve a page of device objects from the database.
+
+    The cursor of the next page and the total count are sent as headers.
+    With ``fields`` only those columns are read and returned.
 
-    :param limit: limit of device objects, defaults to 10.
-    :param offset: offset of device objects, defaults to 0.
+    :param page: limit, offset, cursor and count mode of the page.
+    :param fields: fields of the devices to return.
     :param device_dao: DAO for device models.
     :return: list of device objects from database.
     """
     devices = await device_dao.get_all_devices(
-        user_id=user.id, limit=limit, offset=offset
+        user_id=user.id,
+        limit=page.limit,
+        offset=page.offset,
+        cursor=page.cursor,
+        count=page.count,
+        fields=fields,
     )
-    return [DeviceDTO.model_validate(device) for device in devices]
+    if fields:
+        return projected_response(devices)
+    set_page_headers(response, devices)
+    return [DeviceDTO.model_validate(device) for device in devices.items]
 
 
 @router.post(
@@ -39,6 +80,7 @@ async def get_devices(
 async def create_device(
     new_device_object: DeviceInputDTO,
     device_dao: DeviceDAO = Depends(),
+    ownership_dao: OwnershipDAO = Depends(),
     user: User = Depends(current_active_user),
 ) -> None:
     """
@@ -46,7 +88,14 @@ async def create_device(
 
     :param new_device_object: new device model item.
     :param device_dao: DAO for device models.
+    :param ownership_dao: DAO for permission checks.
     """
+    if new_device_object.parent_id is not None:
+        # Devices can only be attached below devices the user may access.
+        await ownership_dao.ensure_device_access(
+            device_id=new_device_object.parent_id,
+            user_id=user.id,
+        )
     await device_dao.create_device_model(
         user_id=user.id,
         org_id=user.organization_id,
@@ -60,6 +109,204 @@ async def create_device(
     )
 
 
+@router.post(
+    "/search",
+    dependencies=[Depends(current_active_user)],
+    response_model=list[DeviceDTO],
+)
+async def search_devices(
+    search: DeviceSearchDTO,
+    response: Response,
+    fields: Optional[list[str]] = Depends(FieldSelector(DeviceDTO)),
+    device_dao: DeviceDAO = Depends(),
+    user: User = Depends(current_active_user),
+) -> Union[list[DeviceDTO], Response]:
+    """
+    Find devices by their metadata.
+
+    :param search: document the metadata must contain and keys it must have.
+    :param fields: fields of the devices to return.
+    :param device_dao: DAO for device models.
+    :return: matching devices.
+    """
+    devices = await device_dao.search_devices(
+        user_id=user.id,
+        contains=search.contains,
+        has_keys=search.has_keys,
+        limit=search.limit,
+        offset=search.offset,
+        cursor=search.cursor,
+        count=search.count,
+        fields=fields,
+    )
+    if fields:
+        return projected_response(devices)
+    set_page_headers(response, devices)
+    return [DeviceDTO.model_validate(device) for device in devices.items]
+
+
+@router.get(
+    "/geo/bbox",
+    dependencies=[Depends(current_active_user)],
+    response_model=list[DeviceLocationDTO],
+)
+async def get_devices_in_bbox(
+    west: float = Query(ge=-180, le=180),
+    south: float = Query(ge=-90, le=90),
+    east: float = Query(ge=-180, le=180),
+    north: float = Query(ge=-90, le=90),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    geo_dao: DeviceGeoDAO = Depends(),
+    user: User = Depends(current_active_user),
+) -> list[DeviceLocationDTO]:
+    """
+    Retrieve devices located inside a bounding box.
+
+    :param west: west longitude, greater than east if crossing 180.
+    :param south: south latitude.
+    :param east: east longitude.
+    :param north: north latitude.
+    :param limit: maximum number of devices.
+    :param geo_dao: DAO for spatial device queries.
+    :return: devices with their coordinates.
+    """
+    devices = await geo_dao.get_in_bbox(
+        user_id=user.id, west=west, south=south, east=east, north=north, limit=limit
+    )
+    return [DeviceLocationDTO.model_validate(device) for device in devices]
+
+
+@router.get(
+    "/geo/radius",
+    dependencies=[Depends(current_active_user)],
+    response_model=list[DeviceLocationDTO],
+)
+async def get_devices_in_radius(
+    longitude: float = Query(ge=-180, le=180),
+    latitude: float = Query(ge=-90, le=90),
+    radius_m: float = Query(gt=0, le=20_000_000),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    geo_dao: DeviceGeoDAO = Depends(),
+    user: User = Depends(current_active_user),
+) -> list[DeviceLocationDTO]:
+    """
+    Retrieve devices within a distance of a point, closest first.
+
+    :param longitude: longitude of the center.
+    :param latitude: latitude of the center.
+    :param radius_m: radius in meters.
+    :param limit: maximum number of devices.
+    :param geo_dao: DAO for spatial device queries.
+    :return: devices with their coordinates and distance.
+    """
+    devices = await geo_dao.get_in_radius(
+        user_id=user.id,
+        longitude=longitude,
+        latitude=latitude,
+        radius_m=radius_m,
+        limit=limit,
+    )
+    return [
+        DeviceLocationDTO.model_validate(device).model_copy(
+            update={"distance_m": distance},
+        )
+        for device, distance in devices
+    ]
+
+
+@router.get(
+    "/geo/nearest",
+    dependencies=[Depends(current_active_user)],
+    response_model=list[DeviceLocationDTO],
+)
+async def get_nearest_devices(
+    longitude: float = Query(ge=-180, le=180),
+    latitude: float = Query(ge=-90, le=90),
+    k: int = Query(default=10, ge=1, le=100),
+    geo_dao: DeviceGeoDAO = Depends(),
+    user: User = Depends(current_active_user),
+) -> list[DeviceLocationDTO]:
+    """
+    Retrieve the devices closest to a point.
+
+    :param longitude: longitude of the point.
+    :param latitude: latitude of the point.
+    :param k: number of devices.
+    :param geo_dao: DAO for spatial device queries.
+    :return: devices with their coordinates and distance, closest first.
+    """
+    devices = await geo_dao.get_nearest(
+        user_id=user.id, longitude=longitude, latitude=latitude, k=k
+    )
+    return [
+        DeviceLocationDTO.model_validate(device).model_copy(
+            update={"distance_m": distance},
+        )
+        for device, distance in devices
+    ]
+
+
+@router.get(
+    "/geo/clusters",
+    dependencies=[Depends(current_active_user)],
+    response_model=list[DeviceClusterDTO],
+)
+async def get_device_clusters(
+    west: float = Query(ge=-180, le=180),
+    south: float = Query(ge=-90, le=90),
+    east: float = Query(ge=-180, le=180),
+    north: float = Query(ge=-90, le=90),
+    zoom: int = Query(ge=0, le=24),
+    geo_dao: DeviceGeoDAO = Depends(),
+    user: User = Depends(current_active_user),
+) -> list[DeviceClusterDTO]:
+    """
+    Retrieve devices of a map view grouped into clusters.
+
+    :param west: west longitude, greater than east if crossing 180.
+    :param south: south latitude.
+    :param east: east longitude.
+    :param north: north latitude.
+    :param zoom: map zoom level, defines the cluster grid.
+    :param geo_dao: DAO for spatial device queries.
+    :return: clusters with their center and number of devices.
+    """
+    return await geo_dao.get_clusters(
+        user_id=user.id, west=west, south=south, east=east, north=north, zoom=zoom
+    )
+
+
+@router.post(
+    "/provision",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(current_active_user)],
+    response_model=list[ProvisionResultDTO],
+)
+async def provision_devices(
+    manifest: ProvisionManifestDTO,
+    session: AsyncSession = Depends(get_db_session),
+    provisioner: DeviceProvisioner = Depends(DeviceProvisioner.from_settings),
+    user: User = Depends(current_active_user),
+) -> list[ProvisionResultDTO]:
+    """
+    Create devices, their tags and Mainflux things from a manifest.
+
+    Sending the same manifest again is safe: existing devices and tags are
+    kept and only missing Mainflux things are created.
+
+    :param manifest: devices with their hierarchy and tag templates.
+    :param session: database session.
+    :param provisioner: provisioning service.
+    :return: outcome of every device, in manifest order.
+    """
+    return await provisioner.provision(
+        session=session,
+        user_id=user.id,
+        org_id=user.organization_id,
+        manifest=manifest,
+    )
+
+
 @router.get(
     "/{device_id}",
     dependencies=[Depends(current_active_user)],
@@ -81,6 +328,64 @@ async def get_device(
     return response
 
 
+@router.get(
+    "/{device_id}/subtree",
+    dependencies=[Depends(current_active_user)],
+    response_model=list[DeviceTreeNodeDTO],
+)
+async def get_device_subtree(
+    device_id: int,
+    max_depth: Optional[int] = Query(default=None, ge=0),
+    device_dao: DeviceDAO = Depends(),
+    ownership_dao: OwnershipDAO = Depends(),
+    user: User = Depends(current_active_user),
+) -> list[DeviceTreeNodeDTO]:
+    """
+    Retrieve a device with all devices below it.
+
+    :param device_id: id of the root device.
+    :param max_depth: deepest level to return, the root is level 0.
+    :param device_dao: DAO for device models.
+    :param ownership_dao: DAO for permission checks.
+    :return: devices with their depth, level by level.
+    """
+    await ownership_dao.ensure_device_access(device_id=device_id, user_id=user.id)
+    subtree = await device_dao.get_subtree(
+        device_id=device_id,
+        max_depth=max_depth,
+        user_id=user.id,
+    )
+    return [
+        DeviceTreeNodeDTO.model_validate(
+            {**DeviceDTO.model_validate(device).model_dump(), "depth": depth},
+        )
+        for device, depth in subtree
+    ]
+
+
+@router.get(
+    "/{device_id}/ancestors",
+    dependencies=[Depends(current_active_user)],
+    response_model=list[DeviceDTO],
+)
+async def get_device_ancestors(
+    device_id: int,
+    device_dao: DeviceDAO = Depends(),
+    ownership_dao: OwnershipDAO = Depends(),
+    user: User = Depends(current_active_user),
+) -> list[DeviceDTO]:
+    """
+    Retrieve the parent chain of a device.
+
+    :param device_id: id of the device.
+    :param device_dao: DAO for device models.
+    :param ownership_dao: DAO for permission checks.
+    :return: ancestors the user may see, from the highest down to the parent.
+    """
+    await ownership_dao.ensure_device_access(device_id=device_id, user_id=user.id)
+    return await device_dao.get_ancestors(device_id=device_id, user_id=user.id)
+
+
 @router.patch(
     "/{device_id}",
     status_code=status.HTTP_200_OK,
@@ -104,6 +409,33 @@ async def update_device_metadata(
     )
 
 
+@router.patch(
+    "/{device_id}/metadata",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(current_active_user)],
+    response_model=DeviceDTO,
+)
+async def merge_device_metadata(
+    device_id: int,
+    patch: Dict[str, Any],
+    device_dao: DeviceDAO = Depends(),
+    user: User = Depends(current_active_user),
+) -> DeviceDTO:
+    """
+    Update some metadata keys of a device (JSON merge patch).
+
+    Keys set to null are removed, keys missing from the patch are kept.
+
+    :param device_id: id of the device object.
+    :param patch: metadata keys to change.
+    :param device_dao: DAO for device models.
+    :return: updated device.
+    """
+    return await device_dao.merge_device_metadata(
+        device_id=device_id, user_id=user.id, patch=patch
+    )
+
+
 @router.patch(
     "/{device_id}/link",
     status_code=status.HTTP_200_OK,
@@ -124,6 +456,52 @@ async def link_device_to_user(
     await device_dao.patch_device_user_id(user_id=user.id, device_id=device_id)
 
 
+@router.get(
+    "/{device_id}/dashboard",
+    response_model=DeviceDashboardDTO,
+    dependencies=[Depends(current_active_user)],
+)
+async def get_device_dashboard(
+    device_id: int,
+    hours: int = Query(default=24, ge=1, le=720),
+    dashboard_dao: DashboardDAO = Depends(),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    user: User = Depends(current_active_user),
+) -> Response:
+    """
+    Get the device with its tags, latest values, enabled actions and
+    notification counts, in place of one request per widget.
+
+    The payload is built by a single query and cached per user in Redis
+    for ``settings.dashboard_cache_seconds``.
+
+    :param device_id: ID of the device.
+    :param hours: window of the notification counts.
+    :param dashboard_dao: DAO for the dashboard query.
+    :param redis_pool: redis connection pool.
+    :return: the dashboard.
+    """
+    key = f"dashboard:{user.id}:{device_id}:{hours}"
+    async with Redis(connection_pool=redis_pool) as redis:
+        body = await redis.get(key)
+    if body is None:
+        dashboard = DeviceDashboardDTO.model_validate(
+            await dashboard_dao.get_dashboard(
+                device_id,
+                user.id,
+                since=datetime.utcnow() - timedelta(hours=hours),
+            ),
+        )
+        body = dashboard.model_dump_json().encode()
+        async with Redis(connection_pool=redis_pool) as redis:
+            await redis.set(key, body, ex=settings.dashboard_cache_seconds)
+    response = RawJSONResponse(content=body)
+    response.headers["Cache-Control"] = (
+        f"private, max-age={settings.dashboard_cache_seconds}"
+    )
+    return response
+
+
 @router.get(
     "/{device_id}/actions",
     response_model=list[ActionRead],
@@ -1,33 +1,51 @@
-from typing import List
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Response, status
 from fastapi.param_functions import Depends
 
 from iot_backend.db.dao.group_dao import GroupDAO
 from iot_backend.db.models.group import Group
 from iot_backend.db.models.users import current_active_user
 from iot_backend.web.api.groups.schema import GroupDTO, GroupInputDTO
+from iot_backend.web.api.pagination import (
+    FieldSelector,
+    PageParams,
+    projected_response,
+    set_page_headers,
+)
+from iot_backend.web.responses import FastJSONRoute
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.get(
     "/", response_model=List[GroupDTO], dependencies=[Depends(current_active_user)]
 )
 async def get_groups(
-    limit: int = 10,
-    offset: int = 0,
+    response: Response,
+    page: PageParams = Depends(),
+    fields: Optional[List[str]] = Depends(FieldSelector(GroupDTO)),
     group_dao: GroupDAO = Depends(),
-) -> List[Group]:
+) -> Union[List[Group], Response]:
     """
-    Retrieve all group objects from the database.
+    Retrieve a page of group objects from the database.
 
-    :param limit: limit of group objects, defaults to 10.
-    :param offset: offset of group objects, defaults to 0.
+    :param page: limit, offset, cursor and count mode of the page.
+    :param fields: fields of the groups to return.
     :param group_dao: DAO for group models.
     :return: list of group objects from database.
     """
-    return await group_dao.get_all_groups(limit=limit, offset=offset)
+    groups = await group_dao.get_all_groups(
+        limit=page.limit,
+        offset=page.offset,
+        cursor=page.cursor,
+        count=page.count,
+        fields=fields,
+    )
+    if fields:
+        return projected_response(groups)
+    set_page_headers(response, groups)
+    return groups.items
 
 
 @router.post(
@@ -1,15 +1,19 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends
 
-from iot_backend.db.dao.device_dao import DeviceDAO
 from iot_backend.db.dao.message_dao import MessageDAO
+from iot_backend.db.dao.ownership_dao import OwnershipDAO
 from iot_backend.db.dao.tag_dao import TagDAO
-from iot_backend.db.models.device import Device
 from iot_backend.db.models.tag import Tag
+from iot_backend.services.alerts.dependency import get_alert_engine
+from iot_backend.services.alerts.engine import AlertEngine
 from iot_backend.web.api.messages.schema import MessageCreate
 from iot_backend.db.models.users import User, current_active_user
+from iot_backend.web.responses import FastJSONRoute
 
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.post("/{tag_id}/messages")
@@ -18,21 +22,21 @@ async def send_message(
     device_id: int,
     message: MessageCreate,
     message_dao: MessageDAO = Depends(),
-    tag_dao: TagDAO = Depends(),
-    device_dao: DeviceDAO = Depends(),
+    ownership_dao: OwnershipDAO = Depends(),
+    alert_engine: Optional[AlertEngine] = Depends(get_alert_engine),
     user: User = Depends(current_active_user),
 ):
-    """Creates Message model in the database."""
-    # TODO Valid id/name helper function
-
-    tag: Tag = await tag_dao.get_tag(tag_id, user.id)
-    device: Device = await device_dao.get_device(device_id, user.id)
+    """Creates Message model in the database and evaluates alerts of the tag."""
+    device, tag = await ownership_dao.get_device_and_tag(device_id, tag_id, user.id)
     message.publisher = device.mainflux_thing_uuid or "test"
     message.channel_id = tag.mainflux_channel_uuid or "test"
 
-    return await message_dao.create(
+    created = await message_dao.create(
         tag_id=tag.id, device_id=device.id, user_id=user.id, schema=message
     )
+    if alert_engine is not None:
+        alert_engine.evaluate(device.id, tag.id, message.value, message.time)
+    return created
 
 
 @router.get("/{tag_id}/messages")
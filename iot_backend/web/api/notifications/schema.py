@@ -1,8 +1,9 @@
 from datetime import datetime
 from enum import Enum
+from typing import Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class NotificationBase(BaseModel):
@@ -31,5 +32,52 @@ class NotificationDTO(NotificationBase):
     alert_id: int
     device_id: int
     user_id: UUID
+    read_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class NotificationReadDTO(BaseModel):
+    """Notifications to mark as read, all unread ones by default."""
+
+    ids: Optional[List[int]] = None
+    device_id: Optional[int] = None
+
+
+class UnreadCountDTO(BaseModel):
+    """Unread notifications of a user."""
+
+    total: int
+    devices: Dict[int, int]
+
+
+class CheckStatusEventDTO(BaseModel):
+    """Status event of a check, as posted by the check system."""
+
+    publisher: UUID
+    check_id: str = Field(alias="_check_id")
+    message: str = Field(alias="_message")
+    level: str = Field(alias="_level")
+    notification_endpoint_id: str = Field(alias="_notification_endpoint_id")
+    notification_rule_id: str = Field(alias="_notification_rule_id")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class CheckStatusEventStatus(str, Enum):
+    DEVICE_NOT_FOUND = "device_not_found"
+    ALERT_NOT_FOUND = "alert_not_found"
+
+
+class CheckStatusEventRejectionDTO(BaseModel):
+    """Event of a bulk webhook that got no notification."""
+
+    index: int
+    status: CheckStatusEventStatus
+
+
+class BulkNotificationResultDTO(BaseModel):
+    """Outcome of a bulk webhook."""
+
+    created: int
+    rejected: List[CheckStatusEventRejectionDTO]
@@ -1,8 +1,9 @@
 from typing import List, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from fastapi.param_functions import Depends
+from redis.asyncio import ConnectionPool, Redis
 
 from iot_backend.db.dao.alert_dao import AlertDAO
 from iot_backend.db.dao.device_dao import DeviceDAO
@@ -11,63 +12,183 @@ from iot_backend.db.models.alert import Alert
 from iot_backend.db.models.device import Device
 from iot_backend.db.models.notification import Notification
 from iot_backend.db.models.users import User, current_active_user
+from iot_backend.services.notifications import publish_notifications
+from iot_backend.services.notifications.lookups import resolve_alerts, resolve_devices
+from iot_backend.services.notifications.unread import (
+    TOTAL_FIELD,
+    adjust_unread,
+    get_unread,
+)
+from iot_backend.services.redis.dependency import get_redis_pool
+from iot_backend.settings import settings
+from iot_backend.web.api.notifications.schema import (
+    BulkNotificationResultDTO,
+    CheckStatusEventDTO,
+    CheckStatusEventRejectionDTO,
+    CheckStatusEventStatus,
+    NotificationDTO,
+    NotificationReadDTO,
+    UnreadCountDTO,
+)
+from iot_backend.web.api.pagination import (
+    NEXT_CURSOR_HEADER,
+    PageParams,
+    set_page_headers,
+)
+from iot_backend.web.responses import FastJSONRoute
 
 # from iot_backend.web.api.alerts.schema import NotificationDTO, NotificationInputDTO
 
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
-@router.post("/")
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
 async def create_notification(
     request: Request,
-    notification_dao: NotificationDAO = Depends(),
     device_dao: DeviceDAO = Depends(),
     alert_dao: AlertDAO = Depends(),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
 ):
     """
-    This function creates a new notification based on the request data.
+    This function queues a notification for a check status event.
+
+    The notification is stored and delivered to the notification endpoints
+    by the notification worker, the request doesn't wait for either.
 
     Args:
-        request (Request): The request object containing the notification details.
-        notification_dao (NotificationDAO, optional): The data access object for notifications. Defaults to Depends().
+        request (Request): The request object containing the check status event.
+        device_dao (DeviceDAO): The data access object for devices.
+        alert_dao (AlertDAO): The data access object for alerts.
+        redis_pool (ConnectionPool): Redis connection pool holding the outbox.
 
     Raises:
-        HTTPException: If there is an error in the request, it raises an HTTPException with a 400 status code.
+        HTTPException: 400 for a malformed event, 404 for an unknown device or alert.
 
     Returns:
-        dict: The created notification.
+        dict: The UUID of the queued notification.
     """
     try:
-        response = await request.json()
+        event = await request.json()
+        publisher = event["publisher"]
+        check_id = event["_check_id"]
+        values = {
+            "message": event["_message"],
+            "level": event["_level"],
+            "check_id": check_id,
+            "notification_endpoint_id": event["_notification_endpoint_id"],
+            "notification_rule_id": event["_notification_rule_id"],
+        }
+        device: Optional[Device] = await device_dao.get_by(
+            field="mainflux_thing_uuid", value=publisher, unique=True
+        )
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid check status event.",
+        )
+    alert: Optional[Alert] = await alert_dao.get_by(
+        field="check_external_id", value=check_id, unique=True
+    )
+    if device is None or alert is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown device or alert.",
+        )
 
-        device: Device = device_dao.get_by(
-            field="mainflux_thing_uuid", value=response["publisher"]
+    async with Redis(connection_pool=redis_pool) as redis:
+        (notification_uuid,) = await publish_notifications(
+            redis,
+            [
+                {
+                    **values,
+                    "alert_id": alert.id,
+                    "device_id": device.id,
+                    "user_id": alert.user_id,
+                },
+            ],
         )
-        alert: Alert = alert_dao.get_by(
-            field="check_external_id", value=response["_check_id"]
+    return {"uuid": notification_uuid}
+
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=BulkNotificationResultDTO,
+)
+async def create_notifications(
+    events: List[CheckStatusEventDTO],
+    notification_dao: NotificationDAO = Depends(),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+) -> BulkNotificationResultDTO:
+    """
+    This function stores notifications for a batch of check status events.
+
+    Devices and alerts are resolved through lookups cached by the process,
+    the notifications are inserted with a single statement, then queued
+    for delivery by the notification worker. Events of an unknown device
+    or alert are reported in the result instead of failing the batch.
+
+    Args:
+        events (List[CheckStatusEventDTO]): The check status events.
+        notification_dao (NotificationDAO): The data access object for notifications.
+        redis_pool (ConnectionPool): Redis connection pool holding the outbox.
+
+    Raises:
+        HTTPException: 413 for more events than allowed in one request.
+
+    Returns:
+        BulkNotificationResultDTO: The number of notifications and the rejected events.
+    """
+    if len(events) > settings.notification_bulk_max_events:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.notification_bulk_max_events} events per request.",
         )
+    session = notification_dao.session
+    device_ids = await resolve_devices(session, (event.publisher for event in events))
+    alerts = await resolve_alerts(session, (event.check_id for event in events))
 
-        notification = await notification_dao.create_notification(
-            message=response["_message"],
-            level=response["_level"],
-            check_id=response["_check_id"],
-            notification_endpoint_id=response["_notification_endpoint_id"],
-            notification_rule_id=response["_notification_rule_id"],
-            alert_id=alert.id,
-            device_id=device.id,
-            user_id=alert.user_id,
+    rows = []
+    rejected = []
+    for index, event in enumerate(events):
+        device_id = device_ids[event.publisher]
+        alert = alerts[event.check_id]
+        if device_id is None or alert is None:
+            rejected.append(
+                CheckStatusEventRejectionDTO(
+                    index=index,
+                    status=(
+                        CheckStatusEventStatus.DEVICE_NOT_FOUND
+                        if device_id is None
+                        else CheckStatusEventStatus.ALERT_NOT_FOUND
+                    ),
+                ),
+            )
+            continue
+        rows.append(
+            {
+                **event.model_dump(exclude={"publisher"}),
+                "uuid": uuid4(),
+                "alert_id": alert.alert_id,
+                "device_id": device_id,
+                "user_id": alert.user_id,
+            },
         )
-        return notification
 
-    except HTTPException:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST)
+    created = await notification_dao.bulk_create(rows)
+    await session.commit()
+    async with Redis(connection_pool=redis_pool) as redis:
+        await adjust_unread(redis, created, 1)
+        # Delivery only: the worker skips notifications already stored.
+        await publish_notifications(redis, rows)
+    return BulkNotificationResultDTO(created=len(created), rejected=rejected)
 
 
 @router.get("/")
 async def get_notification(
-    limit: int = 10,
-    offset: int = 0,
+    response: Response,
+    page: PageParams = Depends(),
     device_id: Optional[str] = None,
     alert_id: Optional[str] = None,
     notification_dao: NotificationDAO = Depends(),
@@ -77,8 +198,7 @@ async def get_notification(
     This function retrieves a list of notifications.
 
     Args:
-        limit (int, optional): The maximum number of notifications to return. Defaults to 10.
-        offset (int, optional): The number of notifications to skip before starting to return. Defaults to 0.
+        page (PageParams): Limit, offset, cursor and count mode of the page.
         device_id (str, optional): The device ID to filter notifications by. Defaults to None.
         alert_id (str, optional): The alert ID to filter notifications by. Defaults to None.
         notification_dao (NotificationDAO, optional): The data access object for notifications. Defaults to Depends().
@@ -86,6 +206,107 @@ async def get_notification(
     Returns:
         list: The list of notifications.
     """
-    return await notification_dao.get_all_notifications(
-        limit, offset, user.id, device_id, alert_id
+    notifications = await notification_dao.get_all_notifications(
+        page.limit,
+        page.offset,
+        user.id,
+        device_id,
+        alert_id,
+        cursor=page.cursor,
+        count=page.count,
+    )
+    set_page_headers(response, notifications)
+    return notifications.items
+
+
+@router.get("/feed", response_model=List[NotificationDTO])
+async def get_notification_feed(
+    response: Response,
+    limit: int = Query(10, ge=1, le=1000, description="Page size"),
+    cursor: Optional[str] = Query(
+        None,
+        description=f"Value of the {NEXT_CURSOR_HEADER} header of the last page",
+    ),
+    device_id: Optional[int] = None,
+    unread: bool = False,
+    notification_dao: NotificationDAO = Depends(),
+    user: User = Depends(current_active_user),
+):
+    """
+    This function retrieves the notifications of the user, newest first.
+
+    Args:
+        limit (int): The page size.
+        cursor (str, optional): The cursor of the previous page.
+        device_id (int, optional): The device ID to filter notifications by. Defaults to None.
+        unread (bool): Whether to only return unread notifications. Defaults to False.
+        notification_dao (NotificationDAO, optional): The data access object for notifications. Defaults to Depends().
+
+    Returns:
+        list: The page of notifications.
+    """
+    notifications = await notification_dao.get_feed(
+        user.id,
+        limit,
+        cursor=cursor,
+        device_id=device_id,
+        unread=unread,
+    )
+    set_page_headers(response, notifications)
+    return notifications.items
+
+
+@router.get("/unread", response_model=UnreadCountDTO)
+async def get_unread_count(
+    notification_dao: NotificationDAO = Depends(),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    user: User = Depends(current_active_user),
+) -> UnreadCountDTO:
+    """
+    This function retrieves the unread notification counts of the user.
+
+    Counts are kept in Redis, so refreshing badges doesn't touch the database.
+
+    Args:
+        notification_dao (NotificationDAO): The data access object for notifications.
+        redis_pool (ConnectionPool): Redis connection pool holding the counters.
+
+    Returns:
+        UnreadCountDTO: The total unread count and the count of every device.
+    """
+    async with Redis(connection_pool=redis_pool) as redis:
+        counts = await get_unread(redis, notification_dao, user.id)
+    total = counts.pop(TOTAL_FIELD, 0)
+    return UnreadCountDTO(
+        total=total,
+        devices={int(device_id): count for device_id, count in counts.items() if count},
+    )
+
+
+@router.post("/read")
+async def read_notifications(
+    selection: NotificationReadDTO,
+    notification_dao: NotificationDAO = Depends(),
+    redis_pool: ConnectionPool = Depends(get_redis_pool),
+    user: User = Depends(current_active_user),
+):
+    """
+    This function marks notifications of the user as read.
+
+    Args:
+        selection (NotificationReadDTO): The notification IDs and/or device ID, all unread notifications by default.
+        notification_dao (NotificationDAO): The data access object for notifications.
+        redis_pool (ConnectionPool): Redis connection pool holding the counters.
+
+    Returns:
+        dict: The number of notifications marked as read.
+    """
+    marked = await notification_dao.mark_read(
+        user.id,
+        ids=selection.ids,
+        device_id=selection.device_id,
     )
+    await notification_dao.session.commit()
+    async with Redis(connection_pool=redis_pool) as redis:
+        await adjust_unread(redis, marked, -1)
+    return {"read": len(marked)}
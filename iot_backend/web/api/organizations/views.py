@@ -1,6 +1,6 @@
-from typing import List
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, HTTPException, Path, Query, status
+from fastapi import APIRouter, HTTPException, Path, Response, status
 from fastapi.param_functions import Depends
 from pydantic import BaseModel
 
@@ -11,8 +11,15 @@ from iot_backend.web.api.organizations.schema import (
     OrganizationResponse,
     OrganizationCreate,
 )
+from iot_backend.web.api.pagination import (
+    FieldSelector,
+    PageParams,
+    projected_response,
+    set_page_headers,
+)
+from iot_backend.web.responses import FastJSONRoute
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 class NotFoundError(BaseModel):
@@ -33,20 +40,31 @@ class BadRequest(BaseModel):
     dependencies=[Depends(current_active_user)],
 )
 async def get_organizations(
-    limit: int = Query(10, description="Limit the number of organizations returned"),
-    offset: int = Query(0, description="Offset for pagination"),
+    response: Response,
+    page: PageParams = Depends(),
+    fields: Optional[List[str]] = Depends(FieldSelector(OrganizationResponse)),
     organization_dao: OrganizationDAO = Depends(),
-) -> List[Organization]:
+) -> Union[List[Organization], Response]:
     """
     #TODO access should be for admins only.
     Retrieve all organization objects from the database.
 
-    :param limit: limit of organization objects, defaults to 10.
-    :param offset: offset of organization objects, defaults to 0.
+    :param page: limit, offset, cursor and count mode of the page.
+    :param fields: fields of the organizations to return.
     :param organization_dao: DAO for organization models.
     :return: list of organization objects from database.
     """
-    return await organization_dao.list(limit=limit, offset=offset)
+    organizations = await organization_dao.list_page(
+        limit=page.limit,
+        offset=page.offset,
+        cursor=page.cursor,
+        count=page.count,
+        fields=fields,
+    )
+    if fields:
+        return projected_response(organizations)
+    set_page_headers(response, organizations)
+    return organizations.items
 
 
 @router.post(
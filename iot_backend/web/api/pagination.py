@@ -0,0 +1,99 @@
+from typing import Any, List, Optional, Type
+
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel
+
+from iot_backend.db.dao.base_dao import CountMode, Page
+from iot_backend.web.responses import RawJSONResponse, dump_json
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+PAGE_HEADERS = [NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER]
+
+
+class PageParams:
+    """Query parameters shared by list endpoints."""
+
+    def __init__(
+        self,
+        limit: int = Query(10, ge=1, le=10000, description="Page size"),
+        offset: int = Query(
+            0,
+            ge=0,
+            description="Rows to skip, ignored with a cursor (prefer cursor)",
+        ),
+        cursor: Optional[str] = Query(
+            None,
+            description=f"Value of the {NEXT_CURSOR_HEADER} header of the last page",
+        ),
+        count: CountMode = Query(
+            CountMode.NONE,
+            description=f"How to compute the {TOTAL_COUNT_HEADER} header",
+        ),
+    ):
+        self.limit = limit
+        self.offset = offset
+        self.cursor = cursor
+        self.count = count
+
+
+def set_page_headers(response: Response, page: Page[Any]) -> None:
+    """
+    Expose the cursor of the next page and the total count as headers.
+
+    The body of list endpoints stays a plain list.
+
+    :param response: response of the endpoint.
+    :param page: page returned by the DAO.
+    """
+    if page.next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    if page.total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(page.total)
+
+
+class FieldSelector:
+    """
+    Dependency parsing ``fields=``, a comma-separated subset of the fields
+    of a response schema.
+
+    Gives None when the parameter is missing, i.e. the full schema.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.allowed = list(schema.model_fields)
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(
+            None,
+            description="Comma-separated fields to return, all by default",
+        ),
+    ) -> Optional[List[str]]:
+        if not fields:
+            return None
+        requested = list(
+            dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()),
+        )
+        unknown = [name for name in requested if name not in self.allowed]
+        if unknown or not requested:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {unknown}. Allowed: {self.allowed}.",
+            )
+        return requested
+
+
+def projected_response(page: Page[Any]) -> Response:
+    """
+    Serialize a page of dicts selected with ``fields=``.
+
+    Rows are written as JSON directly, without building a response model
+    for each of them, and carry the page headers.
+
+    :param page: page of dicts returned by the DAO.
+    :return: JSON response.
+    """
+    response = RawJSONResponse(content=dump_json(page.items))
+    set_page_headers(response, page)
+    return response
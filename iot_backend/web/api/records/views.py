@@ -1,6 +1,7 @@
 from typing import Annotated, Optional
 
 from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.param_functions import Depends
 from mainflux_client.models.messages_page import MessagesPage
 from mainflux_client.rest import ApiException
@@ -9,7 +10,11 @@ from pydantic import StrictStr
 from iot_backend.db.dao.device_dao import DeviceDAO
 from iot_backend.db.models.device import Device
 from iot_backend.db.models.users import User, current_active_user
-from iot_backend.services.mainflux import get_channels_api, get_reader_api
+from iot_backend.services.mainflux import (
+    call_mainflux,
+    get_channels_api,
+    get_reader_api,
+)
 from iot_backend.settings import settings
 
 router = APIRouter()
@@ -48,18 +53,27 @@ async def receive(
 
     Raises:
         HTTPException: If an error occurs during the API call.
+        MainfluxUnavailableError: If the Mainflux circuit breaker is open.
     """
     device: Device = await device_dao.get_device(device_id=device_id, user_id=user.id)
     try:
         reader_api = get_reader_api(settings.mainflux_token)
         channels_api = get_channels_api(settings.mainflux_token)
 
-        channels = channels_api.channels_get(name=tag_name).channels
+        # The Mainflux client is blocking, keep it off the event loop.
+        channels_page = await run_in_threadpool(
+            call_mainflux,
+            channels_api.channels_get,
+            name=tag_name,
+        )
+        channels = channels_page.channels
         if len(channels) == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
         channel_id = channels[0].id
 
-        records = reader_api.channels_chan_id_messages_get(
+        records = await run_in_threadpool(
+            call_mainflux,
+            reader_api.channels_chan_id_messages_get,
             chan_id=channel_id,
             publisher=str(device.mainflux_thing_uuid),
             limit=limit,
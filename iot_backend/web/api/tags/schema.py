@@ -1,7 +1,8 @@
-from typing import Optional
+from enum import Enum
+from typing import List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class TagBase(BaseModel):
@@ -27,3 +28,55 @@ class TagDTO(TagBase):
     user_id: Optional[UUID] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class TagCreateStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    FORBIDDEN = "forbidden"
+    DEVICE_NOT_FOUND = "device_not_found"
+
+
+class TagCreateResultDTO(BaseModel):
+    """Outcome of one item of a bulk tag creation."""
+
+    index: int
+    name: str
+    status: TagCreateStatus
+    id: Optional[int] = None
+
+
+class TagBacktestInputDTO(BaseModel):
+    """
+    Candidate alert to replay over the stored values of a tag.
+
+    Comparator and window function take the values of alerts, they are
+    checked when the alert is compiled.
+    """
+
+    comparator: str
+    threshold: float
+    upper_threshold: Optional[float] = None
+    window_function: Optional[str] = None
+    window_seconds: Optional[float] = Field(default=None, gt=0)
+    window_samples: Optional[int] = Field(default=None, gt=0)
+    for_seconds: Optional[float] = Field(default=None, ge=0)
+    hysteresis: Optional[float] = Field(default=None, ge=0)
+    anomaly_span: Optional[int] = Field(default=None, ge=2)
+    # Unix times of the replayed range, all stored values by default.
+    start: Optional[int] = None
+    end: Optional[int] = None
+
+
+class FiringIntervalDTO(BaseModel):
+    start: float
+    end: Optional[float] = None
+
+
+class TagBacktestResultDTO(BaseModel):
+    """How often the candidate alert would have fired."""
+
+    samples: int
+    firings: int
+    firing_seconds: float
+    intervals: List[FiringIntervalDTO]
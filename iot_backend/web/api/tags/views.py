@@ -1,36 +1,66 @@
-from typing import Optional
+from concurrent.futures import Executor
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 
 from iot_backend.db.dao.tag_dao import TagDAO
+from iot_backend.db.models.alert import Alert
 from iot_backend.db.models.users import User, current_active_user
-from iot_backend.web.api.tags.schema import TagDTO, TagInputDTO
+from iot_backend.services.alerts.backtest import BacktestSpec, backtest
+from iot_backend.services.alerts.dependency import get_backtest_pool
+from iot_backend.settings import settings
+from iot_backend.web.api.pagination import (
+    FieldSelector,
+    PageParams,
+    projected_response,
+    set_page_headers,
+)
+from iot_backend.web.api.tags.schema import (
+    FiringIntervalDTO,
+    TagBacktestInputDTO,
+    TagBacktestResultDTO,
+    TagCreateResultDTO,
+    TagDTO,
+    TagInputDTO,
+)
+from iot_backend.web.responses import FastJSONRoute
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.get(
     "/", dependencies=[Depends(current_active_user)], response_model=list[TagDTO]
 )
 async def get_tags(
+    response: Response,
     device_id: Optional[int] = None,
-    limit: Optional[int] = 10,
-    offset: Optional[int] = 0,
+    page: PageParams = Depends(),
+    fields: Optional[list[str]] = Depends(FieldSelector(TagDTO)),
     user: User = Depends(current_active_user),
     tag_dao: TagDAO = Depends(),
-) -> list[TagDTO]:
+) -> Union[list[TagDTO], Response]:
     """
-    Retrieve all tag objects from the database.
+    Retrieve a page of tag objects from the database.
 
     :param device_id: ID of the device (optional).
-    :param limit: limit of tag objects, defaults to 10.
-    :param offset: offset of tag objects, defaults to 0.
+    :param page: limit, offset, cursor and count mode of the page.
+    :param fields: fields of the tags to return.
     :param tag_dao: DAO for tag models.
     :return: list of tag objects from database.
     """
-    return await tag_dao.get_all_tags(
-        user_id=user.id, limit=limit, offset=offset, device_id=device_id
+    tags = await tag_dao.get_all_tags(
+        user_id=user.id,
+        limit=page.limit,
+        offset=page.offset,
+        device_id=device_id,
+        cursor=page.cursor,
+        count=page.count,
+        fields=fields,
     )
+    if fields:
+        return projected_response(tags)
+    set_page_headers(response, tags)
+    return tags.items
 
 
 @router.post(
@@ -56,17 +86,22 @@ async def create_tag(
     "/bulk",
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(current_active_user)],
+    response_model=list[TagCreateResultDTO],
 )
 async def create_tags(
     new_tags: list[TagInputDTO],
     tag_dao: TagDAO = Depends(),
     user: User = Depends(current_active_user),
-) -> None:
+) -> list[TagCreateResultDTO]:
     """
     Creates multiple tag models in the database.
 
+    Items that can't be created (duplicate name, foreign or missing
+    device) are reported in the result instead of failing the batch.
+
     :param new_tags: list of new tag model items.
     :param tag_dao: DAO for tag models.
+    :return: outcome of every item, in input order.
     """
     return await tag_dao.create_tags(user_id=user.id, tags=new_tags)
 
@@ -90,6 +125,50 @@ async def get_tag(
     return response
 
 
+@router.post("/{tag_id}/backtest", response_model=TagBacktestResultDTO)
+async def backtest_tag(
+    tag_id: int,
+    candidate: TagBacktestInputDTO,
+    tag_dao: TagDAO = Depends(),
+    pool: Optional[Executor] = Depends(get_backtest_pool),
+    user: User = Depends(current_active_user),
+) -> TagBacktestResultDTO:
+    """
+    Replay the stored values of a tag through a candidate alert.
+
+    Long ranges are split in time slices replayed by a process pool.
+
+    :param tag_id: id of the tag object.
+    :param candidate: candidate alert and replayed range.
+    :param tag_dao: DAO for tag models.
+    :param pool: process pool of backtests.
+    :return: firings of the candidate alert, at most backtest_max_intervals.
+    """
+    await tag_dao.get_tag(tag_id=tag_id, user_id=user.id)
+    alert = Alert(**candidate.model_dump(exclude={"start", "end"}))
+    try:
+        spec = BacktestSpec.from_alert(alert)
+        result = await backtest(
+            tag_dao.session,
+            tag_id,
+            spec,
+            start=candidate.start,
+            end=candidate.end,
+            pool=pool,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return TagBacktestResultDTO(
+        samples=result.samples,
+        firings=len(result.intervals),
+        firing_seconds=result.firing_seconds,
+        intervals=[
+            FiringIntervalDTO(start=start, end=end)
+            for start, end in result.intervals[: settings.backtest_max_intervals]
+        ],
+    )
+
+
 @router.patch(
     "/{tag_id}/show",
     status_code=status.HTTP_200_OK,
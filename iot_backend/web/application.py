@@ -5,7 +5,6 @@ from pathlib import Path
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import UJSONResponse
 from fastapi.staticfiles import StaticFiles
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.logging import LoggingIntegration
@@ -23,10 +22,14 @@ from iot_backend.admin import (
     MessageView,
     authentication_backend,
 )
+from iot_backend.db.instrumentation import instrument_engine
 from iot_backend.logging import configure_logging
 from iot_backend.settings import settings
+from iot_backend.web.api.pagination import PAGE_HEADERS
 from iot_backend.web.api.router import api_router
 from iot_backend.web.lifetime import register_shutdown_event, register_startup_event
+from iot_backend.web.query_stats import QueryStatsMiddleware
+from iot_backend.web.responses import FastJSONResponse
 
 APP_ROOT = Path(__file__).parent.parent
 
@@ -63,7 +66,7 @@ def get_app() -> FastAPI:
         docs_url=None,
         redoc_url=None,
         openapi_url="/api/openapi.json",
-        default_response_class=UJSONResponse,
+        default_response_class=FastJSONResponse,
     )
     # Adds CORS middleware
     app.add_middleware(
@@ -71,6 +74,12 @@ def get_app() -> FastAPI:
         allow_origins=["*"],  # Replace "*" with your desired origins
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[*PAGE_HEADERS, "Server-Timing"],
+    )
+    # Counts database statements and time of every request.
+    app.add_middleware(
+        QueryStatsMiddleware,
+        server_timing=settings.environment == "dev",
     )
     # Adds startup and shutdown events.
     register_startup_event(app)
@@ -86,10 +95,12 @@ def get_app() -> FastAPI:
         name="docs",
     )
 
+    admin_engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    instrument_engine(admin_engine)
     admin = Admin(
         app=app,
         authentication_backend=authentication_backend,
-        engine=create_async_engine(str(settings.db_url), echo=settings.db_echo),
+        engine=admin_engine,
         debug=True,
         # templates_dir="app/admin/templates"
     )
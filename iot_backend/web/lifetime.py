@@ -6,6 +6,25 @@ from prometheus_fastapi_instrumentator.instrumentation import (
 )
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from iot_backend.db.instrumentation import instrument_engine
+from iot_backend.services.actions.lifetime import (
+    init_action_scheduler,
+    shutdown_action_scheduler,
+)
+from iot_backend.services.alerts.lifetime import (
+    init_alert_engine,
+    init_backtest_pool,
+    shutdown_alert_engine,
+    shutdown_backtest_pool,
+)
+from iot_backend.services.mainflux.lifetime import (
+    init_mainflux_sync,
+    shutdown_mainflux_sync,
+)
+from iot_backend.services.notifications.lifetime import (
+    init_notification_worker,
+    shutdown_notification_worker,
+)
 from iot_backend.services.redis.lifetime import init_redis, shutdown_redis
 from iot_backend.settings import settings
 
@@ -21,6 +40,7 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     :param app: fastAPI application.
     """
     engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    instrument_engine(engine)
     session_factory = async_sessionmaker(
         engine,
         expire_on_commit=False,
@@ -58,6 +78,11 @@ def register_startup_event(
         app.middleware_stack = None
         _setup_db(app)
         init_redis(app)
+        await init_alert_engine(app)
+        init_backtest_pool(app)
+        init_notification_worker(app)
+        init_action_scheduler(app)
+        init_mainflux_sync(app)
         setup_prometheus(app)
         app.middleware_stack = app.build_middleware_stack()
         pass  # noqa: WPS420
@@ -77,6 +102,11 @@ def register_shutdown_event(
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:  # noqa: WPS430
+        await shutdown_mainflux_sync(app)
+        await shutdown_alert_engine(app)
+        shutdown_backtest_pool(app)
+        await shutdown_notification_worker(app)
+        await shutdown_action_scheduler(app)
         await app.state.db_engine.dispose()
 
         await shutdown_redis(app)
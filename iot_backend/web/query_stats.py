@@ -0,0 +1,74 @@
+from typing import Any, Optional
+
+from prometheus_client import Histogram
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from iot_backend.db.instrumentation import QueryStats, track_queries
+
+DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database statements run while handling a request.",
+    ["method", "handler"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in the database while handling a request.",
+    ["method", "handler"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+def server_timing(stats: QueryStats) -> str:
+    """
+    Format statistics as a ``Server-Timing`` header value.
+
+    :param stats: statistics of the request.
+    :return: header value, shown by browser dev tools.
+    """
+    return f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+
+
+class QueryStatsMiddleware:
+    """
+    Counts statements and database time of every HTTP request.
+
+    Values are recorded as Prometheus histograms per route template and,
+    with ``server_timing``, sent back in a ``Server-Timing`` header.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+
+            async def send_with_timing(message: Message) -> None:  # noqa: WPS430
+                if self.server_timing and message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(stats))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                handler = self._handler(scope)
+                if handler is not None:
+                    DB_QUERIES.labels(scope["method"], handler).observe(stats.count)
+                    DB_SECONDS.labels(scope["method"], handler).observe(stats.duration)
+
+    def _handler(self, scope: Scope) -> Optional[str]:
+        # Route templates keep the label cardinality bounded.
+        app: Any = scope.get("app")
+        for route in getattr(app, "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", None)
+        return None